@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Compare per-flow and per-node bulk flow pushes against a local mock RESTCONF endpoint.
+
+    python3 ./Benchmarks/flow_push_benchmark.py --switches 15 --latency 0.002
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sdn_routing.batch_routing import all_pairs_shortest_paths, iter_paths
+from sdn_routing.flow_installer import FlowInstaller, build_flow
+from sdn_routing.mock_restconf import MockRestconfServer
+from sdn_routing.port_map import PortMap, switch_number
+
+
+def random_topology(num_switches, extra_links, seed=0):
+    """Ring plus random chords, as a cost matrix and the port map Mininet would assign."""
+    rng = random.Random(seed)
+    links = {(i, (i + 1) % num_switches) for i in range(num_switches)}
+    while len(links) < num_switches + extra_links:
+        i, j = rng.sample(range(num_switches), 2)
+        if (j, i) not in links:
+            links.add((i, j))
+
+    cost_matrix = [[0] * num_switches for _ in range(num_switches)]
+    port_map = PortMap(num_switches)
+    next_port = [1] * num_switches
+    for i, j in sorted(links):
+        cost_matrix[i][j] = cost_matrix[j][i] = rng.uniform(0.000199, 0.000262)
+        port_map.add_link(i + 1, j + 1, next_port[i], next_port[j])
+        next_port[i] += 1
+        next_port[j] += 1
+    return cost_matrix, port_map
+
+
+def all_pairs_flows(cost_matrix, port_map):
+    """Build the flows of every routed pair, the way route_all_pairs does."""
+    _, predecessors = all_pairs_shortest_paths(cost_matrix)
+    flows = []
+    for source, destination, path in iter_paths(predecessors):
+        dest_no = switch_number(destination)
+        for i in range(len(path) - 1):
+            curr_switch_no = switch_number(path[i])
+            next_switch_no = switch_number(path[i + 1])
+            flow_id = f"flow_{source}_{destination}_{i + 1}"
+            output_port = port_map.port(curr_switch_no, next_switch_no)
+            flows.append((f"openflow:{curr_switch_no}", flow_id, build_flow(flow_id, f"10.0.0.{dest_no}/32", output_port)))
+    return flows
+
+
+def run(server, installer, flows, bulk):
+    server.reset()
+    start = time.perf_counter()
+    results = installer.install_bulk(flows) if bulk else installer.install(flows)
+    elapsed = time.perf_counter() - start
+    failures = sum(result.error is not None for result in results)
+    return elapsed, server.request_count, server.flow_count(), failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--switches", type=int, default=15)
+    parser.add_argument("--extra-links", type=int, default=None, help="chords added to the ring (default: switches)")
+    parser.add_argument("--latency", type=float, default=0.002, help="mock controller time per request in seconds")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    extra_links = args.switches if args.extra_links is None else args.extra_links
+    cost_matrix, port_map = random_topology(args.switches, extra_links)
+    flows = all_pairs_flows(cost_matrix, port_map)
+    print(f"{args.switches} switches, {len(flows)} flows, {args.latency * 1000:.1f} ms per request")
+
+    with MockRestconfServer(latency=args.latency) as server:
+        installer = FlowInstaller(host="127.0.0.1", port=server.port, max_workers=args.workers)
+        try:
+            for name, bulk in (("per-flow", False), ("bulk", True)):
+                elapsed, requests_sent, installed, failures = run(server, installer, flows, bulk)
+                print(f"{name:9} {elapsed * 1000:9.1f} ms  {requests_sent:6} requests  "
+                      f"{installed:6} flows installed  {failures} failures")
+        finally:
+            installer.close()
+
+
+if __name__ == '__main__':
+    main()
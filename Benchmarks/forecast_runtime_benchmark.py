@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""Compare the Keras and the NumPy runtimes of the delay model: cold start, batch latency, memory, agreement.
+
+    python3 ./LSTM_Model/train_delay_lstm.py            # once, writes LSTM_Model/delay_lstm/
+    python3 ./Benchmarks/forecast_runtime_benchmark.py --batch 23 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def child(runtime, directory, windows_path, predictions_path, repeat):
+    """Runs in a fresh interpreter so start-up cost and RSS belong to one runtime only."""
+    start = time.perf_counter()
+    from sdn_routing.delay_forecast import DelayForecaster, NumpyForecaster
+    forecaster = (NumpyForecaster if runtime == "numpy" else DelayForecaster).load(directory)
+    windows = np.load(windows_path)
+    predictions = forecaster.predict(windows)
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeat):
+        batch_start = time.perf_counter()
+        forecaster.predict(windows)
+        latencies.append(time.perf_counter() - batch_start)
+
+    np.save(predictions_path, predictions)
+    print(json.dumps({
+        "cold_start": cold_start,
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def run_child(runtime, args, windows_path, predictions_path):
+    command = [sys.executable, os.path.abspath(__file__), "--child", runtime, "--model", args.model,
+               "--windows", windows_path, "--predictions", predictions_path, "--repeat", str(args.repeat)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"{runtime}: failed\n{result.stderr.strip().splitlines()[-1] if result.stderr else ''}")
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    from sdn_routing.delay_forecast import DEFAULT_MODEL_DIR, NumpyForecaster
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--batch", type=int, default=23, help="links predicted per call")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--child", choices=("keras", "numpy"), help=argparse.SUPPRESS)
+    parser.add_argument("--windows", help=argparse.SUPPRESS)
+    parser.add_argument("--predictions", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.model, args.windows, args.predictions, args.repeat)
+        return
+
+    window = NumpyForecaster.load(args.model).window
+    rng = np.random.default_rng(0)
+    windows = rng.uniform(0.000119, 0.000362, size=(args.batch, window))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        windows_path = os.path.join(tmp, "windows.npy")
+        np.save(windows_path, windows)
+        print(f"{args.batch} links per batch, window {window}, {args.repeat} batches")
+        predictions = {}
+        for runtime in ("keras", "numpy"):
+            predictions_path = os.path.join(tmp, f"{runtime}.npy")
+            stats = run_child(runtime, args, windows_path, predictions_path)
+            if stats is None:
+                continue
+            predictions[runtime] = np.load(predictions_path)
+            print(f"{runtime:6} cold start {stats['cold_start']:7.3f} s  batch p50 {stats['p50'] * 1000:8.3f} ms  "
+                  f"p99 {stats['p99'] * 1000:8.3f} ms  max RSS {stats['max_rss_mb']:7.1f} MB")
+
+    if len(predictions) == 2:
+        difference = np.abs(predictions["keras"] - predictions["numpy"])
+        agree = np.allclose(predictions["numpy"], predictions["keras"], rtol=1e-4, atol=1e-8)
+        print(f"max |keras - numpy| = {difference.max():.3g} ({'within' if agree else 'OUTSIDE'} tolerance)")
+
+
+if __name__ == '__main__':
+    main()
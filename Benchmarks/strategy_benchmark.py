@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+"""Replay one recorded delay trace through the hop-count, QoS and ML strategies on every topology.
+
+    python3 ./Benchmarks/strategy_benchmark.py --backend sim --output strategy_results.json
+    python3 ./Benchmarks/strategy_benchmark.py --backend mock --topology abilene.json --pairs 0
+    sudo python3 ./Benchmarks/strategy_benchmark.py --backend mininet --topology abilene.json --epochs 5
+
+Epoch k: each strategy routes on what it knows at the end of trace interval k (hop count: nothing;
+QoS: the delays measured in k; ML: the model's prediction for k + 1) and installs its flows. The
+links then take the delays of interval k + 1, which is what the routes are scored on.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sdn_routing.batch_routing import all_pairs_shortest_paths, path_from_predecessors
+from sdn_routing.delay_forecast import DEFAULT_MODEL_DIR, link_series, load_forecaster
+from sdn_routing.flow_installer import FlowInstaller, build_flow
+from sdn_routing.flow_state import FlowStateCache, reconcile
+from sdn_routing.link_stats import link_key
+from sdn_routing.measurement_store import MeasurementStore
+from sdn_routing.port_map import switch_number
+from sdn_routing.structured_log import add_logging_arguments, start_logging
+from sdn_routing.topology_loader import load_topology
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TRACE = os.path.join(REPO_ROOT, "ML-Based-Routing", "Actual_values.csv")
+STRATEGIES = ("hop-count", "qos", "ml")
+
+
+def load_trace(path, spec, epochs=None):
+    """(epochs, links) array of per-interval link delays in seconds, as ITGDec reports them.
+
+    Links with their own recorded history replay it; the others replay the recorded
+    links in turn, so larger topologies still see measured delay dynamics.
+    """
+    series_by_link = link_series(MeasurementStore.from_csv(path).scan())
+    recorded = [series_by_link[key] for key in sorted(series_by_link)]
+    columns = [series_by_link.get(link_key(src, dst), recorded[i % len(recorded)])
+               for i, (src, dst) in enumerate(spec.link_list())]
+    length = min(len(column) for column in columns)
+    if epochs is not None:
+        length = min(length, epochs + 1)
+    return np.stack([column[:length] for column in columns], axis=1)
+
+
+def estimate_costs(strategy, trace, epoch, links, forecaster):
+    """Link costs a strategy routes on at the end of interval epoch."""
+    if strategy == "hop-count":
+        return np.ones(len(links))
+    if strategy == "qos":
+        return trace[epoch]
+    history = {link_key(src, dst): trace[:epoch + 1, i] for i, (src, dst) in enumerate(links)}
+    predictions = forecaster.predict_links(history, links)
+    return np.array([trace[epoch, i] if delay is None else delay for i, delay in enumerate(predictions)])
+
+
+def path_delay(path, delay_of):
+    return sum(delay_of[link_key(switch_number(a), switch_number(b))] for a, b in zip(path, path[1:]))
+
+
+def pair_flows(spec, source, destination, path):
+    """The scripts' per-hop destination flows for one routed pair."""
+    dest_ip = spec.host_prefix(switch_number(destination))
+    flows = []
+    for i in range(len(path) - 1):
+        node_no = switch_number(path[i])
+        flow_id = f"flow_{source}_{destination}_{i + 1}"
+        port = spec.port_map.port(node_no, switch_number(path[i + 1]))
+        flows.append((f"openflow:{node_no}", flow_id, build_flow(flow_id, dest_ip, port)))
+    return flows
+
+
+class MockBackend:
+    """Flows go to an in-process mock RESTCONF server; latency is the routed paths' trace delay."""
+
+    name = "mock"
+
+    def __init__(self, spec, delays_ms, latency=0.0):
+        from sdn_routing.mock_restconf import MockRestconfServer
+        self.server = MockRestconfServer(latency=latency).start()
+        self.installer = FlowInstaller(host="127.0.0.1", port=self.server.port)
+
+    def set_delays(self, delays_ms):
+        pass
+
+    def measure(self, pairs):
+        return None
+
+    def controller_requests(self):
+        return self.server.request_count
+
+    def reset(self):
+        self.server.reset()
+
+    def stop(self):
+        self.installer.close()
+        self.server.stop()
+
+
+class SimBackend:
+    """The discrete-event simulator: link delays follow the trace and pairs are timed end to end."""
+
+    name = "sim"
+
+    def __init__(self, spec, delays_ms, latency=0.0):
+        from sdn_routing.netsim import SimTopology
+        self.topology = SimTopology(spec)
+        self.net = self.topology.build_topology(delays_ms)
+        self.installer = self.topology.flow_installer
+        self.links = spec.link_list()
+
+    def set_delays(self, delays_ms):
+        for (src, dst), delay in zip(self.links, delays_ms):
+            self.net.set_link_delay(f"s{src}", f"s{dst}", delay)
+
+    def measure(self, pairs):
+        delays = self.net.one_way_delays([(f"h{switch_number(src)}", f"h{switch_number(dst)}") for src, dst in pairs])
+        return [float(np.mean(samples)) if samples else None for samples in delays.values()]
+
+    def controller_requests(self):
+        return self.installer.requests
+
+    def reset(self):
+        for switch in self.net.switches:
+            switch.set_flows({})
+        self.installer.requests = 0
+
+    def stop(self):
+        pass
+
+
+class MininetBackend:
+    """A live Mininet network under OpenDaylight (needs root and a running controller).
+
+    Link delays are changed with tc through the interfaces, pairs are timed with ping.
+    """
+
+    name = "mininet"
+
+    def __init__(self, spec, delays_ms, latency=0.0):
+        from mininet.link import TCLink
+        from mininet.net import Mininet
+        from mininet.node import OVSSwitch, RemoteController
+        from sdn_routing.readiness import switches_connected, wait_until
+
+        self.net = Mininet(controller=RemoteController, switch=OVSSwitch, link=TCLink)
+        self.net.addController('c0', controller=RemoteController, ip='127.0.0.1', port=6633)
+        spec.add_to_mininet(self.net, delays=delays_ms)
+        self.net.start()
+        wait_until(switches_connected(self.net), timeout=30, name="switches connected")
+        self.installer = FlowInstaller()
+        self.links = spec.link_list()
+
+    def set_delays(self, delays_ms):
+        for (src, dst), delay in zip(self.links, delays_ms):
+            for intf1, intf2 in self.net.get(f"s{src}").connectionsTo(self.net.get(f"s{dst}")):
+                intf1.config(delay=f"{delay}ms")
+                intf2.config(delay=f"{delay}ms")
+
+    def measure(self, pairs):
+        delays = []
+        for src, dst in pairs:
+            sender, receiver = self.net.get(f"h{switch_number(src)}"), self.net.get(f"h{switch_number(dst)}")
+            match = re.search(r"= [\d.]+/([\d.]+)/", sender.cmd(f"ping -c 3 -i 0.2 {receiver.IP()}"))
+            delays.append(float(match.group(1)) / 2 if match else None)  # half the RTT
+        return delays
+
+    def controller_requests(self):
+        return None  # only the client-side count ("requests") is known
+
+    def reset(self):
+        pass
+
+    def stop(self):
+        self.installer.close()
+        self.net.stop()
+
+
+BACKENDS = {"mock": MockBackend, "sim": SimBackend, "mininet": MininetBackend}
+
+
+def run_strategy(strategy, spec, trace, backend, pairs, forecaster, bulk):
+    """Route every epoch of the trace with one strategy.
+
+    Returns the per-epoch records and the requests the controller side counted.
+    """
+    links = spec.link_list()
+    state = FlowStateCache()
+    previous_paths = {}
+    records = []
+    backend.reset()
+    backend.set_delays(trace[0] * 1000)
+
+    for epoch in range(len(trace) - 1):
+        start = time.perf_counter()
+        costs = estimate_costs(strategy, trace, epoch, links, forecaster)
+        cost_matrix = spec.cost_matrix(costs)
+        _, predecessors = all_pairs_shortest_paths(cost_matrix)
+        paths = {(src, dst): path_from_predecessors(predecessors, src, dst) for src, dst in pairs}
+        flows = [flow for (src, dst), path in paths.items() if path for flow in pair_flows(spec, src, dst, path)]
+        computed = time.perf_counter()
+        diff, results = reconcile(backend.installer, state, flows, prefix="flow_", bulk=bulk)
+        installed = time.perf_counter()
+
+        # The routes now carry the next interval's traffic
+        true_delays = trace[epoch + 1]
+        backend.set_delays(true_delays * 1000)
+        delay_of = {link_key(src, dst): delay * 1000 for (src, dst), delay in zip(links, true_delays)}
+        _, best = all_pairs_shortest_paths(spec.cost_matrix(true_delays))
+        latencies, stretches = [], []
+        for (src, dst), path in paths.items():
+            if not path:
+                continue
+            latency = path_delay(path, delay_of)
+            latencies.append(latency)
+            stretches.append(latency / path_delay(path_from_predecessors(best, src, dst), delay_of))
+        measured = backend.measure(list(paths))
+        measured = [value for value in measured or () if value is not None]
+
+        records.append({
+            "epoch": epoch,
+            "path_latency_ms": float(np.mean(latencies)),
+            "stretch": float(np.mean(stretches)),
+            "measured_latency_ms": float(np.mean(measured)) if measured else None,
+            "routes_changed": sum(paths[pair] != previous_paths.get(pair) for pair in paths) if previous_paths else 0,
+            "flows_changed": len(diff.add) + len(diff.modify) + len(diff.delete),
+            "requests": len(results),
+            "failed_requests": sum(result.error is not None for result in results),
+            "compute_s": computed - start,
+            "install_s": installed - computed,
+            "convergence_s": installed - start,
+        })
+        previous_paths = paths
+
+    controller_requests = backend.controller_requests()
+    # Leave the controller as the run found it
+    reconcile(backend.installer, state, [], prefix="flow_")
+    return records, controller_requests
+
+
+def summarize(records, controller_requests):
+    def mean(key):
+        values = [record[key] for record in records if record[key] is not None]
+        return float(np.mean(values)) if values else None
+
+    return {
+        "epochs": len(records),
+        "path_latency_ms": mean("path_latency_ms"),
+        "stretch": mean("stretch"),
+        "measured_latency_ms": mean("measured_latency_ms"),
+        "routes_changed": int(sum(record["routes_changed"] for record in records)),
+        "flows_changed": int(sum(record["flows_changed"] for record in records)),
+        "requests": int(sum(record["requests"] for record in records)),
+        "controller_requests": controller_requests,
+        "convergence_ms_p50": float(np.percentile([record["convergence_s"] for record in records], 50) * 1000),
+        "convergence_ms_max": float(max(record["convergence_s"] for record in records) * 1000),
+    }
+
+
+def sample_pairs(num_switches, count, seed):
+    pairs = [(f"s{src}", f"s{dst}") for src in range(1, num_switches + 1)
+             for dst in range(1, num_switches + 1) if src != dst]
+    if count and count < len(pairs):
+        pairs = random.Random(seed).sample(pairs, count)
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="sim")
+    parser.add_argument("--topology", action="append",
+                        help="topology file, repeatable (default: abilene, abovenet and german50)")
+    parser.add_argument("--strategy", action="append", choices=STRATEGIES, help="repeatable (default: all)")
+    parser.add_argument("--trace", default=DEFAULT_TRACE, help="measured delays (CSV with Source,Destination,Avg_Delay)")
+    parser.add_argument("--epochs", type=int, default=None, help="replay at most this many intervals")
+    parser.add_argument("--pairs", type=int, default=30, help="routed source/destination pairs (0: all)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--no-bulk", dest="bulk", action="store_false", help="push flows one by one")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock controller time per request in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="strategy_results.json")
+    add_logging_arguments(parser)
+    parser.set_defaults(log_level="WARNING")  # per-push summaries only on request
+    args = parser.parse_args()
+    start_logging(args)
+
+    forecaster = load_forecaster(args.model)
+    topologies = args.topology or ["abilene.json", "abovenet.json", "german50.json"]
+    strategies = args.strategy or list(STRATEGIES)
+    results = {"backend": args.backend, "trace": args.trace, "bulk": args.bulk, "runs": []}
+
+    print(f"{'topology':10} {'strategy':10} {'latency ms':>10} {'stretch':>8} {'measured':>9} {'churn':>6} "
+          f"{'requests':>9} {'conv p50 ms':>12}")
+    for topology_path in topologies:
+        spec = load_topology(topology_path)
+        trace = load_trace(args.trace, spec, args.epochs)
+        pairs = sample_pairs(len(spec), args.pairs, args.seed)
+        backend = BACKENDS[args.backend](spec, trace[0] * 1000, args.latency)
+        try:
+            for strategy in strategies:
+                records, controller_requests = run_strategy(strategy, spec, trace, backend, pairs, forecaster, args.bulk)
+                summary = summarize(records, controller_requests)
+                results["runs"].append({"topology": spec.name, "strategy": strategy, "pairs": len(pairs),
+                                        "summary": summary, "epochs": records})
+                measured = summary["measured_latency_ms"]
+                print(f"{spec.name:10} {strategy:10} {summary['path_latency_ms']:10.4f} {summary['stretch']:8.4f} "
+                      f"{measured if measured is not None else float('nan'):9.4f} {summary['routes_changed']:6} "
+                      f"{summary['requests']:9} {summary['convergence_ms_p50']:12.2f}")
+        finally:
+            backend.stop()
+
+    with open(args.output, "w") as fd:
+        json.dump(results, fd, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Replay a recorded routing-daemon trace through path computation and flow reconciliation, offline.
+
+    python3 ./QoS-Based-Routing/abilene.py --daemon --epochs 20 --record-trace abilene_trace.jsonl
+    python3 ./Benchmarks/trace_replay.py --trace abilene_trace.jsonl --repeat 5
+    python3 ./Benchmarks/trace_replay.py --trace abilene_trace.jsonl --estimate ml --speed 60
+    python3 ./Benchmarks/trace_replay.py --simulate german50.json --epochs 20 --trace german50_trace.jsonl
+
+Flows go to the simulator's in-memory tables (no Mininet, D-ITG or ODL). With the recorded costs
+every epoch must reproduce the recorded routes and flow changes, and the exit status is 1 if any
+differs, so a replay doubles as a regression test. --simulate records a trace on the simulator first.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sdn_routing.delay_forecast import DEFAULT_MODEL_DIR, forecast_estimator, load_forecaster
+from sdn_routing.netsim import SimTopology
+from sdn_routing.routing_daemon import RoutingDaemon
+from sdn_routing.structured_log import add_logging_arguments, start_logging
+from sdn_routing.topology_loader import load_topology
+from sdn_routing.trace import Trace, replay
+
+STAGES = ("estimate", "compute", "reconcile", "total")
+
+
+def simulate(topology_path, trace_path, epochs, duration_ms, seed=0):
+    """Record a trace of the measured-delay (QoS) daemon on the simulator, with heavy background
+    traffic moving to a random third of the links every epoch so that routes change."""
+    topology = SimTopology(load_topology(topology_path))
+    topology.build_topology()
+    topology.read_mininet_topology()
+    topology.cost_matrix = topology.print_adjacency_matrix()
+    links = topology.spec.link_list()
+    rng = random.Random(seed)
+
+    def measure():
+        for src, dst in rng.sample(links, max(1, len(links) // 3)):
+            # 1000-byte packets at 700-1200/s load a 10 Mbit/s link to 55-95 %
+            topology.net.start_traffic(f"s{src}", f"s{dst}", duration_ms=duration_ms, packet_size=1000,
+                                       rate=rng.uniform(700, 1200))
+        return topology.measure_link_delays(links, duration_ms=duration_ms)
+
+    daemon = RoutingDaemon(topology, measure, period=0.0, timings_path=None, trace_path=trace_path)
+    daemon.run(epochs=epochs)
+
+
+def make_estimate(name, trace, model_dir):
+    if name == "recorded":
+        return None  # replay() defaults to the recorded costs
+    if name == "measured":
+        return lambda measurements: measurements
+    # Starts without history, so links are only re-costed once their window has filled
+    return forecast_estimator(load_forecaster(model_dir), {}, trace.topology().link_list())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", required=True, help="trace recorded with --record-trace (JSON lines)")
+    parser.add_argument("--estimate", choices=("recorded", "measured", "ml"), default="recorded",
+                        help="link costs: the ones the live run estimated, the raw measurements, or the model's")
+    parser.add_argument("--model", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="multiple of the recorded epoch period (default 0: back to back)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the trace this many times")
+    parser.add_argument("--simulate", default=None, metavar="TOPOLOGY",
+                        help="first record --trace on the simulator with this topology")
+    parser.add_argument("--epochs", type=int, default=10, help="epochs to record with --simulate")
+    parser.add_argument("--duration-ms", type=int, default=2000, help="simulated probe length with --simulate")
+    add_logging_arguments(parser)
+    parser.set_defaults(log_level="WARNING")
+    args = parser.parse_args()
+    start_logging(args)
+
+    if args.simulate:
+        start = time.perf_counter()
+        simulate(args.simulate, args.trace, args.epochs, args.duration_ms)
+        print(f"Recorded {args.epochs} epochs on {args.simulate} to {args.trace} in {time.perf_counter() - start:.2f}s")
+
+    trace = Trace.load(args.trace)
+    header = trace.header
+    print(f"{header['topology']}: {len(trace)} epochs, {len(header['labels'])} switches, "
+          f"{len(header['links'])} links, recorded every {header['period']:.1f}s")
+
+    timings, mismatches = [], []
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        run_timings, verifier = replay(trace, make_estimate(args.estimate, trace, args.model), args.speed)
+        timings.extend(run_timings)
+        mismatches = verifier.mismatches
+    elapsed = time.perf_counter() - start
+
+    recorded_span = len(trace) * header["period"] * args.repeat
+    print(f"Replayed {len(timings)} epochs in {elapsed:.3f}s"
+          + (f" ({recorded_span / elapsed:.0f}x the recorded run)" if recorded_span else ""))
+    for stage in STAGES:
+        values = np.array([timing[stage] for timing in timings]) * 1000
+        print(f"{stage:10} p50 {np.percentile(values, 50):8.2f} ms  p95 {np.percentile(values, 95):8.2f} ms  "
+              f"max {values.max():8.2f} ms")
+
+    for epoch, differing, recorded_flows, replayed_flows in mismatches:
+        print(f"Epoch {epoch}: {differing} predecessor entries differ, flows changed {recorded_flows} live "
+              f"vs {replayed_flows} replayed")
+    if args.estimate == "recorded":
+        print("Routes match the recording" if not mismatches else f"{len(mismatches)} epochs differ from the recording")
+        sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,115 +6,135 @@ from mininet.cli import CLI
 from mininet.log import setLogLevel, info
 from mininet.link import TCLink
 import networkx as nx
+import argparse
 import time
-import csv
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sdn_routing.adaptive_sampler import AdaptiveSampler, add_sampling_arguments
+from sdn_routing.itg_receivers import ReceiverPool
+from sdn_routing.itgdec import parse_summary
+from sdn_routing.measurement_store import MeasurementStore
+from sdn_routing.probe_scheduler import assign_probe_addresses, measure_in_rounds, run_ditg_probe
+from sdn_routing.readiness import WAIT_LOG, switches_connected, wait_until
+from sdn_routing.metrics import METRICS, add_metrics_arguments, instrumented, start_metrics
+from sdn_routing.structured_log import add_logging_arguments, get_logger, start_logging
+from sdn_routing.topology_loader import add_topology_argument, load_topology
+
+log = get_logger("routing")
 
 #Abilene topology
+@instrumented
 class CustomTopology:
-    def __init__(self):
+    def __init__(self, spec, store=None, receivers=None):
+        self.spec = spec
+        self.receivers = receivers
         self.net = None
         self.graph = nx.Graph()
+        self.store = store
 
     def build_topology(self):
-        """Create the topology with 15 switches and hosts."""
+        """Create the switches, hosts and links of the loaded topology."""
         self.net = Mininet(controller=RemoteController, switch=OVSSwitch, link=TCLink)
 
         info('*** Adding controller\n')
         self.net.addController('c0', controller=RemoteController, ip='127.0.0.1', port=6633)
 
-        info('*** Adding switches\n')
-        switches = {
-            i + 1: self.net.addSwitch(f's{i+1}', protocols='OpenFlow13') for i in range(15)
-        }
-
-        info('*** Adding hosts\n')
-        hosts = {
-            i + 1: self.net.addHost(f'h{i+1}', ip=f'10.0.0.{i+1}/24') for i in range(15)
-        }
-
-        info('*** Adding links\n')
-        links = [(1, 2, 0.092), (1, 3, 0.094), (2, 4, 0.094), (2, 5, 0.1), (3, 5, 0.084), (4, 6, 0.1), (5, 6, 0.090), (5, 7, 0.097), (6, 8, 0.097), (7, 9, 0.101), (8, 10, 0.105), (9, 11, 0.104)]
-
-        for src, dst, delay in links:
-            self.net.addLink(switches[src], switches[dst], bw=10, delay=f'{delay}ms')
-
-        # Connect hosts to switches
-        for i in range(1, 16):
-            self.net.addLink(hosts[i], switches[i])
+        info('*** Adding switches, hosts and links\n')
+        self.spec.add_to_mininet(self.net)
 
         return self.net
 
-    def measure_delay_ditg(self):
+    def measure_delay_ditg(self, links=None):
+        """Probe the given links (default: all) once, store the delays and return {(src, dst): delay}."""
         net = self.net
+        delays = {}
         try:
-            links = [(1, 2, 0.092), (1, 3, 0.094), (2, 4, 0.094), (2, 5, 0.1), (3, 5, 0.084), (4, 6, 0.1), (5, 6, 0.090), (5, 7, 0.097), (6, 8, 0.097), (7, 9, 0.101), (8, 10, 0.105), (9, 11, 0.104)]
+            links = self.spec.link_list() if links is None else links
 
-            for src, dst,x in links:
+            def probe(src, dst, slot):
+                # Send traffic using ITGSend from the source switch to the destination switch
+                return run_ditg_probe(net.get(f"s{src}"), net.get(f"s{dst}"), self.receivers,
+                                      duration_ms=15000, packet_size=100, rate=10, ping=True)
+
+            # Links that share no switch are probed concurrently, one matching per round
+            decode_results = measure_in_rounds(links, probe)
+
+            for src, dst in links:
                 switch1 = f"s{src}"
                 switch2 = f"s{dst}"
-                s1 = net.get(switch1)
-                s2 = net.get(switch2)
-                s1.cmd('ifconfig {} 10.0.0.100 netmask 255.0.0.0'.format(switch1))
-                s2.cmd('ifconfig {} 10.0.0.101 netmask 255.0.0.0'.format(switch2))
-
-                # Start ITGRecv on one switch
-                s2.cmd("nohup ITGRecv > /dev/null 2>&1 &")
-                time.sleep(1)  # Allow ITGRecv to initialize
-
-                # Send traffic using ITGSend from the other switch
-                itg_send_command = (
-                    "ITGSend -T UDP -a 10.0.0.101 -c 100 -C 10 "
-                    "-t 15000 -l sender.log -x receiver.log"
-                )
-
-                s1.cmd("ping -c 4 10.0.0.101")
-                s1.cmd(itg_send_command)
-
-                # Decode the log files using ITGDec
-                decode_result = s2.cmd("ITGDec receiver.log")
-
-                # Parse the delay result from ITGDec output
-                avg_delay = None
-                for line in decode_result.splitlines():
-                    if "average bitrate" in line.lower():
-                        avg_delay = line.split("=")[-1].strip().split()[0]  # Extract only the delay value
-                        print(f"Avg delay from {switch1} to {switch2}: {avg_delay}")
-                        break
+                decode_result = decode_results[(src, dst)]
+                if isinstance(decode_result, Exception):
+                    log.warning("D-ITG probe %s -> %s failed: %s", switch1, switch2, decode_result)
+                    continue
+
+                # Parse the delay result from the ITGDec summary
+                summary = parse_summary(decode_result)
+                avg_delay = summary.avg_delay if summary is not None else None
+                if avg_delay is not None:
+                    log.debug("Avg delay from %s to %s: %s", switch1, switch2, avg_delay,
+                              extra={"fields": {"src": src, "dst": dst, "delay_s": avg_delay}})
+                    # Buffered; the store writes per-link chunks in batches
+                    self.store.append(src, dst, avg_delay, jitter=summary.avg_jitter, loss=summary.loss_percent)
+                    delays[(src, dst)] = avg_delay
                 else:
-                    print(f"Failed to get delay result for {switch1} -> {switch2}")
-
-                # Write the result for this src-dst pair to CSV
-                with open('demo.csv', mode='a', newline="") as fd:
-                    csv_writer = csv.writer(fd)
-                    if avg_delay:
-                        csv_writer.writerow([src, dst, avg_delay])
-
-                # Cleanup log files and stop ITGRecv
-                s1.cmd("rm -f sender.log receiver.log")
-                s2.cmd("pkill ITGRecv")
+                    log.warning("Failed to get delay result for %s -> %s", switch1, switch2)
 
         except Exception as e:
-            print(f"Error during D-ITG delay measurement: {e}")
+            log.error("Error during D-ITG delay measurement: %s", e)
+        return delays
 
 
 def main():
+    parser = argparse.ArgumentParser(description="D-ITG link delay dataset generation")
+    add_topology_argument(parser, "dataset.json")
+    add_sampling_arguments(parser)
+    add_metrics_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    start_metrics(args)
+    start_logging(args)
+
     setLogLevel('info')
-    topology = CustomTopology()
+    # A fresh store per run, so demo.csv only holds this run's samples
+    store = MeasurementStore(os.path.join('measurements', time.strftime('%Y%m%d-%H%M%S')))
+    # One long-lived ITGRecv per namespace serves every probe of the run
+    receivers = ReceiverPool()
+    topology = CustomTopology(load_topology(args.topology), store, receivers)
     net = topology.build_topology()
 
-    with open('demo.csv', mode='w', newline="") as fd:
-        csv_writer = csv.writer(fd)
-        csv_writer.writerow(["Source", "Destination", "Avg_Delay(ms)"])
+    info("*** Starting network\n")
+    with METRICS.timer("stage_seconds", stage="mininet_start"):
+        net.start()
 
     print("============================Stabilizing topology=====================================")
-    time.sleep(5)
+    wait_until(switches_connected(net), timeout=30, name="switches connected")
     print("=====================================================================================")
-
-    info("*** Starting network\n")
-    net.start()
-
-    for i in range(100):  # Measure delay 100 times
-        topology.measure_delay_ditg()
+    # Every switch gets its own probe address so probes can run side by side
+    assign_probe_addresses(net)
+
+    links = topology.spec.link_list()
+    sampler = AdaptiveSampler(links, target_error=args.target_error, min_samples=args.min_samples,
+                              max_gap=args.max_gap)
+    try:
+        for i in range(args.rounds):
+            due = links if args.sampling == "all" else sampler.select()
+            sampler.update(topology.measure_delay_ditg(due) if due else {})
+            log.info("Round %d: probed %d/%d links", i, len(due), len(links),
+                     extra={"fields": {"round": i, "probed": len(due)}})
+            if args.sampling == "adaptive" and sampler.converged():
+                print(f"Every link's mean delay is within {args.target_error:.0%} after {i + 1} rounds")
+                break
+        print(f"{sampler.probes} link measurements instead of {args.rounds * len(links)}")
+    finally:
+        receivers.shutdown()
+        # Flush what was measured even if the run is interrupted, and keep demo.csv for the notebook
+        store.close()
+        print(f"Exported {store.export_csv('demo.csv')} measurements from {store.root} to demo.csv")
+
+    WAIT_LOG.report()
+    METRICS.report()
 
     info("*** Running CLI\n")
     CLI(net)
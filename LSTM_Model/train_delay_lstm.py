@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""Train the per-link delay forecaster on windows of each link's measured delay history.
+
+    python3 ./LSTM_Model/train_delay_lstm.py --csv ./LSTM_Model/data.csv --window 8
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sdn_routing.delay_forecast import DEFAULT_MODEL_DIR, link_series, train_forecaster
+from sdn_routing.measurement_store import MeasurementStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv"),
+                        help="Source,Destination,Avg_Delay(ms) measurements, in measurement order")
+    parser.add_argument("--window", type=int, default=8, help="past samples per link the model sees")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--out", default=DEFAULT_MODEL_DIR, help="directory for the model, scaler and window size")
+    args = parser.parse_args()
+
+    series_by_link = link_series(MeasurementStore.from_csv(args.csv).scan())
+    print(f"{len(series_by_link)} links, {sum(len(s) for s in series_by_link.values())} samples")
+
+    forecaster, metrics = train_forecaster(series_by_link, window=args.window,
+                                           epochs=args.epochs, batch_size=args.batch_size)
+    print(f"Validation MAE {metrics['mae']:.6g}  RMSE {metrics['rmse']:.6g}  "
+          f"(repeat-last-sample MAE {metrics['last_value_mae']:.6g}) on {metrics['test_samples']} windows")
+
+    forecaster.save(args.out)
+    print(f"Saved to {args.out}")
+
+    # Next-interval delay of every link, in one batched call
+    links = sorted(series_by_link)
+    for link, delay in zip(links, forecaster.predict_links(series_by_link, links)):
+        print(f"Link {link}: Predicted Delay = {delay:.6f}")
+
+
+if __name__ == '__main__':
+    main()
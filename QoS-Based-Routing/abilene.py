@@ -8,71 +8,62 @@ from mininet.link import TCLink
 import networkx as nx
 import matplotlib.pyplot as plt
 import requests
+import argparse
+import asyncio
 import json
 import time
 import random
-import pandas as pd
-import threading
-
-def start_background_traffic(switch1, switch2):
-    try:
-        """Starts background traffic between two switches."""
-        print(f"Starting background traffic between {switch1} and {switch2}")
-        switch2.cmd("nohup ITGRecv > /dev/null 2>&1 &")  # Start ITGRecv on one switch
-        time.sleep(1)  # Allow ITGRecv to initialize
-        # Run ITGSend continuously as background traffic
-        switch1.cmd(
-            "nohup ITGSend -T UDP -a 10.0.0.101 -c 128 -C 150 -t 60000 > /dev/null 2>&1 &"
-        )
-        print(f"Background traffic running between {switch1} and {switch2}")
-    except Exception as e:
-        print("In thread:",e)
-
-
+import math
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sdn_routing.routing_engine import RoutingEngine
+from sdn_routing.batch_routing import add_routing_arguments, pair_path, route_all_pairs
+from sdn_routing.flow_installer import FlowInstaller, build_flow
+from sdn_routing.flow_state import FlowStateCache, reconcile
+from sdn_routing.itg_receivers import ReceiverPool
+from sdn_routing.link_stats import LinkStatsIndex
+from sdn_routing.measurement_store import MeasurementStore
+from sdn_routing.port_map import PortMap, switch_number
+from sdn_routing.port_telemetry import add_telemetry_arguments, link_measure
+from sdn_routing.readiness import WAIT_LOG, flows_visible, switches_connected, wait_until
+from sdn_routing.routing_daemon import RoutingDaemon, add_daemon_arguments
+from sdn_routing.itgdec import parse_summary
+from sdn_routing.probe_scheduler import assign_probe_addresses, measure_link_delays
+from sdn_routing import async_ops
+from sdn_routing.metrics import METRICS, add_metrics_arguments, instrumented, start_metrics
+from sdn_routing.structured_log import MatrixText, add_logging_arguments, dump_matrix, get_logger, start_logging
+from sdn_routing.topology_loader import add_topology_argument, load_topology
+
+log = get_logger("routing")
+
+@instrumented
 class CustomTopology:
-    def __init__(self):
+    def __init__(self, spec):
+        self.spec = spec
         self.net = None
         self.graph = nx.Graph()
         self.cost_matrix = []
+        self.engine = RoutingEngine()
+        self.flow_installer = FlowInstaller()
+        self.flow_state = FlowStateCache()
+        self.port_map = None
+        self.distances = None
+        self.predecessors = None
+        self.all_pairs = False  # route every pair at once and read paths from the predecessor matrix
         self.route=[]
 
 
     def build_topology(self,first_values):
-        """Create the topology with 15 switches and hosts."""
+        """Create the switches, hosts and links of the loaded topology."""
         self.net = Mininet(controller=RemoteController, switch=OVSSwitch, link=TCLink)
 
         info('*** Adding controller\n')
         self.net.addController('c0', controller=RemoteController, ip='127.0.0.1', port=6633)
 
-        info('*** Adding switches\n')
-        switches = {
-            i+1: self.net.addSwitch(f's{i+1}', protocols='OpenFlow13') for i in range(11)
-        }
-
-        info('*** Adding hosts\n')
-        hosts = {
-            i+1: self.net.addHost(f'h{i+1}', ip=f'10.0.0.{i+1}/24') for i in range(11)
-        }
-
-        info('*** Adding links\n')
-        links = [
-            (1, 11), (1, 6),
-            (2, 5), (2, 7),
-            (2, 9), (3, 7),
-            (3, 8), (4, 8),
-            (4, 7), (8, 10),
-            (9, 11), (9, 2),
-            (10, 11)
-        ]
-        
-        i=0
-        for src, dst in links:
-            self.net.addLink(switches[src], switches[dst], bw=10, delay=f'{first_values[i]}ms')
-            i+=1
-
-        # Connect hosts to switches
-        for i in range(1, 12):
-            self.net.addLink(hosts[i], switches[i])
+        info('*** Adding switches, hosts and links\n')
+        self.spec.add_to_mininet(self.net, delays=first_values)
 
         return self.net
 
@@ -94,9 +85,12 @@ class CustomTopology:
             weight = float(delay.strip('ms')) if 'ms' in delay else 0.0
             self.graph.add_edge(src, dst, weight=weight)
 
+        # Port numbers of every switch-to-switch link, looked up per hop by build_flow_rules
+        self.port_map = PortMap.from_mininet(self.net)
+
 
     def print_adjacency_matrix(self):
-        """Construct and print the adjacency matrix of the graph for switches."""
+        """Construct the adjacency matrix of the graph for switches; the full matrix is logged at DEBUG."""
         def construct_adjacency_matrix(graph, switches):
             """Construct the adjacency matrix for switch-to-switch topology."""
             num_switches = len(switches)
@@ -112,115 +106,81 @@ class CustomTopology:
         switches = [node for node in self.graph.nodes if node.startswith('s')]
         adjacency_matrix = construct_adjacency_matrix(self.graph, switches)
 
-        print("*** Adjacency Matrix ***")
-        print(" " * 10 + "  ".join(f"{s:10}" for s in switches))
-        for i, row in enumerate(adjacency_matrix):
-            print(f"{switches[i]:10}" + "  ".join(f"{val:10}" for val in row))
+        log.info("Adjacency matrix of %d switches", len(switches))
+        log.debug("%s", MatrixText(adjacency_matrix, switches))
+        dump_matrix("adjacency", adjacency_matrix)
 
         return adjacency_matrix
 
-    def add_flow_rules(self, source, destination, path):
-        """Add flow rules for the given path."""
-        routes = [[ 0,  0,  0,  0,  0,  2,  0,  0,  0,  0,  1],
-                  [ 0,  0,  0,  0,  1,  0,  2,  0,  9,  0,  0],
-                  [ 0,  0,  0,  0,  0,  0,  1,  2,  0,  0,  0],
-                  [ 0,  0,  0,  0,  0,  0,  2,  1,  0,  0,  0],
-                  [ 0,  1,  0,  0,  0,  0,  0,  0,  0,  0,  0],
-                  [1,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0],
-                  [ 0,  1,  2,  3,  0,  0,  0,  0,  0,  0,  0],
-                  [ 0,  0,  1,  2,  0,  0,  0,  0,  0,  3,  0],
-                  [ 0,  3,  0,  0,  0,  0,  0,  0,  0,  0,  2],
-                  [ 0,  0,  0,  0,  0,  0,  0,  1,  0,  0,  2],
-                  [ 1,  0,  0,  0,  0,  0,  0,  0,  2,  3,  0]]
-
-        dest_no = int(destination[1])  # Extract destination switch number
-        print("path:",path)
+    def build_flow_rules(self, source, destination, path):
+        """Build the (node, flow id, flow body) entries for the given path.
+        Output ports come from the port map discovered from the Mininet links
+        (or, before that, the one predicted from the topology file)."""
+        if self.port_map is None:
+            self.port_map = self.spec.port_map
+
+        dest_no = switch_number(destination)  # Extract destination switch number
+        log.debug("Path %s", path)
 
+        flows = []
         for i in range(len(path) - 1):
             curr_switch = path[i]  # Current switch in the path
             next_hop_switch = path[i + 1]  # Next hop switch in the path
 
-            curr_switch_no = int(curr_switch[1])
-            next_switch_no = int(next_hop_switch[1])
+            curr_switch_no = switch_number(curr_switch)
+            next_switch_no = switch_number(next_hop_switch)
 
-            ODL_HOST = "localhost"
-            ODL_PORT = "8181"
             NODE_ID = f"openflow:{curr_switch_no}"
-            TABLE_ID = "0"
             FLOW_ID = f"flow_{source}_{destination}_{i + 1}"
-            DEST_IP = f"10.0.0.3/24"
-            PRIORITY = "1000"
-            OUTPUT_PORT = f"{routes[curr_switch_no - 1][next_switch_no - 1]}"
-
-            url = f"http://{ODL_HOST}:{ODL_PORT}/restconf/config/opendaylight-inventory:nodes/node/{NODE_ID}/flow-node-inventory:table/{TABLE_ID}/flow/{FLOW_ID}"
-
-            flow_data = {
-                "flow": {
-                    "id": FLOW_ID,
-                    "table_id": int(TABLE_ID),
-                    "priority": int(PRIORITY),
-                    "flow-name": "dest-ip-flow",
-                    "match": {
-                        "ipv4-destination": DEST_IP
-                    },
-                    "instructions": {
-                        "instruction": [
-                            {
-                                "order": 0,
-                                "apply-actions": {
-                                    "action": [
-                                        {
-                                            "order": 0,
-                                            "output-action": {
-                                                "output-node-connector": OUTPUT_PORT,
-                                                "max-length": 65535
-                                            }
-                                        }
-                                    ]
-                                }
-                            }
-                        ]
-                    }
-                }
-            }
-
-            try:
-                response = requests.put(url, json=flow_data, auth=("admin", "admin"))
-                if response.status_code == 200 or response.status_code == 201:
-                    print(f"Flow added successfully: {FLOW_ID}")
-                else:
-                    print(f"Failed to add flow {FLOW_ID}. Response: {response.status_code}, {response.text}")
-            except Exception as e:
-                print(f"Error while adding flow {FLOW_ID}: {e}")
+            DEST_IP = self.spec.host_prefix(dest_no)
+            OUTPUT_PORT = self.port_map.port(curr_switch_no, next_switch_no)
+            flows.append((NODE_ID, FLOW_ID, build_flow(FLOW_ID, DEST_IP, OUTPUT_PORT)))
+        return flows
+
+    def add_flow_rules(self, source, destination, path):
+        """Add flow rules for the given path, pushing only the hops that changed since the last route."""
+        flows = self.build_flow_rules(source, destination, path)
+        diff, results = reconcile(self.flow_installer, self.flow_state, flows, prefix=f"flow_{source}_{destination}_")
+        return results
 
         
         
-    def build_graph_from_cost_matrix(self, cost_matrix):
-        """Build a NetworkX graph from the cost matrix."""
-        graph = nx.Graph()
-        num_nodes = len(cost_matrix)
-
-        for i in range(num_nodes):
-            for j in range(num_nodes):
-                if cost_matrix[i][j] > 0:  # Add edge only if cost is greater than 0
-                    graph.add_edge(f's{i+1}', f's{j+1}', weight=cost_matrix[i][j])
-
-        return graph
+    def update_link_cost(self, node1, node2, cost):
+        """Update a link cost in the cost matrix and repair only the affected shortest-path trees."""
+        i = switch_number(node1) - 1
+        j = switch_number(node2) - 1
+        self.cost_matrix[i][j] = cost
+        self.cost_matrix[j][i] = cost
+        self.engine.sync(self.cost_matrix)
+        self.engine.update_link(node1, node2, cost)
 
     def find_shortest_path_from_matrix(self, start_node, target_node):
-        """Find and print the shortest path using NetworkX and cost matrix."""
-        graph = self.build_graph_from_cost_matrix(self.cost_matrix)
+        """Find and log the shortest path using the persistent routing engine; with all_pairs
+        (--all-pairs) every pair is routed at once and this one is read from the predecessor matrix."""
+        if self.all_pairs:
+            self.route_all_pairs()
+            path, path_length = pair_path(self, start_node, target_node)
+            if not path:
+                log.warning("No path found between %s and %s", start_node, target_node)
+                return
+            log.info("Shortest path from %s to %s: %s (total cost %s)", start_node, target_node, path, path_length)
+            self.route = path
+            return
+
+        self.engine.sync(self.cost_matrix)
 
         try:
-            # Use Dijkstra's algorithm to find the shortest path
-            path = nx.dijkstra_path(graph, source=start_node, target=target_node, weight='weight')
-            path_length = nx.dijkstra_path_length(graph, source=start_node, target=target_node, weight='weight')
-            print(f"Shortest path from {start_node} to {target_node}: {path}")
-            print(f"Path length (total cost): {path_length}")
+            # Reuse the cached shortest-path tree of start_node (Dijkstra only on first use)
+            path, path_length = self.engine.shortest_path(start_node, target_node)
+            log.info("Shortest path from %s to %s: %s (total cost %s)", start_node, target_node, path, path_length)
             self.route=path
             self.add_flow_rules(start_node, target_node, path)
         except nx.NetworkXNoPath:
-            print(f"No path found between {start_node} and {target_node}")
+            log.warning("No path found between %s and %s", start_node, target_node)
+
+    def route_all_pairs(self, bulk=True):
+        """Route every switch pair in one vectorized pass and reconcile all their flows (see batch_routing)."""
+        return route_all_pairs(self, bulk)
             
     def pingDevice(self,node1,node2):
         h1=self.net.get(node1)
@@ -242,153 +202,146 @@ class CustomTopology:
         print("======================================================")
 
     def ditg_delay_calculate(self):
-        links = [
-            (1, 11), (1, 6),
-            (2, 5), (2, 7),
-            (2, 9), (3, 7),
-            (3, 8), (4, 8),
-            (4, 7), (8, 10),
-            (9, 11), (9, 2),
-            (10, 11)
-        ]
+        links = self.spec.link_list()
+
+        # Background traffic, probes and their cleanup share one event loop,
+        # and one long-lived ITGRecv serves all of them
+        with ReceiverPool() as receivers:
+            asyncio.run(self.ditg_delay_calculate_async(links, receivers))
 
+    async def ditg_delay_calculate_async(self, links, receivers):
         net = self.net
         route=self.route
+        background = []
         try:
-            # Start background traffic on a separate thread
-            background_threads = []
+            # Every switch gets its own probe address so probes can run side by side
+            assign_probe_addresses(net)
 
+            # Load the links of the current route while they are measured
+            for src, dst in links:
+                for i in range(len(route)-1):
+                    if (f"s{src}" == route[i] and f"s{dst}" == route[i+1]) or (f"s{dst}" == route[i] and f"s{src}" == route[i+1]):
+                        background.append(asyncio.ensure_future(
+                            async_ops.background_traffic(net.get(f"s{src}"), net.get(f"s{dst}"), receivers)))
 
+            async def probe(src, dst, slot):
+                log.debug("Running D-ITG probe from s%d to s%d (slot %d)", src, dst, slot)
+                return await async_ops.run_ditg_probe(net.get(f"s{src}"), net.get(f"s{dst}"), receivers,
+                                                      duration_ms=10000, packet_size=100, rate=10)
+
+            # Links that share no switch are probed concurrently, one matching per round
+            decode_results = await async_ops.measure_in_rounds(links, probe)
 
             for src, dst in links:
                 switch1 = f"s{src}"
                 switch2 = f"s{dst}"
-                s1 = net.get(switch1)
-                s2 = net.get(switch2)
-                for i in range(len(route)-1):
-                    if (f"s{src}" == route[i] and f"s{dst}" == route[i+1]) or (f"s{dst}" == route[i] and f"s{src}" == route[i+1]):
-                        thread = threading.Thread(target=start_background_traffic, args=(s1, s2))
-
-                        thread.start()
-                        background_threads.append(thread)
-                        print("Thread started:",thread)
-
-                # Assign IP addresses to switches
-                s1.cmd('ifconfig {} 10.0.0.100 netmask 255.0.0.0'.format(switch1))
-                s2.cmd('ifconfig {} 10.0.0.101 netmask 255.0.0.0'.format(switch2))
-
-                # Start ITGRecv on the destination switch
-                print(f"Starting ITGRecv on {switch2}")
-                s2.cmd("nohup ITGRecv > /dev/null 2>&1 &")
-                time.sleep(2)  # Allow ITGRecv to initialize
-
-                # Run ITGSend on the source switch
-                itg_send_command = (
-                    "ITGSend -T UDP  -a 10.0.0.101 -c 100 -C 10 -l sender.log -x receiver.log -t 10000"
-                )
-                print(f"Running ITGSend command on {switch1}: {itg_send_command}")
-                s1.cmd(itg_send_command)
-
-                # Decode the log files using ITGDec
-                decode_result = s2.cmd("ITGDec receiver.log")
-
-                # Parse the delay, jitter, and throughput from ITGDec output
-                try:
-                    lines = decode_result.splitlines()
-                    avg_delay_line = lines[-10]
-                    avg_delay = avg_delay_line.split("=")[-1].strip().split()[0]
-                    avg_jitter_line = lines[-9]
-                    avg_jitter = avg_jitter_line.split("=")[-1].strip().split()[0]
-                    avg_throughput_line = lines[-6]
-                    avg_throughput = avg_throughput_line.split("=")[-1].strip().split()[0]
-
-                    self.cost_matrix[src-1][dst-1] = float(avg_delay)
-                    self.cost_matrix[dst-1][src-1] = float(avg_delay)
-
-                    print("*********************************************************************")
-                    print("Delay, Jitter, Throughput:")
-                    print(avg_delay, avg_jitter, avg_throughput)
-                    print("*********************************************************************")
-                except IndexError as e:
-                    print(f"Error parsing ITGDec output: {e}")
-                    print("Raw output from ITGDec:")
-                    print(decode_result)
-
-                # Cleanup log files and stop ITGRecv
-                s1.cmd("rm -f sender.log receiver.log")
-                s2.cmd("pkill ITGRecv")
-                s2.cmd("pkill ITGLog")
-
-            # Wait for background traffic threads to finish
-            for thread in background_threads:
-                thread.join()
+                decode_result = decode_results[(src, dst)]
+                if isinstance(decode_result, BaseException):
+                    log.warning("D-ITG probe %s -> %s failed: %r", switch1, switch2, decode_result)
+                    continue
+
+                # Parse the delay, jitter, and throughput from the ITGDec summary
+                summary = parse_summary(decode_result)
+                if summary is None or summary.avg_delay is None or math.isnan(summary.avg_delay):
+                    log.warning("Error parsing ITGDec output for %s -> %s; raw output:\n%s", switch1, switch2, decode_result)
+                    continue
+
+                self.update_link_cost(switch1, switch2, summary.avg_delay)
+
+                log.debug("Delay, jitter, throughput (%s -> %s): %s %s %s", switch1, switch2,
+                          summary.avg_delay, summary.avg_jitter, summary.avg_bitrate,
+                          extra={"fields": {"link": f"{switch1}-{switch2}", "delay": summary.avg_delay}})
 
         except Exception as e:
-            print(f"An error occurred: {e}")
+            log.warning("D-ITG measurement failed: %s", e)
+        finally:
+            # Measurements are done: stop the background traffic instead of leaving it running
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
 
 
         
 def main():
-    df = pd.read_csv('Acutal_values.csv')
-    df['Avg_Delay(ms)'] = df['Avg_Delay(ms)'].astype(float)  # Ensure 'delay' is of float type
-    df_sorted = df.sort_values(by='Avg_Delay(ms)')  # Sort rows by 'delay' column
-    print(df_sorted)
-
-    df_sorted.to_csv('sorted_csv.csv', index=False)
-
-    df_reversed = df_sorted.iloc[::-1].reset_index(drop=True)  # Reverse the rows
-    print(df_reversed)
-
-    df_reversed.to_csv('reversed_rows.csv', index=False)
-
-    links = [
-            (1, 11), (1, 6),
-            (2, 5), (2, 7),
-            (2, 9), (3, 7),
-            (3, 8), (4, 8),
-            (4, 7), (8, 10),
-            (9, 11), (9, 2),
-            (10, 11)
-        ]
+    parser = argparse.ArgumentParser(description="QoS (measured delay) based routing")
+    add_daemon_arguments(parser)
+    add_telemetry_arguments(parser)
+    add_topology_argument(parser, "abilene.json")
+    add_metrics_arguments(parser)
+    add_routing_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    spec = load_topology(args.topology)
+    start_metrics(args)
+    start_logging(args)
+
+    # Converted once into a per-link columnar store; later runs reuse it until the CSV changes
+    store = MeasurementStore.from_csv('Acutal_values.csv')
+    # One grouped pass over all samples; each link lookup below is a dict hit
+    link_stats = LinkStatsIndex.from_store(store)
+
+    links = spec.link_list()
     first_values=[]
     
     for src,dst in links:
-        try:
-            temp1 = df_sorted[(df_sorted['Source'] == src) & (df_sorted['Destination'] == dst)].iloc[0]['Avg_Delay(ms)']
-            first_values.append(temp1)
-        except Exception as e:
-            print(e)
-            min_val_ms = 0.000119 
-            max_val_ms = 0.000152
-            delay = random.uniform(min_val_ms, max_val_ms)
-            first_values.append(delay)
+        stats = link_stats.get(src, dst)  # either orientation, NaN samples skipped
+        temp1 = stats.min if stats is not None else None
+        if temp1 is None:
+            log.warning("No measurements for s%d -> s%d", src, dst)
+            temp1 = random.uniform(0.000119, 0.000152)
+        first_values.append(temp1)
 
             
-    print("first values",first_values)
+    log.debug("First values %s", first_values)
 
     setLogLevel('info')
-    topology = CustomTopology()
+    topology = CustomTopology(spec)
+    topology.all_pairs = args.all_pairs
     net = topology.build_topology(first_values)
     
     
-    net.start()
+    with METRICS.timer("stage_seconds", stage="mininet_start"):
+        net.start()
     print("============================Stabalizing topology=====================================")
     
     print("=====================================================================================")
 
     info("*** Starting network\n")
-    time.sleep(5)
+    wait_until(switches_connected(net), timeout=30, name="switches connected")
     print("============================Reading topology=====================================")
     topology.read_mininet_topology()
     topology.cost_matrix = topology.print_adjacency_matrix()
     print("=====================================================================================")
+
+    if args.daemon:
+        # Closed loop: probe all links every epoch and re-route on the measured delays
+        # (with --telemetry only the links whose port counters changed are probed)
+        assign_probe_addresses(net)
+        # One long-lived ITGRecv serves every probe of every epoch
+        receivers = ReceiverPool()
+        measure = link_measure(args, topology, links,
+                               lambda probed: measure_link_delays(net, probed, receivers=receivers),
+                               delays_ms=first_values)
+        daemon = RoutingDaemon(topology, measure,
+                               period=args.period, timings_path=args.timings,
+                               trace_path=args.record_trace)
+        try:
+            daemon.run(epochs=args.epochs)
+        finally:
+            receivers.shutdown()
+        WAIT_LOG.report()
+        METRICS.report()
+        info("*** Running CLI\n")
+        CLI(net)
+        net.stop()
+        return
     
 
         
     print("============================Iteration 1==============================================")
     topology.find_shortest_path_from_matrix('s3', 's6')
     print("=====================================================================================")
-    time.sleep(3)
+    wait_until(flows_visible(topology.flow_installer, topology.flow_state), timeout=15, name="flows installed")
     print("==============================ping from h3 to h6======================================")
     topology.pingDevice('h3','h6')
     print("=====================================================================================")
@@ -397,25 +350,23 @@ def main():
     print("==============================Modifying delay========================================")
     #topology.modify_link_delay(second_values)
     print("==============================Modification Done!=====================================")
-    print("****Cost matrix****")
-    for row in topology.cost_matrix:
-        print(row)
+    log.debug("Cost matrix\n%s", MatrixText(topology.cost_matrix))
+    dump_matrix("cost", topology.cost_matrix)
     print("=====================================================================================")
 
     topology.ditg_delay_calculate()
     
     print("============================Iteration 2==============================================")
-    time.sleep(3)
+    wait_until(flows_visible(topology.flow_installer, topology.flow_state), timeout=15, name="flows installed")
     print("==============================ping from h3 to h6======================================")
     topology.pingDevice('h3','h6')
     print("=====================================================================================")
        
     topology.find_shortest_path_from_matrix('s3', 's6')
     print("=====================================================================================")
-    time.sleep(3)
-    print("****Cost matrix****")
-    for row in topology.cost_matrix:
-        print(row)
+    wait_until(flows_visible(topology.flow_installer, topology.flow_state), timeout=15, name="flows installed")
+    log.debug("Cost matrix\n%s", MatrixText(topology.cost_matrix))
+    dump_matrix("cost", topology.cost_matrix)
         
     print("==============================ping from h3 to h6======================================")
     topology.pingDevice('h3','h6')
@@ -424,6 +375,9 @@ def main():
     
 
 
+    WAIT_LOG.report()
+    METRICS.report()
+
     info("*** Running CLI\n")
     CLI(net)
     net.stop()
@@ -8,54 +8,58 @@ from mininet.link import TCLink
 import networkx as nx
 import matplotlib.pyplot as plt
 import requests
+import argparse
 import json
 import time
 import random
-import pandas as pd
-
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sdn_routing.routing_engine import RoutingEngine
+from sdn_routing.batch_routing import add_routing_arguments, pair_path, route_all_pairs
+from sdn_routing.flow_installer import FlowInstaller, build_flow
+from sdn_routing.flow_state import FlowStateCache, reconcile
+from sdn_routing.itg_receivers import ReceiverPool
+from sdn_routing.link_stats import LinkStatsIndex
+from sdn_routing.measurement_store import MeasurementStore
+from sdn_routing.port_map import PortMap, switch_number
+from sdn_routing.port_telemetry import add_telemetry_arguments, link_measure
+from sdn_routing.probe_scheduler import assign_probe_addresses, measure_link_delays
+from sdn_routing.readiness import WAIT_LOG, flows_visible, switches_connected, wait_until
+from sdn_routing.routing_daemon import RoutingDaemon, add_daemon_arguments
+from sdn_routing.metrics import METRICS, add_metrics_arguments, instrumented, start_metrics
+from sdn_routing.structured_log import MatrixText, add_logging_arguments, dump_matrix, get_logger, start_logging
+from sdn_routing.topology_loader import add_topology_argument, load_topology
+
+log = get_logger("routing")
+
+@instrumented
 class CustomTopology:
-    def __init__(self):
+    def __init__(self, spec):
+        self.spec = spec
         self.net = None
         self.graph = nx.Graph()
         self.cost_matrix = []
+        self.engine = RoutingEngine()
+        self.flow_installer = FlowInstaller()
+        self.flow_state = FlowStateCache()
+        self.port_map = None
+        self.distances = None
+        self.predecessors = None
+        self.all_pairs = False  # route every pair at once and read paths from the predecessor matrix
         self.route=[]
 
 
     def build_topology(self,first_values):
-        """Create the topology with 15 switches and hosts."""
+        """Create the switches, hosts and links of the loaded topology."""
         self.net = Mininet(controller=RemoteController, switch=OVSSwitch, link=TCLink)
 
         info('*** Adding controller\n')
         self.net.addController('c0', controller=RemoteController, ip='127.0.0.1', port=6633)
 
-        info('*** Adding switches\n')
-        switches = {
-            i+1: self.net.addSwitch(f's{i+1}', protocols='OpenFlow13') for i in range(15)
-        }
-
-        info('*** Adding hosts\n')
-        hosts = {
-            i+1: self.net.addHost(f'h{i+1}', ip=f'10.0.0.{i+1}/24') for i in range(15)
-        }
-
-        info('*** Adding links\n')
-        links = [
-            (1, 2), (1, 3), (2, 4), (2, 5),
-            (3, 6), (3, 7), (4, 8), (5, 9),
-            (6, 10), (7, 11), (8, 12), (9, 13),
-            (10, 14), (11, 15), (13, 7), (7, 10),
-            (1, 4), (2, 3), (5, 6), (8, 9),
-            (10, 11), (12, 13), (14, 15)
-        ]
-        
-        i=0
-        for src, dst in links:
-            self.net.addLink(switches[src], switches[dst], bw=10, delay=f'{first_values[i]}ms')
-            i+=1
-
-        # Connect hosts to switches
-        for i in range(1, 16):
-            self.net.addLink(hosts[i], switches[i])
+        info('*** Adding switches, hosts and links\n')
+        self.spec.add_to_mininet(self.net, delays=first_values)
 
         return self.net
 
@@ -77,9 +81,12 @@ class CustomTopology:
             weight = float(delay.strip('ms')) if 'ms' in delay else 0.0
             self.graph.add_edge(src, dst, weight=weight)
 
+        # Port numbers of every switch-to-switch link, looked up per hop by build_flow_rules
+        self.port_map = PortMap.from_mininet(self.net)
+
     def modify_link_delay(self,second_values):
         """Modify the delay between two nodes in the existing topology."""
-        print(self.route)
+        log.debug("Route %s", self.route)
         try:
             # Get the node objects
             route = self.route
@@ -88,7 +95,7 @@ class CustomTopology:
                 node2 = route[i + 1]
                 node1_obj = self.net.get(route[i])
                 node2_obj = self.net.get(route[i + 1])
-                print(node1,node2,second_values)
+                log.debug("Updating link %s - %s", node1, node2)
                 for src,dst,delay in second_values:
                     if (src==node1 and dst==node2) or (dst==node1 and src==node2):
                         actual_delay = delay
@@ -98,12 +105,11 @@ class CustomTopology:
                 # Find the link between the two nodes
                 links = node1_obj.connectionsTo(node2_obj)
                 if not links:
-                    print(f"Delay between {route[i]} and {route[i + 1]} updated to {new_delay}ms")
+                    log.warning("No link between %s and %s", route[i], route[i + 1])
                     return
                 new_delay_value = float(new_delay.strip('ms'))  # Convert delay to integer
-                self.cost_matrix[int(node1[-1]) - 1][int(node2[-1]) - 1] = new_delay_value  # Update the edge weight in the graph
-                self.cost_matrix[int(node2[-1]) - 1][int(node1[-1]) - 1] = new_delay_value  # Update the edge weight in the graph
-                print(f"Delay between {node1} and {node2} updated to {new_delay_value}ms")
+                self.update_link_cost(node1, node2, new_delay_value)  # Update the edge weight and repair cached trees
+                log.debug("Delay between %s and %s updated to %sms", node1, node2, new_delay_value)
 
                 # Update the link delay
                 for link in links:
@@ -111,10 +117,10 @@ class CustomTopology:
                     link[1].config(delay=new_delay)
 		
         except Exception as e:
-            print(f"Error while modifying link delay: {e}")
+            log.error("Error while modifying link delay: %s", e)
 
     def print_adjacency_matrix(self):
-        """Construct and print the adjacency matrix of the graph for switches."""
+        """Construct the adjacency matrix of the graph for switches; the full matrix is logged at DEBUG."""
         def construct_adjacency_matrix(graph, switches):
             """Construct the adjacency matrix for switch-to-switch topology."""
             num_switches = len(switches)
@@ -130,121 +136,80 @@ class CustomTopology:
         switches = [node for node in self.graph.nodes if node.startswith('s')]
         adjacency_matrix = construct_adjacency_matrix(self.graph, switches)
 
-        print("*** Adjacency Matrix ***")
-        print(" " * 10 + "  ".join(f"{s:10}" for s in switches))
-        for i, row in enumerate(adjacency_matrix):
-            print(f"{switches[i]:10}" + "  ".join(f"{val:10}" for val in row))
+        log.info("Adjacency matrix of %d switches", len(switches))
+        log.debug("%s", MatrixText(adjacency_matrix, switches))
+        dump_matrix("adjacency", adjacency_matrix)
 
         return adjacency_matrix
 
-    def add_flow_rules(self, source, destination, path):
-        """Add flow rules for the given path."""
-        routes = [
-    	[0, 1, 2, 3, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    	[1, 0, 4, 2, 3, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    	[1, 4, 0, 0, 0, 2, 3, 0, 0, 0, 0, 0, 0, 0, 0],
-    	[3, 1, 0, 0, 0, 0, 0, 2, 0, 0, 0, 0, 0, 0, 0],
-    	[0, 1, 0, 0, 0, 3, 0, 0, 2, 0, 0, 0, 0, 0, 0],
-    	[0, 0, 1, 0, 3, 0, 0, 0, 0, 2, 0, 0, 0, 0, 0],
-    	[0, 0, 1, 0, 0, 0, 0, 0, 0, 4, 2, 0, 3, 0, 0],
-    	[0, 0, 0, 1, 0, 0, 0, 0, 3, 0, 0, 2, 0, 0, 0],
-    	[0, 0, 0, 0, 1, 0, 0, 3, 0, 0, 0, 0, 2, 0, 0],
-    	[0, 0, 0, 0, 0, 1, 3, 0, 0, 0, 4, 0, 0, 2, 0],
-    	[0, 0, 0, 0, 0, 0, 1, 0, 0, 3, 0, 0, 0, 0, 2],
-    	[0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 2, 0, 0],
-    	[0, 0, 0, 0, 0, 0, 2, 0, 1, 0, 0, 3, 0, 0, 0],
-    	[0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 2],
-    	[0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 2, 0],
- 
-]
-
-        dest_no = int(destination[1])  # Extract destination switch number
+    def build_flow_rules(self, source, destination, path):
+        """Build the (node, flow id, flow body) entries for the given path.
+        Output ports come from the port map discovered from the Mininet links
+        (or, before that, the one predicted from the topology file)."""
+        if self.port_map is None:
+            self.port_map = self.spec.port_map
+
+        dest_no = switch_number(destination)  # Extract destination switch number
 
+        flows = []
         for i in range(len(path) - 1):
             curr_switch = path[i]  # Current switch in the path
             next_hop_switch = path[i + 1]  # Next hop switch in the path
 
-            curr_switch_no = int(curr_switch[1])
-            next_switch_no = int(next_hop_switch[1])
+            curr_switch_no = switch_number(curr_switch)
+            next_switch_no = switch_number(next_hop_switch)
 
-            ODL_HOST = "localhost"
-            ODL_PORT = "8181"
             NODE_ID = f"openflow:{curr_switch_no}"
-            TABLE_ID = "0"
             FLOW_ID = f"flow_{source}_{destination}_{i + 1}"
-            DEST_IP = f"10.0.0.15/24"
-            PRIORITY = "1000"
-            OUTPUT_PORT = f"{routes[curr_switch_no - 1][next_switch_no - 1]}"
-
-            url = f"http://{ODL_HOST}:{ODL_PORT}/restconf/config/opendaylight-inventory:nodes/node/{NODE_ID}/flow-node-inventory:table/{TABLE_ID}/flow/{FLOW_ID}"
-
-            flow_data = {
-                "flow": {
-                    "id": FLOW_ID,
-                    "table_id": int(TABLE_ID),
-                    "priority": int(PRIORITY),
-                    "flow-name": "dest-ip-flow",
-                    "match": {
-                        "ipv4-destination": DEST_IP
-                    },
-                    "instructions": {
-                        "instruction": [
-                            {
-                                "order": 0,
-                                "apply-actions": {
-                                    "action": [
-                                        {
-                                            "order": 0,
-                                            "output-action": {
-                                                "output-node-connector": OUTPUT_PORT,
-                                                "max-length": 65535
-                                            }
-                                        }
-                                    ]
-                                }
-                            }
-                        ]
-                    }
-                }
-            }
-
-            try:
-                response = requests.put(url, json=flow_data, auth=("admin", "admin"))
-                if response.status_code == 200 or response.status_code == 201:
-                    print(f"Flow added successfully: {FLOW_ID}")
-                else:
-                    print(f"Failed to add flow {FLOW_ID}. Response: {response.status_code}, {response.text}")
-            except Exception as e:
-                print(f"Error while adding flow {FLOW_ID}: {e}")
+            DEST_IP = self.spec.host_prefix(dest_no)
+            OUTPUT_PORT = self.port_map.port(curr_switch_no, next_switch_no)
+            flows.append((NODE_ID, FLOW_ID, build_flow(FLOW_ID, DEST_IP, OUTPUT_PORT)))
+        return flows
+
+    def add_flow_rules(self, source, destination, path):
+        """Add flow rules for the given path, pushing only the hops that changed since the last route."""
+        flows = self.build_flow_rules(source, destination, path)
+        diff, results = reconcile(self.flow_installer, self.flow_state, flows, prefix=f"flow_{source}_{destination}_")
+        return results
 
         
         
-    def build_graph_from_cost_matrix(self, cost_matrix):
-        """Build a NetworkX graph from the cost matrix."""
-        graph = nx.Graph()
-        num_nodes = len(cost_matrix)
-
-        for i in range(num_nodes):
-            for j in range(num_nodes):
-                if cost_matrix[i][j] > 0:  # Add edge only if cost is greater than 0
-                    graph.add_edge(f's{i+1}', f's{j+1}', weight=cost_matrix[i][j])
-
-        return graph
+    def update_link_cost(self, node1, node2, cost):
+        """Update a link cost in the cost matrix and repair only the affected shortest-path trees."""
+        i = switch_number(node1) - 1
+        j = switch_number(node2) - 1
+        self.cost_matrix[i][j] = cost
+        self.cost_matrix[j][i] = cost
+        self.engine.sync(self.cost_matrix)
+        self.engine.update_link(node1, node2, cost)
 
     def find_shortest_path_from_matrix(self, start_node, target_node):
-        """Find and print the shortest path using NetworkX and cost matrix."""
-        graph = self.build_graph_from_cost_matrix(self.cost_matrix)
+        """Find and log the shortest path using the persistent routing engine; with all_pairs
+        (--all-pairs) every pair is routed at once and this one is read from the predecessor matrix."""
+        if self.all_pairs:
+            self.route_all_pairs()
+            path, path_length = pair_path(self, start_node, target_node)
+            if not path:
+                log.warning("No path found between %s and %s", start_node, target_node)
+                return
+            log.info("Shortest path from %s to %s: %s (total cost %s)", start_node, target_node, path, path_length)
+            self.route = path
+            return
+
+        self.engine.sync(self.cost_matrix)
 
         try:
-            # Use Dijkstra's algorithm to find the shortest path
-            path = nx.dijkstra_path(graph, source=start_node, target=target_node, weight='weight')
-            path_length = nx.dijkstra_path_length(graph, source=start_node, target=target_node, weight='weight')
-            print(f"Shortest path from {start_node} to {target_node}: {path}")
-            print(f"Path length (total cost): {path_length}")
+            # Reuse the cached shortest-path tree of start_node (Dijkstra only on first use)
+            path, path_length = self.engine.shortest_path(start_node, target_node)
+            log.info("Shortest path from %s to %s: %s (total cost %s)", start_node, target_node, path, path_length)
             self.route=path
             self.add_flow_rules(start_node, target_node, path)
         except nx.NetworkXNoPath:
-            print(f"No path found between {start_node} and {target_node}")
+            log.warning("No path found between %s and %s", start_node, target_node)
+
+    def route_all_pairs(self, bulk=True):
+        """Route every switch pair in one vectorized pass and reconcile all their flows (see batch_routing)."""
+        return route_all_pairs(self, bulk)
             
     def pingDevice(self,node1,node2):
         h1=self.net.get(node1)
@@ -269,117 +234,122 @@ class CustomTopology:
 
         
 def main():
-    df = pd.read_csv('Acutal_values.csv')
-    df['Avg_Delay(ms)'] = df['Avg_Delay(ms)'].astype(float)  # Ensure 'delay' is of float type
-    df_sorted = df.sort_values(by='Avg_Delay(ms)')  # Sort rows by 'delay' column
-    print(df_sorted)
-
-    df_sorted.to_csv('sorted_csv.csv', index=False)
-
-    df_reversed = df_sorted.iloc[::-1].reset_index(drop=True)  # Reverse the rows
-    print(df_reversed)
-
-    df_reversed.to_csv('reversed_rows.csv', index=False)
+    parser = argparse.ArgumentParser(description="QoS (measured delay) based routing")
+    add_daemon_arguments(parser)
+    add_telemetry_arguments(parser)
+    add_topology_argument(parser, "abovenet.json")
+    add_metrics_arguments(parser)
+    add_routing_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    spec = load_topology(args.topology)
+    start_metrics(args)
+    start_logging(args)
+
+    # Converted once into a per-link columnar store; later runs reuse it until the CSV changes
+    store = MeasurementStore.from_csv('Acutal_values.csv')
+    # One grouped pass over all samples; each link lookup below is a dict hit
+    link_stats = LinkStatsIndex.from_store(store)
     
     #==================================================================================================
-    links = [
-            (1, 2), (1, 3), (2, 4), (2, 5),
-            (3, 6), (3, 7), (4, 8), (5, 9),
-            (6, 10), (7, 11), (8, 12), (9, 13),
-            (10, 14), (11, 15), (13, 7), (7, 10),
-            (1, 4), (2, 3), (5, 6), (8, 9),
-            (10, 11), (12, 13), (14, 15)
-    ]
+    links = spec.link_list()
     first_values=[]
     
     for src,dst in links:
-        try:
-            temp1 = df_sorted[(df_sorted['Source'] == src) & (df_sorted['Destination'] == dst)].iloc[0]['Avg_Delay(ms)']
-            first_values.append(temp1)
-        except Exception as e:
-            print(e)
-            min_val_ms = 0.000119
-            max_val_ms = 0.000152 
-            delay = random.uniform(min_val_ms, max_val_ms)
-            first_values.append(delay)
+        stats = link_stats.get(src, dst)  # either orientation, NaN samples skipped
+        temp1 = stats.min if stats is not None else None
+        if temp1 is None:
+            log.warning("No measurements for s%d -> s%d", src, dst)
+            temp1 = random.uniform(0.000119, 0.000152)
+        first_values.append(temp1)
 
             
-    print("first values",first_values)
+    log.debug("First values %s", first_values)
     #==================================================================================================
     
     setLogLevel('info')
-    topology = CustomTopology()
+    topology = CustomTopology(spec)
+    topology.all_pairs = args.all_pairs
     net = topology.build_topology(first_values)
     
     
-    net.start()
+    with METRICS.timer("stage_seconds", stage="mininet_start"):
+        net.start()
     print("============================Stabalizing topology=====================================")
     
     print("=====================================================================================")
 
     info("*** Starting network\n")
-    time.sleep(5)
+    wait_until(switches_connected(net), timeout=30, name="switches connected")
     print("============================Reading topology=====================================")
     topology.read_mininet_topology()
     topology.cost_matrix = topology.print_adjacency_matrix()
     print("=====================================================================================")
+
+    if args.daemon:
+        # Closed loop: probe all links every epoch and re-route on the measured delays
+        # (with --telemetry only the links whose port counters changed are probed)
+        assign_probe_addresses(net)
+        # One long-lived ITGRecv serves every probe of every epoch
+        receivers = ReceiverPool()
+        measure = link_measure(args, topology, links,
+                               lambda probed: measure_link_delays(net, probed, receivers=receivers),
+                               delays_ms=first_values)
+        daemon = RoutingDaemon(topology, measure,
+                               period=args.period, timings_path=args.timings,
+                               trace_path=args.record_trace)
+        try:
+            daemon.run(epochs=args.epochs)
+        finally:
+            receivers.shutdown()
+        WAIT_LOG.report()
+        METRICS.report()
+        info("*** Running CLI\n")
+        CLI(net)
+        net.stop()
+        return
     
 
         
     print("============================Iteration 1==============================================")
     topology.find_shortest_path_from_matrix('s4', 's15')
     print("=====================================================================================")
-    time.sleep(3)
+    wait_until(flows_visible(topology.flow_installer, topology.flow_state), timeout=15, name="flows installed")
     print("==============================ping from h4 to h15======================================")
     topology.pingDevice('h4','h15')
     print("=====================================================================================")
     print("==============================Iteration 1 complete===================================")
         #==================================================================================================
-    links = [
-            (1, 2), (1, 3), (2, 4), (2, 5),
-            (3, 6), (3, 7), (4, 8), (5, 9),
-            (6, 10), (7, 11), (8, 12), (9, 13),
-            (10, 14), (11, 15), (13, 7), (7, 10),
-            (1, 4), (2, 3), (5, 6), (8, 9),
-            (10, 11), (12, 13), (14, 15)
-    ]
     
     second_values=[]
     for src,dst in links:
-        try:
-            temp1=df_reversed[(df_reversed['Source'] == src) & (df_reversed['Destination'] == dst)].iloc[0]['Avg_Delay(ms)']
-            second_values.append((f"s{src}",f"s{dst}",temp1))
-        except Exception as e:
-            print(e)
-            min_val_ms = 0.000199  # Convert to ms
-            max_val_ms = 0.000262  # Convert to ms
-
-            # Generate a random value in the range in milliseconds
-            delay = random.uniform(min_val_ms, max_val_ms)
-            second_values.append((f"s{src}",f"s{dst}",delay))
+        stats = link_stats.get(src, dst)  # either orientation, NaN samples skipped
+        temp1 = stats.max if stats is not None else None
+        if temp1 is None:
+            log.warning("No measurements for s%d -> s%d", src, dst)
+            temp1 = random.uniform(0.000199, 0.000262)
+        second_values.append((f"s{src}",f"s{dst}",temp1))
             
-    print("second values",second_values)
+    log.debug("Second values %s", second_values)
     #==================================================================================================
     print("==============================Modifying delay========================================")
     topology.modify_link_delay(second_values)
     print("==============================Modification Done!=====================================")
-    print("****Cost matrix****")
-    for row in topology.cost_matrix:
-        print(row)
+    log.debug("Cost matrix\n%s", MatrixText(topology.cost_matrix))
+    dump_matrix("cost", topology.cost_matrix)
     print("=====================================================================================")
     
     print("============================Iteration 2==============================================")
-    time.sleep(3)
+    wait_until(flows_visible(topology.flow_installer, topology.flow_state), timeout=15, name="flows installed")
     print("==============================ping from h4 to h15======================================")
     topology.pingDevice('h4','h15')
     print("=====================================================================================")
        
     topology.find_shortest_path_from_matrix('s4', 's15')
     print("=====================================================================================")
-    time.sleep(3)
-    print("****Cost matrix****")
-    for row in topology.cost_matrix:
-        print(row)
+    wait_until(flows_visible(topology.flow_installer, topology.flow_state), timeout=15, name="flows installed")
+    log.debug("Cost matrix\n%s", MatrixText(topology.cost_matrix))
+    dump_matrix("cost", topology.cost_matrix)
         
     print("==============================ping from h4 to h15======================================")
     topology.pingDevice('h4','h15')
@@ -388,6 +358,9 @@ def main():
     
 
 
+    WAIT_LOG.report()
+    METRICS.report()
+
     info("*** Running CLI\n")
     CLI(net)
     net.stop()
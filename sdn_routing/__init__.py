@@ -0,0 +1 @@
+"""Shared routing components used by the Hop-count, QoS and ML routing scripts."""
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class AdaptiveSampler:
+    """Decides which links to probe next round, spending probes where the delay is least known.
+
+    Keeps a running mean/variance (Welford) and a fast moving average of every link's
+    delay. A link is due when it has fewer than min_samples samples, when the standard
+    error of its mean is above target_error (relative), when its moving average has
+    drifted trend_z standard deviations from its mean (a trend), or when it has not been
+    probed for max_gap rounds, so stable links still get a sample now and then.
+    """
+
+    def __init__(self, links, target_error=0.02, min_samples=5, trend_z=1.5, max_gap=10, alpha=0.3,
+                 budget=None):
+        self.links = list(links)
+        self.index = {link: i for i, link in enumerate(self.links)}
+        self.target_error = target_error
+        self.min_samples = min_samples
+        self.trend_z = trend_z
+        self.max_gap = max_gap
+        self.alpha = alpha
+        self.budget = budget  # most links probed per round (None: every due link)
+        size = len(self.links)
+        self.count = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.ewma = np.zeros(size)
+        self.last_round = np.full(size, -1, dtype=np.int64)
+        self.round = 0
+        self.probes = 0
+
+    def std(self):
+        return np.sqrt(np.divide(self.m2, self.count - 1, out=np.zeros_like(self.m2), where=self.count > 1))
+
+    def relative_error(self):
+        """Standard error of each link's mean delay, relative to the mean (inf until two samples)."""
+        sem = self.std() / np.sqrt(np.maximum(self.count, 1))
+        return np.where((self.count > 1) & (self.mean > 0), sem / np.where(self.mean > 0, self.mean, 1), np.inf)
+
+    def trend(self):
+        """How many standard deviations the recent (moving average) delay sits from the mean."""
+        std = self.std()
+        return np.divide(np.abs(self.ewma - self.mean), std, out=np.zeros_like(std), where=std > 0)
+
+    def priorities(self):
+        """Per link, how far it is past its probing threshold; >= 1 means it is due."""
+        gap = (self.round - self.last_round) / self.max_gap
+        score = np.maximum.reduce([self.relative_error() / self.target_error, self.trend() / self.trend_z, gap])
+        return np.where(self.count < self.min_samples, np.inf, score)
+
+    def select(self):
+        """Links to probe this round, most uncertain first."""
+        priorities = self.priorities()
+        due = np.flatnonzero(priorities >= 1)
+        due = due[np.argsort(-priorities[due], kind="stable")]
+        if self.budget is not None:
+            due = due[:self.budget]
+        return [self.links[i] for i in due]
+
+    def update(self, delays):
+        """Add one round of {(src, dst): delay} and advance to the next round."""
+        for link, delay in delays.items():
+            i = self.index.get(link)
+            if i is None or delay is None or np.isnan(delay):
+                continue
+            self.count[i] += 1
+            delta = delay - self.mean[i]
+            self.mean[i] += delta / self.count[i]
+            self.m2[i] += delta * (delay - self.mean[i])
+            self.ewma[i] = delay if self.count[i] == 1 else self.alpha * delay + (1 - self.alpha) * self.ewma[i]
+            self.last_round[i] = self.round
+            self.probes += 1
+        self.round += 1
+
+    def converged(self):
+        """True once every link has min_samples samples, a mean within target_error and no trend."""
+        return bool(np.all(self.count >= self.min_samples) and np.all(self.relative_error() <= self.target_error)
+                    and np.all(self.trend() <= self.trend_z))
+
+
+def add_sampling_arguments(parser):
+    # Adaptive sampling leaves gaps in each link's series, which the delay model's sliding windows
+    # assume are evenly spaced rounds, so the dataset default probes every link every round
+    parser.add_argument("--sampling", choices=("all", "adaptive"), default="all",
+                        help="probe every link every round, or only the links whose delay is still uncertain "
+                             "or trending (fewer probes, but irregular per-link series)")
+    parser.add_argument("--rounds", type=int, default=100, help="measurement rounds (the most with adaptive sampling)")
+    parser.add_argument("--target-error", type=float, default=0.02,
+                        help="relative standard error of each link's mean delay that adaptive sampling aims for")
+    parser.add_argument("--min-samples", type=int, default=5, help="samples every link gets before it can be skipped")
+    parser.add_argument("--max-gap", type=int, default=10, help="rounds a stable link may go without a probe")
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import signal
+from collections import namedtuple
+
+from sdn_routing.metrics import METRICS
+from sdn_routing.port_map import switch_number
+from sdn_routing.probe_scheduler import probe_address, schedule_rounds
+from sdn_routing.structured_log import get_logger
+
+CommandResult = namedtuple('CommandResult', ['returncode', 'output'])
+
+log = get_logger("async_ops")
+
+
+def node_argv(node, command):
+    """argv that runs a shell command inside node's namespaces, as Node.popen does (mnexec -da pid).
+
+    node=None runs it on the host.
+    """
+    if node is None:
+        return ["sh", "-c", command]
+    return ["mnexec", "-da", str(node.pid), "sh", "-c", command]
+
+
+async def spawn(node, command):
+    """Start command on node without waiting for it; stdout and stderr are merged into one pipe."""
+    return await asyncio.create_subprocess_exec(*node_argv(node, command), stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.STDOUT, start_new_session=node is None)
+
+
+async def terminate(process, grace=2.0):
+    """Stop process and everything it started (mnexec -d makes it a session leader), SIGTERM then SIGKILL."""
+    if process.returncode is not None:
+        return process.returncode
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            break
+        try:
+            return await asyncio.wait_for(process.wait(), grace)
+        except asyncio.TimeoutError:
+            continue
+    return await process.wait()
+
+
+async def _collect(process, on_line):
+    lines = []
+    async for raw in process.stdout:
+        line = raw.decode(errors="replace").rstrip("\n")
+        lines.append(line)
+        if on_line is not None:
+            on_line(line)
+    return CommandResult(await process.wait(), "\n".join(lines))
+
+
+async def run(node, command, timeout=None, on_line=None):
+    """Run command on node, streaming each output line to on_line as it arrives.
+
+    On timeout or cancellation the command's whole process group is stopped before
+    the exception propagates, so nothing is left running in the namespace.
+    """
+    process = await spawn(node, command)
+    try:
+        return await asyncio.wait_for(_collect(process, on_line), timeout)
+    except BaseException:
+        await asyncio.shield(terminate(process))
+        raise
+
+
+async def _session(receivers, sender, receiver):
+    # Starting the pooled receiver blocks until it listens, so do that off the event loop
+    await asyncio.to_thread(receivers.receiver, receiver)
+    return receivers.session(sender, receiver)
+
+
+async def background_traffic(sender, receiver, receivers, duration_ms=60000, packet_size=128, rate=150):
+    """D-ITG load from sender to receiver for duration_ms, one session on the receivers pool; cancel to stop it."""
+    log.debug("Starting background traffic between %s and %s", sender, receiver)
+    with await _session(receivers, sender, receiver) as session:
+        await run(sender, f"ITGSend -T UDP -a {probe_address(switch_number(receiver.name))} "
+                          f"-rp {session.data_port} -Sdp {session.signal_port} "
+                          f"-c {packet_size} -C {rate} -t {duration_ms}")
+
+
+@METRICS.timed("ditg_probe_seconds")
+async def run_ditg_probe(sender, receiver, receivers, duration_ms=10000, packet_size=100, rate=10):
+    """probe_scheduler.run_ditg_probe on the event loop; cancelling it stops ITGSend and releases the session."""
+    receiver_ip = probe_address(switch_number(receiver.name))
+    with await _session(receivers, sender, receiver) as session:
+        await run(sender, f"ITGSend -T UDP -a {receiver_ip} -rp {session.data_port} -Sdp {session.signal_port} "
+                          f"-c {packet_size} -C {rate} -t {duration_ms} "
+                          f"-l {session.sender_log} -x {session.receiver_log}",
+                  timeout=duration_ms / 1000 + 30)
+        return (await run(receiver, f"ITGDec {session.receiver_log}", timeout=30)).output
+
+
+async def measure_in_rounds(links, probe):
+    """probe_scheduler.measure_in_rounds with coroutines: each round's probes are gathered."""
+    results = {}
+    for round_links in schedule_rounds(links):
+        outcomes = await asyncio.gather(*(probe(src, dst, slot) for slot, (src, dst) in enumerate(round_links)),
+                                        return_exceptions=True)
+        results.update(zip(round_links, outcomes))
+    return results
+
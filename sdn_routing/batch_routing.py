@@ -0,0 +1,113 @@
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+from scipy.sparse.csgraph import shortest_path
+
+from sdn_routing.flow_state import reconcile
+from sdn_routing.structured_log import get_logger
+
+NO_PATH = -9999  # scipy's marker for "no predecessor"
+
+RouteResult = namedtuple('RouteResult', ['diff', 'compute', 'reconcile'])  # stage times in seconds
+
+log = get_logger("batch_routing")
+
+
+def to_csr(cost_matrix):
+    """Convert a dense cost matrix (list of lists or array) to CSR; costs <= 0 mean no link."""
+    if issparse(cost_matrix):
+        graph = csr_matrix(cost_matrix, dtype=np.float64)
+        graph.data[graph.data < 0] = 0
+        graph.eliminate_zeros()
+        return graph
+    dense = np.asarray(cost_matrix, dtype=np.float64)
+    return csr_matrix(np.where(dense > 0, dense, 0.0))
+
+
+def all_pairs_shortest_paths(cost_matrix):
+    """Compute every source->destination distance and predecessor in one vectorized call.
+
+    Returns (distances, predecessors). predecessors[i, j] is the switch index that
+    precedes j on the shortest path from i, or NO_PATH. It is stored in the smallest
+    integer type that fits the topology so large matrices stay compact.
+    """
+    graph = to_csr(cost_matrix)
+    distances, predecessors = shortest_path(graph, method='D', directed=False, return_predecessors=True)
+    dtype = np.int16 if graph.shape[0] < np.iinfo(np.int16).max else np.int32
+    return distances, predecessors.astype(dtype)
+
+
+def next_hop_matrix(predecessors):
+    """Return next_hop[u, d]: the switch index u forwards to when sending towards d.
+
+    The graph is undirected, so the predecessor of u in d's tree is u's next hop to d.
+    Reading every route from the destination's tree keeps the per-destination flows
+    consistent even when equal-cost paths exist.
+    """
+    next_hops = predecessors.T.copy()
+    np.fill_diagonal(next_hops, NO_PATH)
+    return next_hops
+
+
+def path_from_predecessors(predecessors, source, target):
+    """Return the switch-name path from source to target (e.g. 's3' -> 's6'), or [] if unreachable."""
+    src = int(source[1:]) - 1
+    dst = int(target[1:]) - 1
+    path = [source]
+    node = src
+    while node != dst:
+        node = int(predecessors[dst, node])
+        if node == NO_PATH:
+            return []
+        path.append(f's{node+1}')
+    return path
+
+
+def iter_paths(predecessors):
+    """Yield (source, target, path) for every reachable ordered pair of distinct switches."""
+    num_nodes = predecessors.shape[0]
+    for dst in range(num_nodes):
+        for src in range(num_nodes):
+            if src == dst:
+                continue
+            path = path_from_predecessors(predecessors, f's{src+1}', f's{dst+1}')
+            if path:
+                yield f's{src+1}', f's{dst+1}', path
+
+
+def add_routing_arguments(parser):
+    parser.add_argument("--all-pairs", action="store_true",
+                        help="route every switch pair at once from the all-pairs predecessor matrix "
+                             "instead of only the demo pair")
+
+
+def route_all_pairs(topology, bulk=True):
+    """Route every switch pair of a CustomTopology in one vectorized pass and reconcile all their flows.
+
+    Sets topology.distances and topology.predecessors; every pair's hops are read from the
+    predecessor matrix and turned into flows by topology.build_flow_rules. With bulk=True each
+    changed switch gets its new flows merged in one PATCH (O(switches) requests).
+    """
+    start = time.perf_counter()
+    topology.distances, topology.predecessors = all_pairs_shortest_paths(topology.cost_matrix)
+    flows = []
+    for source, destination, path in iter_paths(topology.predecessors):
+        flows.extend(topology.build_flow_rules(source, destination, path))
+    computed = time.perf_counter()
+    diff, _ = reconcile(topology.flow_installer, topology.flow_state, flows, prefix="flow_", bulk=bulk)
+    reconciled = time.perf_counter()
+    log.info("Routed all %d switch pairs: %d flows in %.1f ms, reconciled in %.1f ms",
+             len(topology.predecessors) * (len(topology.predecessors) - 1), len(flows),
+             (computed - start) * 1000, (reconciled - computed) * 1000)
+    return RouteResult(diff, computed - start, reconciled - computed)
+
+
+def pair_path(topology, source, target):
+    """(path, cost) of source -> target from the topology's last route_all_pairs; ([], inf) if unreachable."""
+    path = path_from_predecessors(topology.predecessors, source, target)
+    if not path:
+        return [], math.inf
+    return path, float(topology.distances[int(source[1:]) - 1, int(target[1:]) - 1])
@@ -0,0 +1,244 @@
+import json
+import os
+import pickle
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from sdn_routing.link_stats import link_key
+from sdn_routing.numpy_lstm import export_layers, forward
+
+# Where LSTM_Model/train_delay_lstm.py saves the model and where the routing scripts look for it
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "LSTM_Model", "delay_lstm")
+
+MODEL_FILE = "delay_lstm.keras"
+WEIGHTS_FILE = "delay_lstm.npz"   # the same model for the NumPy runtime, no TensorFlow needed
+SCALER_FILE = "scaler.pkl"
+META_FILE = "forecast.json"
+
+
+def link_series(rows, column="delay"):
+    """Split MEASUREMENT_DTYPE rows into one time-ordered delay history per undirected link.
+
+    NaN samples are dropped. One lexsort groups the rows, so there is no per-row Python work.
+    """
+    rows = rows[~np.isnan(rows[column])]
+    low = np.minimum(rows["src"], rows["dst"])
+    high = np.maximum(rows["src"], rows["dst"])
+    order = np.lexsort((rows["timestamp"], high, low))
+    low, high, values = low[order], high[order], rows[column][order]
+    starts = np.flatnonzero((low[1:] != low[:-1]) | (high[1:] != high[:-1])) + 1
+    return {(int(low[run[0]]), int(high[run[0]])): values[run]
+            for run in np.split(np.arange(len(values)), starts) if len(run)}
+
+
+def sliding_windows(series, window):
+    """(X, y) with X[i] = series[i:i + window] and y[i] = series[i + window], as strided views."""
+    series = np.asarray(series, dtype=np.float64)
+    if len(series) <= window:
+        return np.empty((0, window)), np.empty(0)
+    return sliding_window_view(series[:-1], window), series[window:]
+
+
+def last_windows(series_by_link, links, window):
+    """The most recent window of each link, stacked for one batched predict.
+
+    Histories shorter than window are left-padded with their oldest value. Links with
+    no history at all get a row of NaN and are reported in the returned mask.
+    """
+    batch = np.full((len(links), window), np.nan)
+    known = np.zeros(len(links), dtype=bool)
+    for i, (src, dst) in enumerate(links):
+        series = series_by_link.get(link_key(src, dst))
+        if series is None or not len(series):
+            continue
+        tail = series[-window:]
+        batch[i, window - len(tail):] = tail
+        batch[i, :window - len(tail)] = tail[0]
+        known[i] = True
+    return batch, known
+
+
+def build_model(window, units=50, dropout=0.2, learning_rate=0.001):
+    """Two stacked bidirectional LSTMs and a Dense head, as in LSTM_Model/Main.ipynb, over real windows."""
+    from tensorflow.keras.layers import LSTM, Bidirectional, Dense, Dropout, Input
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.optimizers import Adam
+
+    model = Sequential([
+        Input(shape=(window, 1)),
+        Bidirectional(LSTM(units, return_sequences=True)),
+        Dropout(dropout),
+        Bidirectional(LSTM(units)),
+        Dropout(dropout),
+        Dense(1),
+    ])
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss="mean_squared_error")
+    return model
+
+
+class DelayForecaster:
+    """Predicts the next-interval delay of many links from their recent history in one call."""
+
+    def __init__(self, model, scaler, window):
+        self.model = model
+        self.scaler = scaler
+        self.window = window
+
+    def predict(self, windows):
+        """windows: (n, window) raw delays -> (n,) predicted next delays."""
+        windows = np.asarray(windows, dtype=np.float64)
+        scaled = self.scaler.transform(windows.reshape(-1, 1)).reshape(len(windows), self.window, 1)
+        predicted = self.model.predict(scaled, verbose=0).reshape(-1, 1)
+        return self.scaler.inverse_transform(predicted)[:, 0]
+
+    def predict_links(self, series_by_link, links):
+        """Next delay of every link; None for links that were never measured."""
+        batch, known = last_windows(series_by_link, links, self.window)
+        predictions = [None] * len(links)
+        if known.any():
+            for i, delay in zip(np.flatnonzero(known), self.predict(batch[known])):
+                predictions[i] = float(delay)
+        return predictions
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.model.save(os.path.join(directory, MODEL_FILE))
+        with open(os.path.join(directory, SCALER_FILE), "wb") as fd:
+            pickle.dump(self.scaler, fd)
+        with open(os.path.join(directory, META_FILE), "w") as fd:
+            json.dump({"window": self.window}, fd)
+        self.export_weights(os.path.join(directory, WEIGHTS_FILE))
+
+    def export_weights(self, path):
+        """Write the layer weights and the scaler parameters for NumpyForecaster."""
+        np.savez(path, window=self.window, scaler_scale=self.scaler.scale_, scaler_min=self.scaler.min_,
+                 **export_layers(self.model))
+
+    @classmethod
+    def load(cls, directory):
+        from tensorflow.keras.models import load_model
+
+        with open(os.path.join(directory, SCALER_FILE), "rb") as fd:
+            scaler = pickle.load(fd)
+        with open(os.path.join(directory, META_FILE)) as fd:
+            window = json.load(fd)["window"]
+        return cls(load_model(os.path.join(directory, MODEL_FILE)), scaler, window)
+
+
+class NumpyForecaster(DelayForecaster):
+    """DelayForecaster's model evaluated with NumPy only: no TensorFlow import, a few MB of RSS."""
+
+    def __init__(self, arrays, scale, offset, window):
+        self.arrays = arrays
+        self.scale = scale      # MinMaxScaler: scaled = raw * scale + offset
+        self.offset = offset
+        self.window = window
+
+    def predict(self, windows):
+        windows = np.asarray(windows, dtype=np.float64)
+        scaled = (windows * self.scale + self.offset).reshape(len(windows), self.window, 1)
+        return (forward(self.arrays, scaled)[:, 0] - self.offset) / self.scale
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.savez(os.path.join(directory, WEIGHTS_FILE), window=self.window,
+                 scaler_scale=self.scale, scaler_min=self.offset, **self.arrays)
+
+    @classmethod
+    def load(cls, directory):
+        with np.load(os.path.join(directory, WEIGHTS_FILE)) as data:
+            arrays = {name: data[name] for name in data.files}
+        return cls(arrays, float(np.ravel(arrays.pop("scaler_scale"))[0]),
+                   float(np.ravel(arrays.pop("scaler_min"))[0]),
+                   int(arrays.pop("window")))
+
+
+class LastValueForecaster:
+    """Predicts that every link keeps its last measured delay (the baseline the LSTM must beat)."""
+
+    window = 1
+
+    def predict(self, windows):
+        return np.asarray(windows, dtype=np.float64)[:, -1]
+
+    def predict_links(self, series_by_link, links):
+        batch, known = last_windows(series_by_link, links, self.window)
+        return [float(delay) if ok else None for delay, ok in zip(batch[:, -1], known)]
+
+
+def load_forecaster(directory=DEFAULT_MODEL_DIR, runtime="numpy"):
+    """Load the trained model once; fall back to LastValueForecaster if it is missing or cannot load.
+
+    runtime="numpy" evaluates the exported weights without importing TensorFlow;
+    runtime="keras" loads the saved Keras model.
+    """
+    try:
+        if runtime == "numpy":
+            return NumpyForecaster.load(directory)
+        return DelayForecaster.load(directory)
+    except (OSError, ImportError, ValueError, KeyError) as e:
+        print(f"Could not load the delay model from {directory} ({e}); predicting the last measured delays")
+        return LastValueForecaster()
+
+
+def forecast_estimator(forecaster, series_by_link, links):
+    """estimate() for RoutingDaemon: add each new measurement to its link's history, then
+    predict the next delay of every link in one batched call.
+
+    measurements must hold only samples taken since the last call (as measure_link_delays and
+    PassiveMeasurer return them); links missing from it are forecast from their history as is.
+    """
+    def estimate(measurements):
+        for (src, dst), delay in measurements.items():
+            key = link_key(src, dst)
+            # Only the last window samples are ever fed to the model
+            history = series_by_link.get(key, np.empty(0))[-forecaster.window:]
+            series_by_link[key] = np.append(history, delay)
+        return dict(zip(links, forecaster.predict_links(series_by_link, links)))
+    return estimate
+
+
+def train_forecaster(series_by_link, window=8, validation_split=0.2, epochs=100, batch_size=32, patience=10, verbose=1):
+    """Train on every link's windows; the last validation_split of each link is held out.
+
+    Returns the forecaster and validation metrics in raw delay units, next to the error of
+    simply repeating the last sample, which the model has to beat to be worth using.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+    from tensorflow.keras.callbacks import EarlyStopping
+
+    train_x, train_y, test_x, test_y = [], [], [], []
+    for series in series_by_link.values():
+        x, y = sliding_windows(series, window)
+        split = int(len(y) * (1 - validation_split))
+        train_x.append(x[:split])
+        train_y.append(y[:split])
+        test_x.append(x[split:])
+        test_y.append(y[split:])
+    train_x, train_y = np.concatenate(train_x), np.concatenate(train_y)
+    test_x, test_y = np.concatenate(test_x), np.concatenate(test_y)
+    if not len(train_y) or not len(test_y):
+        raise ValueError(f"not enough history for window={window}")
+
+    scaler = MinMaxScaler().fit(np.concatenate([train_x[:, 0], train_y]).reshape(-1, 1))
+
+    def scale(values):
+        return scaler.transform(values.reshape(-1, 1)).reshape(values.shape)
+
+    model = build_model(window)
+    model.fit(scale(train_x)[..., None], scale(train_y), epochs=epochs, batch_size=batch_size,
+              validation_data=(scale(test_x)[..., None], scale(test_y)), verbose=verbose,
+              callbacks=[EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True)])
+
+    forecaster = DelayForecaster(model, scaler, window)
+    error = forecaster.predict(test_x) - test_y
+    naive_error = test_x[:, -1] - test_y
+    metrics = {
+        "train_samples": len(train_y),
+        "test_samples": len(test_y),
+        "mae": float(np.mean(np.abs(error))),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "last_value_mae": float(np.mean(np.abs(naive_error))),
+    }
+    return forecaster, metrics
@@ -0,0 +1,173 @@
+import logging
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sdn_routing.metrics import record_request
+from sdn_routing.structured_log import FLOW_LOGGER, get_logger
+
+ODL_HOST = "localhost"
+ODL_PORT = "8181"
+TABLE_ID = "0"
+PRIORITY = "1000"
+
+PAST_TENSE = {"add": "added", "delete": "deleted"}
+
+log = get_logger("flow_installer")
+flow_log = get_logger(FLOW_LOGGER)
+
+FlowResult = namedtuple('FlowResult', ['node_id', 'flow_id', 'status_code', 'latency', 'error'])
+
+
+def build_flow(flow_id, dest_ip, output_port, table_id=TABLE_ID, priority=PRIORITY):
+    """Return the RESTCONF body of a destination-IP flow that outputs on one port."""
+    return {
+        "flow": {
+            "id": flow_id,
+            "table_id": int(table_id),
+            "priority": int(priority),
+            "flow-name": "dest-ip-flow",
+            "match": {
+                "ipv4-destination": dest_ip
+            },
+            "instructions": {
+                "instruction": [
+                    {
+                        "order": 0,
+                        "apply-actions": {
+                            "action": [
+                                {
+                                    "order": 0,
+                                    "output-action": {
+                                        "output-node-connector": f"{output_port}",
+                                        "max-length": 65535
+                                    }
+                                }
+                            ]
+                        }
+                    }
+                ]
+            }
+        }
+    }
+
+
+def table_body(flow_bodies, table_id=TABLE_ID):
+    """RESTCONF body of a whole flow-node-inventory:table holding the given flows."""
+    return {"flow-node-inventory:table": [{
+        "id": int(table_id),
+        "flow": [flow_data["flow"] for flow_data in flow_bodies],
+    }]}
+
+
+class FlowInstaller:
+    """Push flows to OpenDaylight over one pooled keep-alive session and a bounded worker pool."""
+
+    def __init__(self, host=ODL_HOST, port=ODL_PORT, auth=("admin", "admin"), max_workers=16, timeout=10):
+        self.base_url = f"http://{host}:{port}/restconf/config/opendaylight-inventory:nodes/node"
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = auth
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def flow_url(self, node_id, flow_id, table_id=TABLE_ID):
+        return f"{self.base_url}/{node_id}/flow-node-inventory:table/{table_id}/flow/{flow_id}"
+
+    def table_url(self, node_id, table_id=TABLE_ID):
+        return f"{self.base_url}/{node_id}/flow-node-inventory:table/{table_id}"
+
+    def put_flow(self, node_id, flow_id, flow_data):
+        """PUT a single flow and time the round trip."""
+        start = time.perf_counter()
+        try:
+            response = self.session.put(self.flow_url(node_id, flow_id), json=flow_data, timeout=self.timeout)
+            error = None if response.status_code in (200, 201) else response.text
+            result = FlowResult(node_id, flow_id, response.status_code, time.perf_counter() - start, error)
+        except Exception as e:
+            result = FlowResult(node_id, flow_id, None, time.perf_counter() - start, str(e))
+        record_request("put_flow", result)
+        return result
+
+    def delete_flow(self, node_id, flow_id):
+        """DELETE a single flow and time the round trip."""
+        start = time.perf_counter()
+        try:
+            response = self.session.delete(self.flow_url(node_id, flow_id), timeout=self.timeout)
+            error = None if response.status_code in (200, 204, 404) else response.text
+            result = FlowResult(node_id, flow_id, response.status_code, time.perf_counter() - start, error)
+        except Exception as e:
+            result = FlowResult(node_id, flow_id, None, time.perf_counter() - start, str(e))
+        record_request("delete_flow", result)
+        return result
+
+    def install(self, flows):
+        """Install (node_id, flow_id, flow_data) tuples concurrently; results keep the input order."""
+        futures = [self.executor.submit(self.put_flow, node_id, flow_id, flow_data)
+                   for node_id, flow_id, flow_data in flows]
+        return [future.result() for future in futures]
+
+    def delete(self, flows):
+        """Delete (node_id, flow_id) pairs concurrently; results keep the input order."""
+        futures = [self.executor.submit(self.delete_flow, node_id, flow_id) for node_id, flow_id in flows]
+        return [future.result() for future in futures]
+
+    def push_table(self, node_id, flow_bodies, table_id=TABLE_ID, method="PATCH"):
+        """Send every flow of one node in a single request on its flow-node-inventory:table resource.
+
+        PATCH (RESTCONF merge) adds or replaces the given flows and leaves the table's other
+        flows alone. method="PUT" replaces the whole table, deleting every flow not in
+        flow_bodies, including ones other applications installed.
+        """
+        table = table_body(flow_bodies, table_id)
+        label = f"table_{table_id}[{len(flow_bodies)} flows]"
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.table_url(node_id, table_id), json=table, timeout=self.timeout)
+            error = None if response.status_code in (200, 201, 204) else response.text
+            result = FlowResult(node_id, label, response.status_code, time.perf_counter() - start, error)
+        except Exception as e:
+            result = FlowResult(node_id, label, None, time.perf_counter() - start, str(e))
+        record_request("push_table", result)
+        return result
+
+    def install_bulk(self, flows, method="PATCH"):
+        """Group flows by openflow node and push each group as one table request, nodes in parallel."""
+        groups = OrderedDict()
+        for node_id, flow_id, flow_data in flows:
+            groups.setdefault(node_id, []).append(flow_data)
+        futures = [self.executor.submit(self.push_table, node_id, flow_bodies, TABLE_ID, method)
+                   for node_id, flow_bodies in groups.items()]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+
+def report_results(results, action="add"):
+    """Log failures and a one-line summary; successful flows go to the sampled per-flow logger at DEBUG."""
+    failures = 0
+    per_flow = flow_log.isEnabledFor(logging.DEBUG)
+    for result in results:
+        if result.error is None:
+            if per_flow:
+                flow_log.debug("Flow %s successfully: %s (%.1f ms)", PAST_TENSE[action], result.flow_id,
+                               result.latency * 1000, extra={"fields": {"node": result.node_id, "flow": result.flow_id,
+                                                                        "action": action, "latency_s": result.latency}})
+        else:
+            failures += 1
+            log.warning("Failed to %s flow %s. Response: %s, %s", action, result.flow_id, result.status_code,
+                        result.error, extra={"fields": {"node": result.node_id, "flow": result.flow_id, "action": action,
+                                                        "status": result.status_code}})
+    if results:
+        slowest = max(result.latency for result in results)
+        log.info("%s %d/%d flows, slowest %.1f ms", PAST_TENSE[action].capitalize(), len(results) - failures,
+                 len(results), slowest * 1000, extra={"fields": {"action": action, "flows": len(results),
+                                                                 "failures": failures, "slowest_s": slowest}})
+    return failures
@@ -0,0 +1,107 @@
+from collections import namedtuple
+
+from sdn_routing.flow_installer import report_results
+from sdn_routing.structured_log import get_logger
+
+FlowDiff = namedtuple('FlowDiff', ['add', 'modify', 'delete'])
+
+log = get_logger("flow_state")
+
+
+class FlowStateCache:
+    """Record of the flows installed on each switch, used to push only what a re-route changes.
+
+    Flows are keyed by (node_id, flow_id), so a hop that moves to another switch
+    becomes a delete on the old switch plus an add on the new one.
+    """
+
+    def __init__(self):
+        self.installed = {}  # node_id -> {flow_id: flow_data}
+
+    def diff(self, flows, prefix=None):
+        """Compare the desired (node_id, flow_id, flow_data) flows with what is installed.
+
+        Only installed flows whose id starts with prefix (all of them when None) are
+        candidates for deletion, so re-routing one pair never touches other pairs.
+        """
+        desired = set()
+        add, modify = [], []
+        for node_id, flow_id, flow_data in flows:
+            desired.add((node_id, flow_id))
+            current = self.installed.get(node_id, {}).get(flow_id)
+            if current is None:
+                add.append((node_id, flow_id, flow_data))
+            elif current != flow_data:
+                modify.append((node_id, flow_id, flow_data))
+
+        delete = [(node_id, flow_id)
+                  for node_id, node_flows in self.installed.items()
+                  for flow_id in node_flows
+                  if (prefix is None or flow_id.startswith(prefix)) and (node_id, flow_id) not in desired]
+        return FlowDiff(add, modify, delete)
+
+    def mark_installed(self, node_id, flow_id, flow_data):
+        self.installed.setdefault(node_id, {})[flow_id] = flow_data
+
+    def mark_deleted(self, node_id, flow_id):
+        node_flows = self.installed.get(node_id, {})
+        node_flows.pop(flow_id, None)
+        if not node_flows:
+            self.installed.pop(node_id, None)
+
+    def flow_count(self):
+        return sum(len(node_flows) for node_flows in self.installed.values())
+
+
+def _record_bulk(cache, changes, diff, results, delete_results):
+    report_results(results)
+    report_results(delete_results, action="delete")
+    failed_nodes = {result.node_id for result in results if result.error is not None}
+    for node_id, flow_id, flow_data in changes:
+        if node_id not in failed_nodes:
+            cache.mark_installed(node_id, flow_id, flow_data)
+    for (node_id, flow_id), result in zip(diff.delete, delete_results):
+        if result.error is None:
+            cache.mark_deleted(node_id, flow_id)
+
+
+def _record(cache, diff, changes, results, delete_results):
+    report_results(results)
+    report_results(delete_results, action="delete")
+    for (node_id, flow_id, flow_data), result in zip(changes, results):
+        if result.error is None:
+            cache.mark_installed(node_id, flow_id, flow_data)
+    for (node_id, flow_id), result in zip(diff.delete, delete_results):
+        if result.error is None:
+            cache.mark_deleted(node_id, flow_id)
+
+
+def _diff(cache, flows, prefix):
+    diff = cache.diff(flows, prefix)
+    log.info("Flow diff: %d to add, %d to modify, %d to delete", len(diff.add), len(diff.modify), len(diff.delete),
+             extra={"fields": {"add": len(diff.add), "modify": len(diff.modify), "delete": len(diff.delete)}})
+    return diff
+
+
+def reconcile(installer, cache, flows, prefix=None, bulk=False):
+    """Push only the add/modify/delete delta between the cache and the desired flows.
+
+    In bulk mode the added and modified flows of each switch are merged into its table
+    with one PATCH, and stale flows are deleted one by one. Flows the cache does not know
+    about (other applications', or an earlier run's) are never touched. Returns (diff, results).
+    """
+    diff = _diff(cache, flows, prefix)
+
+    if bulk:
+        changes = diff.add + diff.modify
+        results = installer.install_bulk(changes, method="PATCH")
+        delete_results = installer.delete(diff.delete)
+        _record_bulk(cache, changes, diff, results, delete_results)
+        return diff, results + delete_results
+
+    changes = diff.add + diff.modify
+    results = installer.install(changes)
+    delete_results = installer.delete(diff.delete)
+    _record(cache, diff, changes, results, delete_results)
+    return diff, results + delete_results
+
@@ -0,0 +1,141 @@
+import os
+import subprocess
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+from sdn_routing.probe_scheduler import BASE_DATA_PORT, BASE_SIGNAL_PORT
+from sdn_routing.readiness import wait_until
+from sdn_routing.structured_log import get_logger
+
+DATA_PORT_RANGE = 1000  # data ports BASE_DATA_PORT .. BASE_DATA_PORT + 999 are handed out to sessions
+
+Receiver = namedtuple('Receiver', ['namespace', 'process', 'node_pid', 'signal_port'])
+ProbeSession = namedtuple('ProbeSession', ['signal_port', 'data_port', 'sender_log', 'receiver_log'])
+
+log = get_logger("itg_receivers")
+
+
+def node_argv(node_pid, *argv):
+    """argv that runs inside the namespaces of Mininet node node_pid (mnexec -da, as Node.popen does)."""
+    return ["mnexec", "-da", str(node_pid), *argv]
+
+
+def namespace(node):
+    """Network namespace of node; Mininet switches all share the root one, each host has its own."""
+    return os.readlink(f"/proc/{node.pid}/ns/net")
+
+
+def listening(node_pid, port):
+    """Something in node_pid's namespace listens on TCP/UDP port, checked from this process."""
+    def check():
+        result = subprocess.run(node_argv(node_pid, "ss", "-Hltun", f"sport = :{port}"),
+                                capture_output=True, text=True)
+        return f":{port} " in result.stdout
+    return check
+
+
+class ReceiverPool:
+    """One long-lived ITGRecv per network namespace, shared by every probe towards a node in it.
+
+    ITGRecv serves any number of ITGSend sessions at once, so concurrent probes only need
+    a data port and log files of their own: session() hands those out and gives them back.
+    Receivers are child processes of this one, started with mnexec in the node's namespace
+    on first use (and restarted if they died) and stopped in shutdown(). The pool never
+    runs anything through a node's Mininet shell, which belongs to the probe using the node.
+    """
+
+    def __init__(self, signal_port=BASE_SIGNAL_PORT, start_timeout=10):
+        self.signal_port = signal_port
+        self.start_timeout = start_timeout
+        self.lock = threading.Lock()
+        self.receivers = {}  # namespace -> Receiver
+        self.namespaces = {}  # node name -> namespace
+        self.ports_in_use = {}  # namespace -> set of data ports
+        self.next_port = {}  # namespace -> next data port offset to try
+        self.started = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+    def _namespace(self, node):
+        if node.name not in self.namespaces:
+            self.namespaces[node.name] = namespace(node)
+        return self.namespaces[node.name]
+
+    def receiver(self, node):
+        """The running receiver for node's namespace, started (or restarted) if needed."""
+        key = self._namespace(node)
+        with self.lock:
+            receiver = self.receivers.get(key)
+            if receiver is not None and receiver.process.poll() is None:
+                return receiver
+            if receiver is not None:
+                log.warning("ITGRecv %s in %s exited with %s; restarting it", receiver.process.pid, key,
+                            receiver.process.returncode)
+            # Not a new session: mnexec -d then execs ITGRecv in place, so the child's pid is ITGRecv's
+            process = subprocess.Popen(node_argv(node.pid, "ITGRecv", "-Sp", str(self.signal_port)),
+                                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL)
+            if not wait_until(listening(node.pid, self.signal_port), timeout=self.start_timeout,
+                              name="ITGRecv listening"):
+                process.kill()
+                process.wait()
+                raise RuntimeError(f"ITGRecv did not start listening on port {self.signal_port} in {key}")
+            receiver = self.receivers[key] = Receiver(key, process, node.pid, self.signal_port)
+            self.started += 1
+            log.info("Started ITGRecv %s for %s on signalling port %d", process.pid, key, self.signal_port,
+                     extra={"fields": {"pid": process.pid, "namespace": key}})
+            return receiver
+
+    def _take_port(self, key):
+        in_use = self.ports_in_use.setdefault(key, set())
+        offset = self.next_port.get(key, 0)
+        for step in range(DATA_PORT_RANGE):
+            port = BASE_DATA_PORT + (offset + step) % DATA_PORT_RANGE
+            if port not in in_use:
+                in_use.add(port)
+                self.next_port[key] = (offset + step + 1) % DATA_PORT_RANGE
+                return port
+        raise RuntimeError(f"all {DATA_PORT_RANGE} probe data ports of {key} are in use")
+
+    @contextmanager
+    def session(self, sender, receiver_node):
+        """Ports and log names for one probe sender -> receiver_node; released (and the logs removed) afterwards."""
+        receiver = self.receiver(receiver_node)
+        with self.lock:
+            data_port = self._take_port(receiver.namespace)
+        tag = f"{sender.name}_{receiver_node.name}_{data_port}"
+        session = ProbeSession(receiver.signal_port, data_port, f"sender_{tag}.log", f"receiver_{tag}.log")
+        try:
+            yield session
+        finally:
+            # Mininet nodes share this process's filesystem and working directory
+            for path in (session.sender_log, session.receiver_log):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            with self.lock:
+                self.ports_in_use[receiver.namespace].discard(data_port)
+
+    def shutdown(self, grace=2.0):
+        """Stop every receiver this pool started: SIGTERM, then SIGKILL if it is still there after grace seconds."""
+        with self.lock:
+            receivers, self.receivers = list(self.receivers.values()), {}
+        for receiver in receivers:
+            process = receiver.process
+            if process.poll() is not None:
+                continue
+            process.terminate()
+            try:
+                process.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        if receivers:
+            log.info("Stopped %d ITGRecv receivers", len(receivers))
@@ -0,0 +1,128 @@
+from collections import namedtuple
+
+import numpy as np
+
+# "Average delay            =      0.000065 s" -> field name
+SUMMARY_KEYS = {
+    "total time": "total_time",
+    "total packets": "total_packets",
+    "minimum delay": "min_delay",
+    "maximum delay": "max_delay",
+    "average delay": "avg_delay",
+    "average jitter": "avg_jitter",
+    "delay standard deviation": "delay_std",
+    "bytes received": "bytes_received",
+    "average bitrate": "avg_bitrate",
+    "average packet rate": "avg_packet_rate",
+    "packets dropped": "packets_dropped",
+}
+
+ItgSummary = namedtuple('ItgSummary', ['flow'] + list(SUMMARY_KEYS.values()) + ['loss_percent'])
+ItgSummary.__doc__ = """One ITGDec summary block; flow is None for the TOTAL RESULTS block.
+Delays and jitter are in seconds, bitrate in Kbit/s, exactly as ITGDec prints them."""
+
+SUMMARY_DTYPE = np.dtype([(field, np.float64) for field in ItgSummary._fields])
+
+PACKET_DTYPE = np.dtype([
+    ("flow", np.int32),
+    ("seq", np.int64),
+    ("tx_time", np.float64),   # seconds since midnight
+    ("rx_time", np.float64),
+    ("size", np.int32),
+    ("delay", np.float64),
+])
+
+
+def _lines(source):
+    """Accept a whole ITGDec output string or any iterable of lines (e.g. an open file)."""
+    return source.splitlines() if isinstance(source, str) else source
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return float("nan")  # ITGDec prints -nan / nan when nothing was received
+
+
+def iter_summaries(source):
+    """Yield an ItgSummary for each per-flow block and for the TOTAL RESULTS block, in one pass."""
+    fields = None
+    flow = None
+    for line in _lines(source):
+        line = line.strip()
+        if line.startswith("Flow number:"):
+            flow = int(line.split(":", 1)[1])
+            fields = {}
+            continue
+        if "TOTAL RESULTS" in line:
+            flow = None
+            fields = {}
+            continue
+        if fields is None:
+            continue
+        if "=" not in line:
+            # A dashed rule closes a block once it has values in it
+            if line.startswith("---") and fields:
+                yield _summary(flow, fields)
+                fields = None
+            continue
+        key, value = line.split("=", 1)
+        name = SUMMARY_KEYS.get(key.strip().lower())
+        tokens = value.split()
+        if name is None or not tokens:
+            continue
+        fields[name] = _number(tokens[0])
+        if name == "packets_dropped" and len(tokens) > 1:
+            fields["loss_percent"] = _number(tokens[1].lstrip("("))
+    if fields:
+        yield _summary(flow, fields)
+
+
+def _summary(flow, fields):
+    return ItgSummary(flow=flow, **{field: fields.get(field) for field in ItgSummary._fields if field != "flow"})
+
+
+def parse_summary(source):
+    """Return the TOTAL RESULTS summary (or the last flow's if there is none), or None."""
+    summary = None
+    for summary in iter_summaries(source):
+        if summary.flow is None:
+            return summary
+    return summary
+
+
+def summaries_to_array(summaries):
+    """Pack summaries into a structured NumPy array (missing values and the totals' flow become NaN)."""
+    rows = (tuple(np.nan if value is None else value for value in summary) for summary in summaries)
+    return np.fromiter(rows, dtype=SUMMARY_DTYPE)
+
+
+def _clock(text):
+    hours, minutes, seconds = text.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def _packet_rows(lines):
+    for line in lines:
+        # Flow>  1 Seq>  1 Src>  10.0.0.1/34771 Dest>  10.0.0.2/8999 txTime>  11:52:27.613148 rxTime>  11:52:27.613224 Size>  512
+        tokens = line.split()
+        if len(tokens) < 14 or tokens[0] != "Flow>":
+            continue
+        tx_time = _clock(tokens[9])
+        rx_time = _clock(tokens[11])
+        delay = rx_time - tx_time
+        if delay < 0:
+            delay += 86400  # received after midnight
+        yield int(tokens[1]), int(tokens[3]), tx_time, rx_time, int(tokens[13]), delay
+
+
+def parse_packets(source):
+    """Parse ITGDec per-packet output (ITGDec log -l out.txt) into a PACKET_DTYPE array in one pass."""
+    return np.fromiter(_packet_rows(_lines(source)), dtype=PACKET_DTYPE)
+
+
+def read_packet_log(path):
+    """Stream a per-packet text log from disk without holding its text in memory."""
+    with open(path) as fd:
+        return parse_packets(fd)
@@ -0,0 +1,83 @@
+from collections import namedtuple
+
+import numpy as np
+
+LinkStats = namedtuple('LinkStats', ['count', 'min', 'max', 'mean', 'p50', 'p95', 'p99', 'nan_count'])
+LinkStats.__doc__ = """Delay statistics of one undirected link; count excludes the nan_count NaN samples."""
+
+QUANTILES = (0.50, 0.95, 0.99)
+
+
+def link_key(src, dst):
+    """Undirected link key, so (9, 2) and (2, 9) share one entry."""
+    return (src, dst) if src <= dst else (dst, src)
+
+
+class LinkStatsIndex:
+    """Per-link delay statistics computed in one grouped pass, looked up in O(1)."""
+
+    def __init__(self, stats):
+        self.stats = stats  # link_key -> LinkStats
+
+    def __len__(self):
+        return len(self.stats)
+
+    def __contains__(self, link):
+        return link_key(*link) in self.stats
+
+    def get(self, src, dst):
+        """Statistics of link src-dst in either orientation, or None if it was never measured."""
+        return self.stats.get(link_key(src, dst))
+
+    @classmethod
+    def from_rows(cls, src, dst, values):
+        """Group parallel src/dst/value arrays by undirected link.
+
+        One sort by (link, value) puts every link's samples in a contiguous, ordered run,
+        so min/max/quantiles are index lookups and the mean is a segment sum.
+        """
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        low, high = np.minimum(src, dst), np.maximum(src, dst)
+
+        nan = np.isnan(values)
+        nan_counts = {}
+        if nan.any():
+            keys, counts = np.unique(np.stack([low[nan], high[nan]], axis=1), axis=0, return_counts=True)
+            nan_counts = {(int(u), int(v)): int(n) for (u, v), n in zip(keys, counts)}
+            low, high, values = low[~nan], high[~nan], values[~nan]
+
+        stats = {}
+        if len(values):
+            order = np.lexsort((values, high, low))
+            low, high, values = low[order], high[order], values[order]
+            boundary = np.flatnonzero((low[1:] != low[:-1]) | (high[1:] != high[:-1])) + 1
+            starts = np.concatenate(([0], boundary))
+            counts = np.diff(np.concatenate((starts, [len(values)])))
+            ends = starts + counts - 1
+            means = np.add.reduceat(values, starts) / counts
+            quantiles = [_sorted_quantile(values, starts, counts, q) for q in QUANTILES]
+
+            for i, start in enumerate(starts):
+                key = (int(low[start]), int(high[start]))
+                stats[key] = LinkStats(int(counts[i]), float(values[start]), float(values[ends[i]]),
+                                       float(means[i]), *(float(q[i]) for q in quantiles),
+                                       nan_counts.pop(key, 0))
+        for key, nan_count in nan_counts.items():  # links that only ever reported NaN
+            stats[key] = LinkStats(0, None, None, None, None, None, None, nan_count)
+        return cls(stats)
+
+    @classmethod
+    def from_store(cls, store, column="delay"):
+        """Index every sample of a MeasurementStore."""
+        rows = store.scan()
+        return cls.from_rows(rows["src"], rows["dst"], rows[column])
+
+
+def _sorted_quantile(values, starts, counts, q):
+    """Linear-interpolated quantile (numpy's default) of each sorted segment."""
+    position = starts + q * (counts - 1)
+    below = np.floor(position).astype(np.int64)
+    above = np.ceil(position).astype(np.int64)
+    return values[below] + (values[above] - values[below]) * (position - below)
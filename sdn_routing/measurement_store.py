@@ -0,0 +1,214 @@
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+MEASUREMENT_DTYPE = np.dtype([
+    ("timestamp", np.float64),   # seconds since the epoch (row index for imported CSVs)
+    ("src", np.int32),
+    ("dst", np.int32),
+    ("delay", np.float64),       # seconds, as ITGDec reports it
+    ("jitter", np.float64),
+    ("loss", np.float64),        # percent of packets dropped
+])
+
+CSV_HEADER = ["Source", "Destination", "Avg_Delay(ms)"]
+SOURCE_FILE = "source.json"
+
+
+class MeasurementStore:
+    """Link measurements partitioned per directed link, one columnar .npz chunk per flush.
+
+    root/
+        1-2/1718000000000000000.npz   columns of MEASUREMENT_DTYPE, named by field
+        1-3/...
+
+    append() only buffers in memory; chunks are written when flush_rows samples are
+    pending, on flush() or close(). Queries read each link's chunks once and cache them.
+    """
+
+    def __init__(self, root, flush_rows=4096):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.pending = {}   # (src, dst) -> list of row tuples
+        self.pending_rows = 0
+        self.cache = {}     # (src, dst) -> structured array of the flushed chunks
+        os.makedirs(root, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- writing ---------------------------------------------------------------------------
+
+    def append(self, src, dst, delay, jitter=np.nan, loss=np.nan, timestamp=None):
+        """Buffer one sample of link src -> dst; None values are stored as NaN."""
+        row = (time.time() if timestamp is None else timestamp, src, dst,
+               np.nan if delay is None else delay,
+               np.nan if jitter is None else jitter,
+               np.nan if loss is None else loss)
+        self.pending.setdefault((src, dst), []).append(row)
+        self.pending_rows += 1
+        if self.pending_rows >= self.flush_rows:
+            self.flush()
+
+    def append_rows(self, rows):
+        """Buffer a MEASUREMENT_DTYPE array (or anything convertible to one) in one go."""
+        rows = np.asarray(rows, dtype=MEASUREMENT_DTYPE)
+        if len(rows):
+            # Group by link in one sort; stable, so each link keeps its rows' order
+            rows = rows[np.lexsort((rows["dst"], rows["src"]))]
+            src, dst = rows["src"], rows["dst"]
+            boundary = np.flatnonzero((src[1:] != src[:-1]) | (dst[1:] != dst[:-1])) + 1
+            for chunk in np.split(rows, boundary):
+                link = (int(chunk["src"][0]), int(chunk["dst"][0]))
+                self.pending.setdefault(link, []).extend(chunk.tolist())
+        self.pending_rows += len(rows)
+        if self.pending_rows >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        """Write every link's pending samples as one new chunk per link."""
+        for link, rows in self.pending.items():
+            chunk = np.array(rows, dtype=MEASUREMENT_DTYPE)
+            directory = os.path.join(self.root, f"{link[0]}-{link[1]}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{time.time_ns()}.npz")
+            np.savez(path, **{field: chunk[field] for field in MEASUREMENT_DTYPE.names})
+            self.cache.pop(link, None)
+        self.pending = {}
+        self.pending_rows = 0
+
+    def close(self):
+        self.flush()
+
+    # -- reading ---------------------------------------------------------------------------
+
+    def links(self):
+        """Every (src, dst) with flushed or pending samples."""
+        found = set(self.pending)
+        for name in os.listdir(self.root):
+            src, sep, dst = name.partition("-")
+            if sep and src.isdigit() and dst.isdigit():
+                found.add((int(src), int(dst)))
+        return sorted(found)
+
+    def _flushed(self, link):
+        if link not in self.cache:
+            directory = os.path.join(self.root, f"{link[0]}-{link[1]}")
+            chunks = []
+            if os.path.isdir(directory):
+                for name in sorted(os.listdir(directory)):
+                    if not name.endswith(".npz"):
+                        continue
+                    with np.load(os.path.join(directory, name)) as columns:
+                        chunk = np.empty(len(columns["timestamp"]), dtype=MEASUREMENT_DTYPE)
+                        for field in MEASUREMENT_DTYPE.names:
+                            chunk[field] = columns[field]
+                        chunks.append(chunk)
+            self.cache[link] = np.concatenate(chunks) if chunks else np.empty(0, dtype=MEASUREMENT_DTYPE)
+        return self.cache[link]
+
+    def samples(self, src, dst):
+        """All samples of link src -> dst in timestamp order, pending ones included."""
+        link = (src, dst)
+        rows = self._flushed(link)
+        if link in self.pending:
+            rows = np.concatenate([rows, np.array(self.pending[link], dtype=MEASUREMENT_DTYPE)])
+        return rows[np.argsort(rows["timestamp"], kind="stable")]
+
+    def scan(self):
+        """Every sample of every link as one array in timestamp order."""
+        parts = [self.samples(src, dst) for src, dst in self.links()]
+        rows = np.concatenate(parts) if parts else np.empty(0, dtype=MEASUREMENT_DTYPE)
+        return rows[np.argsort(rows["timestamp"], kind="stable")]
+
+    def values(self, src, dst, column="delay"):
+        """Non-NaN values of one column for link src -> dst, oldest first."""
+        values = self.samples(src, dst)[column]
+        return values[~np.isnan(values)]
+
+    def count(self, src, dst, column="delay"):
+        return len(self.values(src, dst, column))
+
+    def min(self, src, dst, column="delay"):
+        values = self.values(src, dst, column)
+        return float(values.min()) if len(values) else None
+
+    def max(self, src, dst, column="delay"):
+        values = self.values(src, dst, column)
+        return float(values.max()) if len(values) else None
+
+    def quantile(self, src, dst, q, column="delay"):
+        values = self.values(src, dst, column)
+        return float(np.quantile(values, q)) if len(values) else None
+
+    def latest(self, src, dst, column="delay"):
+        values = self.values(src, dst, column)
+        return float(values[-1]) if len(values) else None
+
+    # -- CSV compatibility -----------------------------------------------------------------
+
+    def import_csv(self, path):
+        """Load a Source,Destination,Avg_Delay(ms) CSV; row order becomes the timestamp."""
+        with open(path, newline="") as fd:
+            reader = csv.reader(fd)
+            next(reader, None)  # header
+            rows = [(index, int(src), int(dst), float(delay), np.nan, np.nan)
+                    for index, (src, dst, delay) in enumerate(row[:3] for row in reader if len(row) >= 3)]
+        self.append_rows(np.array(rows, dtype=MEASUREMENT_DTYPE))
+        self.flush()
+        # The stamp goes last, and atomically: a root without it is an unfinished import
+        stamp = os.path.join(self.root, SOURCE_FILE)
+        with open(stamp + ".tmp", "w") as fd:
+            json.dump(_file_stamp(path), fd)
+        os.replace(stamp + ".tmp", stamp)
+        return len(rows)
+
+    def export_csv(self, path):
+        """Write all samples in the legacy CSV layout (what LSTM_Model/Main.ipynb reads)."""
+        rows = self.scan()
+        with open(path, "w", newline="") as fd:
+            writer = csv.writer(fd)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(zip(rows["src"].tolist(), rows["dst"].tolist(), rows["delay"].tolist()))
+        return len(rows)
+
+    @classmethod
+    def from_csv(cls, path, root=None):
+        """Open the store converted from a legacy CSV, importing it again only when the CSV changed."""
+        root = root or os.path.splitext(path)[0] + ".store"
+        source = os.path.join(root, SOURCE_FILE)
+        if os.path.exists(source):
+            with open(source) as fd:
+                try:
+                    matches = json.load(fd) == _file_stamp(path)
+                except ValueError:
+                    matches = False
+            if matches:
+                return cls(root)
+        # No stamp (first import, or one that crashed before writing it) or a stale one: start empty
+        if os.path.isdir(root):
+            for directory in os.listdir(root):
+                _remove_partition(os.path.join(root, directory))
+        store = cls(root)
+        store.import_csv(path)
+        return store
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _remove_partition(path):
+    if os.path.isdir(path):
+        for name in os.listdir(path):
+            os.remove(os.path.join(path, name))
+        os.rmdir(path)
+    else:
+        os.remove(path)
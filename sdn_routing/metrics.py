@@ -0,0 +1,217 @@
+import atexit
+import bisect
+import functools
+import inspect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; covers a cached path lookup (sub-ms) up to a D-ITG probe round (tens of seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = self.labels if exc_type is None else self.labels + (("error", exc_type.__name__),)
+        self.metrics._observe(self.name, labels, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Counters and latency histograms, keyed by name and labels.
+
+    Recording is a dict lookup and an add under one lock, so timers can sit on hot
+    paths (every flow request, every probe) without changing what they measure.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.counters = {}  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> Histogram
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        self._observe(name, tuple(sorted(labels.items())), value)
+
+    def _observe(self, name, labels, value):
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def timer(self, name, **labels):
+        """Context manager recording the elapsed seconds of its block into histogram name."""
+        return _Timer(self, name, tuple(sorted(labels.items())))
+
+    def timed(self, name, **labels):
+        """Decorator form of timer(); works on plain functions and coroutines."""
+        def decorate(function):
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(name, **labels):
+                        return await function(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """Everything recorded so far as plain JSON-ready data."""
+        with self.lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{"name": name, "labels": dict(labels), "count": histogram.count, "sum": histogram.sum,
+                           "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], histogram.counts))}
+                          for (name, labels), histogram in sorted(self.histograms.items())]
+        return {"timestamp": time.time(), "counters": counters, "histograms": histograms}
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (counter_name, labels), value in sorted(self.counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (histogram_name, labels), histogram in sorted(self.histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path):
+        with open(path, "w") as fd:
+            json.dump(self.snapshot(), fd, indent=2)
+
+    def report(self):
+        """Print count, total and mean of every timer, slowest total first."""
+        with self.lock:
+            rows = sorted(self.histograms.items(), key=lambda item: -item[1].sum)
+        for (name, labels), histogram in rows:
+            label_text = ", ".join(f"{key}={value}" for key, value in labels)
+            print(f"{name}[{label_text}]: {histogram.count} calls, {histogram.sum:.3f}s total, "
+                  f"{histogram.sum / histogram.count * 1000:.2f} ms mean")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+METRICS = Metrics()
+
+
+def record_request(action, result, metrics=METRICS):
+    """Count one controller request (a FlowResult) and add its latency to the flow-request histogram."""
+    outcome = "ok" if result.error is None else "error"
+    metrics.inc("restconf_requests_total", action=action, outcome=outcome)
+    metrics.observe("flow_request_seconds", result.latency, action=action)
+
+
+def instrumented(cls=None, name="method_seconds", metrics=METRICS):
+    """Class decorator: time every public method of cls into histogram name, labelled Class.method."""
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or not inspect.isfunction(value):
+                continue
+            setattr(cls, attr, metrics.timed(name, method=f"{cls.__name__}.{attr}")(value))
+        return cls
+    return decorate(cls) if cls is not None else decorate
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        metrics = self.server.metrics
+        if self.path.split("?")[0] == "/metrics":
+            body, content_type = metrics.prometheus_text().encode(), "text/plain; version=0.0.4"
+        elif self.path.split("?")[0] == "/metrics.json":
+            body, content_type = json.dumps(metrics.snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port=9108, host="127.0.0.1", metrics=METRICS):
+    """Serve /metrics (Prometheus text) and /metrics.json from a background thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics on this local port (/metrics, /metrics.json)")
+    parser.add_argument("--metrics-json", default=None, help="write all metrics to this JSON file at exit")
+
+
+def start_metrics(args, metrics=METRICS):
+    """Start what add_metrics_arguments asked for: the endpoint and/or the JSON dump at exit."""
+    if args.metrics_port is not None:
+        server = serve(args.metrics_port, metrics=metrics)
+        print(f"Metrics on http://127.0.0.1:{server.server_address[1]}/metrics")
+    if args.metrics_json:
+        atexit.register(metrics.dump_json, args.metrics_json)
@@ -0,0 +1,127 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# /restconf/{config|operational}/opendaylight-inventory:nodes/node/{node}/flow-node-inventory:table/{table}[/flow/{flow}]
+FLOW_PATH = re.compile(
+    r"^/restconf/(?P<store>config|operational)/opendaylight-inventory:nodes/node/(?P<node>[^/]+)"
+    r"/flow-node-inventory:table/(?P<table>[^/]+)(?:/flow/(?P<flow>[^/]+))?/?$"
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like ODL's Jetty
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _handle(self):
+        server = self.server
+        body = self._read_body()
+        server.count_request(self.command)
+        if server.latency:
+            time.sleep(server.latency)
+
+        match = FLOW_PATH.match(self.path)
+        if not match:
+            return self._reply(404, {"errors": f"unknown resource {self.path}"})
+        node, table, flow_id = match.group("node"), match.group("table"), match.group("flow")
+
+        with server.lock:
+            flows = server.flows.setdefault(node, {}).setdefault(table, {})
+            if self.command == "GET":
+                if flow_id is not None:
+                    if flow_id not in flows:
+                        return self._reply(404, {"errors": f"flow {flow_id} not found"})
+                    return self._reply(200, {"flow-node-inventory:flow": [flows[flow_id]]})
+                return self._reply(200, {"flow-node-inventory:table": [{"id": int(table), "flow": list(flows.values())}]})
+            if self.command == "DELETE":
+                if flow_id is None:
+                    flows.clear()
+                else:
+                    flows.pop(flow_id, None)
+                return self._reply(200)
+
+            if flow_id is not None:
+                new_flows = body.get("flow") or body.get("flow-node-inventory:flow")
+                new_flows = [new_flows] if isinstance(new_flows, dict) else new_flows
+            else:
+                tables = body.get("flow-node-inventory:table") or body.get("table")
+                new_flows = tables[0].get("flow", [])
+                if self.command == "PUT":
+                    flows.clear()  # PUT on the table replaces its contents
+            created = False
+            for flow in new_flows:
+                created |= flow["id"] not in flows
+                flows[flow["id"]] = flow
+        return self._reply(201 if created else 200)
+
+    do_GET = do_PUT = do_PATCH = do_POST = do_DELETE = _handle
+
+
+class MockRestconfServer(ThreadingHTTPServer):
+    """In-memory stand-in for ODL's RESTCONF flow inventory, for benchmarks without a controller.
+
+    Config and operational reads return the same flows. latency adds a fixed
+    per-request processing delay to emulate the controller.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.flows = {}
+        self.request_counts = {}
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    @property
+    def request_count(self):
+        return sum(self.request_counts.values())
+
+    def count_request(self, method):
+        with self.lock:
+            self.request_counts[method] = self.request_counts.get(method, 0) + 1
+
+    def flow_count(self):
+        with self.lock:
+            return sum(len(flows) for tables in self.flows.values() for flows in tables.values())
+
+    def reset(self):
+        with self.lock:
+            self.flows.clear()
+            self.request_counts.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
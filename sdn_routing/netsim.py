@@ -0,0 +1,573 @@
+import heapq
+import ipaddress
+import itertools
+import math
+from collections import deque
+
+import networkx as nx
+import numpy as np
+
+from sdn_routing.batch_routing import NO_PATH, all_pairs_shortest_paths, next_hop_matrix, pair_path, route_all_pairs
+from sdn_routing.flow_installer import TABLE_ID, FlowResult, build_flow
+from sdn_routing.flow_state import FlowStateCache, reconcile
+from sdn_routing.port_map import switch_number
+from sdn_routing.port_telemetry import PortCounters
+from sdn_routing.routing_engine import RoutingEngine
+from sdn_routing.structured_log import MatrixText, dump_matrix, get_logger
+
+DEFAULT_QUEUE_PACKETS = 1000  # Linux txqueuelen, what an unshaped Mininet interface queues
+SWITCH_DELAY_MS = 0.005
+TTL = 64
+
+log = get_logger("netsim")
+
+
+class EventLoop:
+    """Discrete-event scheduler: callbacks run in simulated-time order, now is in seconds."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.queue = []
+        self.sequence = itertools.count()  # FIFO among events due at the same time
+        self.events = 0
+
+    def schedule(self, delay, callback, *args):
+        heapq.heappush(self.queue, (self.now + delay, next(self.sequence), callback, args))
+
+    def run(self, until=None):
+        """Process events up to simulated time until (all of them when None)."""
+        queue = self.queue
+        while queue and (until is None or queue[0][0] <= until):
+            self.now, _, callback, args = heapq.heappop(queue)
+            self.events += 1
+            callback(*args)
+        if until is not None:
+            self.now = max(self.now, until)
+
+
+class SimLink:
+    """One direction of a link: a FIFO output queue drained at bw, then delay of propagation.
+
+    bw is in Mbit/s (None: no shaping), delay in ms, like TCLink's parameters.
+    """
+
+    def __init__(self, src, dst, delay_ms=0.0, bw=None, queue_packets=DEFAULT_QUEUE_PACKETS):
+        self.src = src
+        self.dst = dst
+        self.delay_ms = delay_ms
+        self.bw = bw
+        self.queue_packets = queue_packets
+        self.departures = deque()  # departure times of the packets still queued
+        self.busy_until = 0.0
+        self.sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+
+    def transmit(self, now, size):
+        """Arrival time at the far end of a size-byte packet sent at now, or None if the queue is full."""
+        departures = self.departures
+        while departures and departures[0] <= now:
+            departures.popleft()
+        if len(departures) >= self.queue_packets:
+            self.dropped += 1
+            return None
+        start = max(now, self.busy_until)
+        departure = start + (size * 8 / (self.bw * 1e6) if self.bw else 0.0)
+        self.busy_until = departure
+        departures.append(departure)
+        self.sent += 1
+        self.bytes_sent += size
+        return departure + self.delay_ms / 1000
+
+
+class Packet:
+    __slots__ = ("src_ip", "dst_ip", "size", "sent_at", "ttl", "on_arrival")
+
+    def __init__(self, src_ip, dst_ip, size, sent_at, on_arrival=None):
+        self.src_ip = src_ip
+        self.dst_ip = dst_ip
+        self.size = size
+        self.sent_at = sent_at
+        self.ttl = TTL
+        self.on_arrival = on_arrival
+
+
+class SimNode:
+    """A simulated switch or host. ports[n] is the outgoing SimLink of port n."""
+
+    def __init__(self, name, ip=None, is_switch=False):
+        self.name = name
+        self.ip = ip.split('/')[0] if ip else None
+        self.is_switch = is_switch
+        self.ports = {}
+        self.peers = {}  # port -> node at the other end
+        self.flows = {}  # flow_id -> flow body, as pushed over RESTCONF
+        self.exact = {}  # dest ip -> (priority, port), compiled from flows
+        self.prefixes = []  # (prefix length, priority, network, mask, port) for non-/32 matches
+
+    def IP(self):
+        return self.ip
+
+    def next_port(self):
+        # Switch ports start at 1 and hosts at 0, as Mininet numbers them
+        return max(self.ports, default=0 if self.is_switch else -1) + 1
+
+    def set_flows(self, flows):
+        self.flows = flows
+        self.exact, self.prefixes = {}, []
+        for flow in flows.values():
+            flow = flow.get("flow", flow)
+            network = ipaddress.ip_network(flow["match"]["ipv4-destination"], strict=False)
+            action = flow["instructions"]["instruction"][0]["apply-actions"]["action"][0]
+            port = int(action["output-action"]["output-node-connector"])
+            priority = int(flow.get("priority", 0))
+            if network.prefixlen == 32:
+                if priority >= self.exact.get(str(network.network_address), (-1,))[0]:
+                    self.exact[str(network.network_address)] = (priority, port)
+            else:
+                self.prefixes.append((network.prefixlen, priority, int(network.network_address),
+                                      int(network.netmask), port))
+        self.prefixes.sort(reverse=True)
+
+    def lookup(self, dst_ip):
+        """Output port of the best matching flow for dst_ip, or None on a table miss."""
+        best = self.exact.get(dst_ip)
+        if best is not None:
+            return best[1]
+        if self.prefixes:
+            address = int(ipaddress.ip_address(dst_ip))
+            for _, _, network, mask, port in self.prefixes:
+                if address & mask == network:
+                    return port
+        return None
+
+
+class SimNetwork:
+    """Mininet-like container for the simulator: addSwitch/addHost/addLink/get/start/stop.
+
+    Packets are forwarded hop by hop through the switches' flow tables. A table
+    miss is handled the way the controller's learning switch would: deliver to a
+    locally attached host, otherwise forward along the fewest-hop path.
+    """
+
+    def __init__(self, queue_packets=DEFAULT_QUEUE_PACKETS, switch_delay_ms=SWITCH_DELAY_MS):
+        self.loop = EventLoop()
+        self.queue_packets = queue_packets
+        self.switch_delay = switch_delay_ms / 1000
+        self.nodes = {}
+        self.switches = []
+        self.hosts = []
+        self.links = []
+        self.connections = {}  # (name1, name2) -> (SimLink name1 -> name2, SimLink name2 -> name1)
+        self.host_by_ip = {}
+        self.table_misses = 0
+        self.dropped = 0
+        self._hop_count_next = None
+
+    def addController(self, *args, **kwargs):
+        return None
+
+    def addSwitch(self, name, **params):
+        switch = SimNode(name, is_switch=True)
+        self.nodes[name] = switch
+        self.switches.append(switch)
+        return switch
+
+    def addHost(self, name, ip=None, **params):
+        host = SimNode(name, ip=ip)
+        self.nodes[name] = host
+        self.hosts.append(host)
+        self.host_by_ip[host.ip] = host
+        return host
+
+    def addLink(self, node1, node2, bw=None, delay='0ms', **params):
+        delay_ms = float(str(delay).strip('ms') or 0)
+        port1, port2 = node1.next_port(), node2.next_port()
+        node1.ports[port1] = SimLink(node1, node2, delay_ms, bw, self.queue_packets)
+        node2.ports[port2] = SimLink(node2, node1, delay_ms, bw, self.queue_packets)
+        node1.peers[port1], node2.peers[port2] = node2, node1
+        self.links.append((node1, port1, node2, port2))
+        # A repeated link (Abilene lists 2-9 twice) replaces the earlier one, as cost updates do
+        self.connections[(node1.name, node2.name)] = (node1.ports[port1], node2.ports[port2])
+        self.connections[(node2.name, node1.name)] = (node2.ports[port2], node1.ports[port1])
+        self._hop_count_next = None
+        return node1.ports[port1], node2.ports[port2]
+
+    def get(self, name):
+        return self.nodes[name]
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    @property
+    def now(self):
+        return self.loop.now
+
+    def run(self, duration=None):
+        """Advance simulated time by duration seconds (until idle when None)."""
+        self.loop.run(None if duration is None else self.loop.now + duration)
+
+    def connection(self, node1, node2):
+        """The two SimLink directions (node1 -> node2, node2 -> node1) between two nodes, or None."""
+        return self.connections.get((node1.name, node2.name))
+
+    def set_link_delay(self, name1, name2, delay_ms):
+        """Equivalent of link.intf.config(delay=...) on both ends."""
+        for link in self.connection(self.nodes[name1], self.nodes[name2]) or ():
+            link.delay_ms = delay_ms
+
+    # -- forwarding -------------------------------------------------------------------------
+
+    def send(self, node, packet):
+        """Inject packet at node (a host, or a switch for switch-sourced probes)."""
+        if node.is_switch:
+            self._forward(node, packet)
+        else:
+            self._out(node, 0, packet)
+
+    def send_over(self, link, packet):
+        """Put packet directly on one link, as a probe between two neighbouring switches does."""
+        arrival = link.transmit(self.loop.now, packet.size)
+        if arrival is None:
+            self.dropped += 1
+            return
+        self.loop.schedule(arrival - self.loop.now, self._deliver_probe, packet)
+
+    def _deliver_probe(self, packet):
+        packet.on_arrival(packet)
+
+    def _out(self, node, port, packet):
+        link = node.ports.get(port)
+        arrival = link.transmit(self.loop.now, packet.size) if link is not None else None
+        if arrival is None:
+            self.dropped += 1
+            return
+        self.loop.schedule(arrival - self.loop.now, self._arrive, node.peers[port], packet)
+
+    def _arrive(self, node, packet):
+        if not node.is_switch:
+            if node.ip == packet.dst_ip and packet.on_arrival is not None:
+                packet.on_arrival(packet)
+            return
+        packet.ttl -= 1
+        if packet.ttl <= 0:
+            self.dropped += 1
+            return
+        self.loop.schedule(self.switch_delay, self._forward, node, packet)
+
+    def _forward(self, node, packet):
+        port = node.lookup(packet.dst_ip)
+        if port is None:
+            self.table_misses += 1
+            port = self._miss_port(node, packet.dst_ip)
+            if port is None:
+                self.dropped += 1
+                return
+        self._out(node, port, packet)
+
+    def _miss_port(self, node, dst_ip):
+        host = self.host_by_ip.get(dst_ip)
+        if host is None:
+            return None
+        attached = host.peers[0]
+        if attached is node:
+            return next(port for port, peer in node.peers.items() if peer is host)
+        if self._hop_count_next is None:
+            self._hop_count_next = next_hop_matrix(all_pairs_shortest_paths(self.hop_matrix())[1])
+        next_index = int(self._hop_count_next[switch_number(node.name) - 1, switch_number(attached.name) - 1])
+        if next_index == NO_PATH:
+            return None
+        next_switch = self.nodes[f"s{next_index + 1}"]
+        return next(port for port, peer in node.peers.items() if peer is next_switch)
+
+    def port_stats(self):
+        """{switch number: {port: PortCounters}}, the simulated equivalent of ovs-ofctl dump-ports on every switch."""
+        stats = {switch_number(switch.name): {} for switch in self.switches}
+        for node1, port1, node2, port2 in self.links:
+            out, back = node1.ports[port1], node2.ports[port2]
+            for node, port, tx, rx in ((node1, port1, out, back), (node2, port2, back, out)):
+                if node.is_switch:
+                    stats[switch_number(node.name)][port] = PortCounters(rx.sent, rx.bytes_sent, 0, tx.sent,
+                                                                         tx.bytes_sent, tx.dropped)
+        return stats
+
+    def hop_matrix(self):
+        size = len(self.switches)
+        matrix = np.zeros((size, size))
+        for node1, _, node2, _ in self.links:
+            if node1.is_switch and node2.is_switch:
+                matrix[switch_number(node1.name) - 1, switch_number(node2.name) - 1] = 1
+                matrix[switch_number(node2.name) - 1, switch_number(node1.name) - 1] = 1
+        return matrix
+
+    # -- measurements -----------------------------------------------------------------------
+
+    def ping(self, src, dst, count=15, interval=1.0, size=64):
+        """ICMP-like echo from host src to host dst; returns the round-trip times in ms (lost ones omitted)."""
+        src, dst = self.nodes[src], self.nodes[dst]
+        rtts = []
+
+        def reply(packet):
+            rtts.append((self.loop.now - packet.sent_at) * 1000)
+
+        def echo(packet):
+            self.send(dst, Packet(dst.ip, src.ip, size, packet.sent_at, reply))
+
+        for i in range(count):
+            self.loop.schedule(i * interval, lambda: self.send(src, Packet(src.ip, dst.ip, size, self.loop.now, echo)))
+        self.run(count * interval + 1.0)
+        return rtts
+
+    def one_way_delays(self, pairs, count=3, interval=0.01, size=64):
+        """Send count packets from host src to host dst for every (src, dst) pair at once.
+
+        Returns {(src, dst): one-way delays in ms}; lost packets are missing from the list.
+        """
+        delays = {}
+        for src, dst in pairs:
+            samples = delays[(src, dst)] = []
+            for i in range(count):
+                self.loop.schedule(i * interval, self._emit_timed, self.nodes[src], self.nodes[dst], size, samples)
+        self.run(count * interval + 1.0)
+        return delays
+
+    def _emit_timed(self, src, dst, size, samples):
+        self.send(src, Packet(src.ip, dst.ip, size, self.loop.now,
+                              lambda packet: samples.append((self.loop.now - packet.sent_at) * 1000)))
+
+    def start_traffic(self, sender, receiver, duration_ms=60000, packet_size=128, rate=150):
+        """Constant-rate UDP load (ITGSend -C rate -c packet_size): host to host through the flow
+        tables, or straight over the link when both ends are neighbouring switches."""
+        sender, receiver = self.nodes[sender], self.nodes[receiver]
+        direct = self.connection(sender, receiver) if sender.is_switch and receiver.is_switch else None
+        count = int(duration_ms / 1000 * rate)
+        for i in range(count):
+            self.loop.schedule(i / rate, self._emit, sender, receiver, direct, packet_size)
+        return count
+
+    def _emit(self, sender, receiver, direct, packet_size):
+        packet = Packet(sender.ip, receiver.ip, packet_size, self.loop.now, _discard)
+        if direct is not None:
+            self.send_over(direct[0], packet)
+        else:
+            self.send(sender, packet)
+
+    def probe_links(self, links, duration_ms=10000, packet_size=100, rate=10):
+        """D-ITG style probes over every (src, dst) switch link at once.
+
+        Returns {(src, dst): one-way delays in seconds}, the unit ITGDec reports in.
+        """
+        samples = {}
+        for src, dst in links:
+            connection = self.connection(self.nodes[f"s{src}"], self.nodes[f"s{dst}"])
+            if connection is None:
+                continue
+            delays = samples[(src, dst)] = []
+            for i in range(int(duration_ms / 1000 * rate)):
+                self.loop.schedule(i / rate, self._emit_probe, connection[0], packet_size, delays)
+        self.run(duration_ms / 1000 + 1.0)
+        return samples
+
+    def _emit_probe(self, link, packet_size, delays):
+        self.send_over(link, Packet(None, None, packet_size, self.loop.now,
+                                    lambda packet: delays.append(self.loop.now - packet.sent_at)))
+
+
+def _discard(packet):
+    pass
+
+
+class SimFlowInstaller:
+    """FlowInstaller against the simulator's flow tables; requests take effect immediately."""
+
+    def __init__(self, net, table_id=TABLE_ID):
+        self.net = net
+        self.table_id = table_id
+        self.requests = 0
+
+    def _node(self, node_id):
+        return self.net.nodes[f"s{switch_number(node_id)}"]
+
+    def _apply(self, changes):
+        """changes: (node_id, flow_id, flow_data or None to delete); each table is recompiled once."""
+        tables = {}
+        results = []
+        for node_id, flow_id, flow_data in changes:
+            self.requests += 1
+            node = self._node(node_id)
+            flows = tables.setdefault(node, dict(node.flows))
+            if flow_data is None:
+                flows.pop(flow_id, None)
+            else:
+                flows[flow_id] = flow_data
+            results.append(FlowResult(node_id, flow_id, 200, 0.0, None))
+        for node, flows in tables.items():
+            node.set_flows(flows)
+        return results
+
+    def put_flow(self, node_id, flow_id, flow_data):
+        return self._apply([(node_id, flow_id, flow_data)])[0]
+
+    def delete_flow(self, node_id, flow_id):
+        return self._apply([(node_id, flow_id, None)])[0]
+
+    def install(self, flows):
+        return self._apply(flows)
+
+    def delete(self, flows):
+        return self._apply((node_id, flow_id, None) for node_id, flow_id in flows)
+
+    def push_table(self, node_id, flow_bodies, table_id=TABLE_ID, method="PATCH"):
+        """PUT replaces the table, PATCH merges into it."""
+        self.requests += 1
+        node = self._node(node_id)
+        flows = dict(node.flows) if method == "PATCH" else {}
+        for flow_data in flow_bodies:
+            flows[flow_data["flow"]["id"]] = flow_data
+        node.set_flows(flows)
+        return FlowResult(node_id, f"table_{table_id}[{len(flow_bodies)} flows]", 200, 0.0, None)
+
+    def install_bulk(self, flows, method="PATCH"):
+        groups = {}
+        for node_id, flow_id, flow_data in flows:
+            groups.setdefault(node_id, []).append(flow_data)
+        return [self.push_table(node_id, flow_bodies, self.table_id, method) for node_id, flow_bodies in groups.items()]
+
+    def close(self):
+        pass
+
+
+class SimTopology:
+    """CustomTopology on the discrete-event simulator, for running the routing strategies without
+    root, Mininet, OVS or OpenDaylight. spec is a topology_loader.Topology.
+
+    Methods keep the names and behaviour of the scripts' CustomTopology; pingDevice and
+    measure_link_delays run in simulated time and return as soon as it has been computed.
+    """
+
+    def __init__(self, spec, bw=10, queue_packets=DEFAULT_QUEUE_PACKETS):
+        self.spec = spec
+        self.bw = bw
+        self.queue_packets = queue_packets
+        self.net = None
+        self.graph = nx.Graph()
+        self.cost_matrix = []
+        self.engine = RoutingEngine()
+        self.flow_installer = None
+        self.flow_state = FlowStateCache()
+        self.port_map = None
+        self.distances = None
+        self.predecessors = None
+        self.all_pairs = False  # route every pair at once and read paths from the predecessor matrix
+        self.route = []
+
+    def build_topology(self, first_values=None):
+        """Create the switches, hosts and links of the loaded topology in a fresh simulated network."""
+        self.net = SimNetwork(queue_packets=self.queue_packets)
+        self.spec.add_to_mininet(self.net, delays=first_values, bw=self.bw)
+        self.flow_installer = SimFlowInstaller(self.net)
+        return self.net
+
+    def read_mininet_topology(self):
+        """Build the switch graph from the simulated links; ports are the ones the topology predicts."""
+        self.graph.clear()
+        for switch in self.net.switches:
+            self.graph.add_node(switch.name)
+        for node1, port1, node2, _ in self.net.links:
+            self.graph.add_edge(node1.name, node2.name, weight=node1.ports[port1].delay_ms)
+        self.port_map = self.spec.port_map
+
+    def print_adjacency_matrix(self):
+        """Return the switch cost matrix of the current link delays (logged at DEBUG)."""
+        delays = [self.net.connection(self.net.get(f"s{src}"), self.net.get(f"s{dst}"))[0].delay_ms
+                  for src, dst in self.spec.link_list()]
+        matrix = self.spec.cost_matrix(delays)
+        log.debug("Adjacency matrix\n%s", MatrixText(matrix, self.spec.labels))
+        dump_matrix("adjacency", matrix)
+        return matrix
+
+    def modify_link_delay(self, second_values):
+        """Apply new delays to the links of the current route, as the scripts do."""
+        route = self.route
+        delays = {}
+        for src, dst, delay in second_values:
+            delays[(src, dst)] = delays[(dst, src)] = delay
+        for node1, node2 in zip(route, route[1:]):
+            if (node1, node2) not in delays:
+                continue
+            delay = float(delays[(node1, node2)])
+            self.update_link_cost(node1, node2, delay)
+            self.net.set_link_delay(node1, node2, delay)
+            log.debug("Delay between %s and %s updated to %sms", node1, node2, delay)
+
+    def build_flow_rules(self, source, destination, path):
+        """Build the (node, flow id, flow body) entries for the given path."""
+        if self.port_map is None:
+            self.port_map = self.spec.port_map
+        dest_ip = self.spec.host_prefix(switch_number(destination))
+        flows = []
+        for i in range(len(path) - 1):
+            curr_switch_no = switch_number(path[i])
+            flow_id = f"flow_{source}_{destination}_{i + 1}"
+            output_port = self.port_map.port(curr_switch_no, switch_number(path[i + 1]))
+            flows.append((f"openflow:{curr_switch_no}", flow_id, build_flow(flow_id, dest_ip, output_port)))
+        return flows
+
+    def add_flow_rules(self, source, destination, path):
+        flows = self.build_flow_rules(source, destination, path)
+        diff, results = reconcile(self.flow_installer, self.flow_state, flows, prefix=f"flow_{source}_{destination}_")
+        return results
+
+    def update_link_cost(self, node1, node2, cost):
+        i = switch_number(node1) - 1
+        j = switch_number(node2) - 1
+        self.cost_matrix[i][j] = cost
+        self.cost_matrix[j][i] = cost
+        self.engine.sync(self.cost_matrix)
+        self.engine.update_link(node1, node2, cost)
+
+    def find_shortest_path_from_matrix(self, start_node, target_node):
+        """Find and log the shortest path using the persistent routing engine; with all_pairs
+        (--all-pairs) every pair is routed at once and this one is read from the predecessor matrix."""
+        if self.all_pairs:
+            self.route_all_pairs()
+            path, path_length = pair_path(self, start_node, target_node)
+            if not path:
+                log.warning("No path found between %s and %s", start_node, target_node)
+                return
+            log.info("Shortest path from %s to %s: %s (total cost %s)", start_node, target_node, path, path_length)
+            self.route = path
+            return
+
+        self.engine.sync(self.cost_matrix)
+        try:
+            path, path_length = self.engine.shortest_path(start_node, target_node)
+            log.info("Shortest path from %s to %s: %s (total cost %s)", start_node, target_node, path, path_length)
+            self.route = path
+            self.add_flow_rules(start_node, target_node, path)
+        except nx.NetworkXNoPath:
+            log.warning("No path found between %s and %s", start_node, target_node)
+
+    def route_all_pairs(self, bulk=True):
+        """Route every switch pair in one vectorized pass and reconcile all their flows (see batch_routing)."""
+        return route_all_pairs(self, bulk)
+
+    def pingDevice(self, node1, node2, count=15):
+        """Simulated ping; prints and returns (rtt avg ms, loss %)."""
+        rtts = self.net.ping(node1, node2, count=count)
+        loss = 100.0 * (count - len(rtts)) / count
+        average = sum(rtts) / len(rtts) if rtts else math.nan
+        print(f"{node1} -> {node2}: {count} packets transmitted, {len(rtts)} received, {loss:.0f}% packet loss")
+        if rtts:
+            deviation = math.sqrt(sum((rtt - average) ** 2 for rtt in rtts) / len(rtts))
+            print(f"rtt min/avg/max/mdev = {min(rtts):.3f}/{average:.3f}/{max(rtts):.3f}/{deviation:.3f} ms")
+        return average, loss
+
+    def measure_link_delays(self, links, duration_ms=10000, packet_size=100, rate=10):
+        """probe_scheduler.measure_link_delays in simulated time: {(src, dst): average delay in seconds}."""
+        return {link: sum(samples) / len(samples)
+                for link, samples in self.net.probe_links(links, duration_ms, packet_size, rate).items()
+                if samples}
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+def sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)  # same value as 1 / (1 + e^-x), without overflow warnings
+
+
+def lstm(x, kernel, recurrent_kernel, bias, return_sequences=False):
+    """Keras LSTM forward pass (tanh / sigmoid, gate order i, f, c, o) over x of shape (batch, time, features)."""
+    batch, steps, _ = x.shape
+    units = recurrent_kernel.shape[0]
+    # Input projections of every time step in one matrix product
+    projected = x @ kernel + bias
+    h = np.zeros((batch, units))
+    c = np.zeros((batch, units))
+    outputs = np.empty((batch, steps, units)) if return_sequences else None
+    for t in range(steps):
+        z = projected[:, t] + h @ recurrent_kernel
+        i = sigmoid(z[:, :units])
+        f = sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        if return_sequences:
+            outputs[:, t] = h
+    return outputs if return_sequences else h
+
+
+def bidirectional(x, forward, backward, return_sequences=False):
+    """Keras Bidirectional(LSTM) with merge_mode='concat'; forward/backward are (kernel, recurrent, bias)."""
+    forward_out = lstm(x, *forward, return_sequences=return_sequences)
+    backward_out = lstm(x[:, ::-1], *backward, return_sequences=return_sequences)
+    if return_sequences:
+        backward_out = backward_out[:, ::-1]  # Keras aligns the backward outputs with the input steps
+    return np.concatenate([forward_out, backward_out], axis=-1)
+
+
+def export_layers(model):
+    """Flatten a Sequential of Bidirectional(LSTM) / Dropout / Dense layers into named arrays."""
+    arrays = {}
+    kinds = []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == "Dropout":
+            continue  # identity at inference
+        n = len(kinds)
+        if kind == "Bidirectional":
+            if layer.merge_mode != "concat":
+                raise ValueError(f"unsupported merge_mode {layer.merge_mode!r}")
+            for direction, sublayer in (("forward", layer.forward_layer), ("backward", layer.backward_layer)):
+                for name, weights in zip(("kernel", "recurrent_kernel", "bias"), sublayer.get_weights()):
+                    arrays[f"{n}_{direction}_{name}"] = weights
+            kinds.append("bidirectional_sequences" if layer.forward_layer.return_sequences else "bidirectional")
+        elif kind == "Dense":
+            if layer.get_config().get("activation", "linear") != "linear":
+                raise ValueError("only a linear Dense head is supported")
+            arrays[f"{n}_kernel"], arrays[f"{n}_bias"] = layer.get_weights()
+            kinds.append("dense")
+        else:
+            raise ValueError(f"unsupported layer {kind}")
+    arrays["kinds"] = np.array(kinds)
+    return arrays
+
+
+def forward(arrays, x):
+    """Run the layers written by export_layers on x of shape (batch, time, features)."""
+    for n, kind in enumerate(arrays["kinds"]):
+        if kind == "dense":
+            x = x @ arrays[f"{n}_kernel"] + arrays[f"{n}_bias"]
+        else:
+            weights = [tuple(arrays[f"{n}_{direction}_{name}"] for name in ("kernel", "recurrent_kernel", "bias"))
+                       for direction in ("forward", "backward")]
+            x = bidirectional(x, *weights, return_sequences=(kind == "bidirectional_sequences"))
+    return x
@@ -0,0 +1,68 @@
+import numpy as np
+import requests
+
+ODL_TOPOLOGY_URL = "http://localhost:8181/restconf/operational/network-topology:network-topology/topology/flow:1"
+
+
+def switch_number(name):
+    """Switch id from a Mininet name ('s12') or an OpenFlow node id ('openflow:12')."""
+    return int(name.rsplit(':', 1)[-1] if ':' in name else name[1:])
+
+
+class PortMap:
+    """Output port of every switch towards each neighbouring switch.
+
+    ports[u - 1, v - 1] is the port switch u uses to reach switch v (0 if they are
+    not linked), so a next-hop port lookup is a single array index.
+    """
+
+    def __init__(self, num_switches):
+        self.ports = np.zeros((num_switches, num_switches), dtype=np.uint16)
+
+    def __len__(self):
+        return self.ports.shape[0]
+
+    def add_link(self, src_no, dst_no, src_port, dst_port):
+        size = max(src_no, dst_no)
+        if size > len(self):
+            grown = np.zeros((size, size), dtype=self.ports.dtype)
+            grown[:len(self), :len(self)] = self.ports
+            self.ports = grown
+        self.ports[src_no - 1, dst_no - 1] = src_port
+        self.ports[dst_no - 1, src_no - 1] = dst_port
+
+    def port(self, src_no, dst_no):
+        """Port on switch src_no that leads to switch dst_no."""
+        port = int(self.ports[src_no - 1, dst_no - 1])
+        if port == 0:
+            raise KeyError(f"s{src_no} has no link to s{dst_no}")
+        return port
+
+    @classmethod
+    def from_mininet(cls, net):
+        """Read the port numbers Mininet assigned to every switch-to-switch link."""
+        port_map = cls(len(net.switches))
+        switch_names = {switch.name for switch in net.switches}
+        for link in net.links:
+            node1, node2 = link.intf1.node, link.intf2.node
+            if node1.name in switch_names and node2.name in switch_names:
+                port_map.add_link(switch_number(node1.name), switch_number(node2.name),
+                                  node1.ports[link.intf1], node2.ports[link.intf2])
+        return port_map
+
+    @classmethod
+    def from_odl(cls, url=ODL_TOPOLOGY_URL, auth=("admin", "admin"), session=None):
+        """Read the links OpenDaylight discovered (operational flow:1 topology)."""
+        response = (session or requests).get(url, auth=auth, headers={"Accept": "application/json"})
+        response.raise_for_status()
+        topology = response.json()["topology"][0]
+        port_map = cls(len(topology.get("node", [])))
+        for link in topology.get("link", []):
+            src_tp = link["source"]["source-tp"]          # e.g. openflow:1:2
+            dst_tp = link["destination"]["dest-tp"]
+            src_node, src_port = src_tp.rsplit(':', 1)
+            dst_node, dst_port = dst_tp.rsplit(':', 1)
+            if not src_port.isdigit() or not dst_port.isdigit():
+                continue  # host attachment points are not switch-to-switch links
+            port_map.add_link(switch_number(src_node), switch_number(dst_node), int(src_port), int(dst_port))
+        return port_map
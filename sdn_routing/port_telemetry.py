@@ -0,0 +1,227 @@
+import re
+import subprocess
+import time
+from collections import namedtuple
+
+import requests
+
+from sdn_routing.metrics import METRICS
+from sdn_routing.port_map import switch_number
+from sdn_routing.structured_log import get_logger
+
+ODL_INVENTORY_URL = "http://localhost:8181/restconf/operational/opendaylight-inventory:nodes"
+STATS_KEY = "opendaylight-port-statistics:flow-capable-node-connector-statistics"
+
+PortCounters = namedtuple('PortCounters', ['rx_packets', 'rx_bytes', 'rx_dropped',
+                                           'tx_packets', 'tx_bytes', 'tx_dropped'])
+LinkLoad = namedtuple('LinkLoad', ['utilisation', 'delay', 'dropped'])  # delay in seconds, like the D-ITG probes
+
+log = get_logger("port_telemetry")
+
+_PORT_LINE = re.compile(r'port\s+("?[^:"]+"?):\s*rx pkts=(\S+), bytes=(\S+), drop=(\S+)')
+_TX_LINE = re.compile(r'tx pkts=(\S+), bytes=(\S+), drop=(\S+)')
+
+
+def _count(text):
+    return int(text) if text.isdigit() else 0  # OVS prints ? for counters a port does not keep
+
+
+def _port_number(token):
+    """'1' or, from OVS versions that print names, '"s1-eth1"' (Mininet names ports after their number)."""
+    token = token.strip('"')
+    if token.isdigit():
+        return int(token)
+    match = re.search(r'-eth(\d+)$', token)
+    return int(match.group(1)) if match else None  # LOCAL and other internal ports
+
+
+def parse_dump_ports(output):
+    """{port: PortCounters} from the output of ovs-ofctl dump-ports."""
+    ports, current = {}, None
+    for line in output.splitlines():
+        match = _PORT_LINE.search(line)
+        if match:
+            current = _port_number(match.group(1))
+            rx = [_count(value.rstrip(',')) for value in match.groups()[1:]]
+            continue
+        match = _TX_LINE.search(line)
+        if match and current is not None:
+            ports[current] = PortCounters(*rx, *(_count(value.rstrip(',')) for value in match.groups()))
+            current = None
+    return ports
+
+
+def ovs_port_stats(switch_names, protocols="OpenFlow13"):
+    """Collector reading every switch's port counters in one shell sweep (one process, not one per switch)."""
+    script = "; ".join(f"echo '### {name}'; ovs-ofctl -O {protocols} dump-ports {name}" for name in switch_names)
+
+    def collect():
+        output = subprocess.run(["sh", "-c", script], capture_output=True, text=True).stdout
+        stats = {}
+        for section in output.split("### ")[1:]:
+            name, _, body = section.partition("\n")
+            stats[switch_number(name.strip())] = parse_dump_ports(body)
+        return stats
+    return collect
+
+
+def odl_port_stats(url=ODL_INVENTORY_URL, auth=("admin", "admin"), session=None):
+    """Collector reading all switches' port statistics from OpenDaylight's operational inventory in one GET."""
+    session = session or requests.Session()
+
+    def collect():
+        response = session.get(url, auth=auth, headers={"Accept": "application/json"}, timeout=10)
+        response.raise_for_status()
+        stats = {}
+        for node in response.json().get("nodes", {}).get("node", []):
+            ports = stats.setdefault(switch_number(node["id"]), {})
+            for connector in node.get("node-connector", []):
+                port = connector["id"].rsplit(':', 1)[-1]
+                counters = connector.get(STATS_KEY)
+                if not port.isdigit() or counters is None:
+                    continue  # LOCAL, or statistics not collected yet
+                packets, octets = counters.get("packets", {}), counters.get("bytes", {})
+                ports[int(port)] = PortCounters(int(packets.get("received", 0)), int(octets.get("received", 0)),
+                                                int(counters.get("receive-drops", 0)),
+                                                int(packets.get("transmitted", 0)), int(octets.get("transmitted", 0)),
+                                                int(counters.get("transmit-drops", 0)))
+        return stats
+    return collect
+
+
+class PortTelemetry:
+    """Per-link utilisation and queueing delay estimated from two consecutive port-counter sweeps.
+
+    The src -> dst direction of a link is what src's port towards dst transmits. Its delay is
+    propagation + serialisation + M/M/1 queueing wait at the measured utilisation, capped at a
+    full queue (and taken as full when the port dropped packets in the interval).
+    """
+
+    def __init__(self, links, port_map, collect, bw=10, delays_ms=None, queue_packets=1000, clock=time.monotonic):
+        self.links = list(links)
+        self.port_map = port_map
+        self.collect = collect
+        self.bw = bw
+        self.delays_ms = dict(zip(self.links, delays_ms)) if delays_ms is not None else {}
+        self.queue_packets = queue_packets
+        self.clock = clock
+        self.previous = None  # (time, stats) of the last sweep
+
+    def sweep(self):
+        """Read all counters once; returns {(src, dst): LinkLoad} for the interval since the last sweep."""
+        with METRICS.timer("telemetry_sweep_seconds"):
+            stats = self.collect()
+        now = self.clock()
+        previous, self.previous = self.previous, (now, stats)
+        if previous is None or now <= previous[0]:
+            return {}
+        interval = now - previous[0]
+        loads = {}
+        for src, dst in self.links:
+            try:
+                port = self.port_map.port(src, dst)
+                before, after = previous[1][src][port], stats[src][port]
+            except KeyError:
+                continue
+            loads[(src, dst)] = self.estimate(src, dst, before, after, interval)
+        return loads
+
+    def estimate(self, src, dst, before, after, interval):
+        sent_bytes = max(0, after.tx_bytes - before.tx_bytes)
+        sent_packets = max(0, after.tx_packets - before.tx_packets)
+        dropped = max(0, after.tx_dropped - before.tx_dropped)
+        capacity = self.bw * 1e6
+        utilisation = min(1.0, sent_bytes * 8 / interval / capacity)
+        # Mean packet size of the interval; an idle port is costed with a probe-sized packet
+        service = (sent_bytes / sent_packets if sent_packets else 100) * 8 / capacity
+        full_queue = self.queue_packets * service
+        if dropped or utilisation >= 1.0:
+            wait = full_queue
+        else:
+            wait = min(full_queue, service * utilisation / (1 - utilisation))
+        propagation = self.delays_ms.get((src, dst), 0.0) / 1000
+        return LinkLoad(utilisation, propagation + service + wait, dropped)
+
+
+class PassiveMeasurer:
+    """measure() for RoutingDaemon that actively probes only links whose passive signal moved.
+
+    Each call sweeps the port counters, then hands probe() the links that have never been
+    probed, whose estimated delay changed by more than rel_change (or utilisation by more than
+    util_change) since their last probe, or that have been skipped max_skips times in a row.
+    Returns the delays of the links it probed; every other link keeps its last measured cost.
+    """
+
+    def __init__(self, telemetry, probe, links, rel_change=0.25, util_change=0.1, max_skips=10):
+        self.telemetry = telemetry
+        self.probe = probe
+        self.links = list(links)
+        self.rel_change = rel_change
+        self.util_change = util_change
+        self.max_skips = max_skips
+        self.reference = {}  # link -> LinkLoad when it was last probed
+        self.skips = {}
+        self.delays = {}  # link -> last measured delay
+
+    def stale_links(self, loads):
+        stale = []
+        for link in self.links:
+            load, reference = loads.get(link), self.reference.get(link)
+            if reference is None and load is not None and link in self.delays:
+                # Probed before the counters had an interval to compare; this sweep is its baseline
+                self.reference[link] = reference = load
+            if (link not in self.delays or load is None
+                    or self.skips.get(link, 0) >= self.max_skips
+                    or abs(load.utilisation - reference.utilisation) > self.util_change
+                    or abs(load.delay - reference.delay) > self.rel_change * reference.delay
+                    or load.dropped):
+                stale.append(link)
+        return stale
+
+    def __call__(self):
+        try:
+            loads = self.telemetry.sweep()
+        except Exception as e:
+            log.warning("Port counter sweep failed, probing every link: %s", e)
+            loads = {}
+        stale = self.stale_links(loads)
+        measured = self.probe(stale) if stale else {}
+        for link in self.links:
+            if link in measured:
+                self.delays[link] = measured[link]
+                self.reference[link] = loads.get(link)
+                self.skips[link] = 0
+            elif link not in stale:
+                self.skips[link] = self.skips.get(link, 0) + 1
+        METRICS.inc("link_probes_total", len(stale), kind="active")
+        METRICS.inc("link_probes_total", len(self.links) - len(stale), kind="skipped")
+        log.info("Passive telemetry: %d/%d links changed and probed", len(stale), len(self.links),
+                 extra={"fields": {"probed": len(stale), "links": len(self.links)}})
+        # Only this call's probes: a carried-over delay is not a new sample (the routes keep it
+        # anyway, and a forecaster would otherwise append it to the link's history again)
+        return {link: self.delays[link] for link in self.links if link in measured}
+
+
+def add_telemetry_arguments(parser):
+    parser.add_argument("--telemetry", choices=("off", "ovs", "odl"), default="off",
+                        help="with --daemon, read port counters each epoch (ovs-ofctl or ODL) and "
+                             "D-ITG-probe only the links whose load changed")
+    parser.add_argument("--telemetry-change", type=float, default=0.25,
+                        help="relative change of a link's passive delay estimate that triggers a probe")
+
+
+def link_measure(args, topology, links, probe, delays_ms=None):
+    """measure() for RoutingDaemon: probe(links) every epoch, or with --telemetry only the links that changed.
+
+    delays_ms are the delays the links were built with (ms, in spec.link_list() order, the
+    topology file's when None); they are the propagation part of the passive estimate.
+    """
+    if args.telemetry == "off":
+        return lambda: probe(links)
+    spec = topology.spec
+    collect = (ovs_port_stats([f"s{i}" for i in range(1, spec.num_switches + 1)]) if args.telemetry == "ovs"
+               else odl_port_stats())
+    configured = dict(zip(spec.link_list(), spec.delays if delays_ms is None else delays_ms))
+    telemetry = PortTelemetry(links, topology.port_map or spec.port_map, collect,
+                              delays_ms=[configured.get(link, 0.0) for link in links])
+    return PassiveMeasurer(telemetry, probe, links, rel_change=args.telemetry_change)
@@ -0,0 +1,107 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from sdn_routing.itgdec import parse_summary
+from sdn_routing.metrics import METRICS
+from sdn_routing.port_map import switch_number
+from sdn_routing.structured_log import get_logger
+
+BASE_SIGNAL_PORT = 9100   # ITGRecv signaling port of the receiver pool
+BASE_DATA_PORT = 10100    # first UDP port the pool hands out to probe sessions
+
+log = get_logger("probe_scheduler")
+
+
+def probe_address(switch_no):
+    """Per-switch probe address in 10.255.0.0/16, so concurrent probes never share an IP."""
+    return f"10.255.{(switch_no >> 8) & 0xff}.{switch_no & 0xff}"
+
+
+def assign_probe_addresses(net):
+    """Give every switch its own probe address (instead of the shared 10.0.0.100/101)."""
+    for switch in net.switches:
+        switch.cmd(f"ifconfig {switch.name} {probe_address(switch_number(switch.name))} netmask 255.0.0.0")
+
+
+def schedule_rounds(links):
+    """Split links into rounds in which no switch appears twice (a greedy edge colouring).
+
+    Each round is a matching, so all its links can be probed at the same time.
+    Greedy colouring needs at most 2 * max_degree - 1 rounds, usually close to max_degree.
+    """
+    degree = {}
+    for src, dst in links:
+        degree[src] = degree.get(src, 0) + 1
+        degree[dst] = degree.get(dst, 0) + 1
+
+    rounds = []
+    busy = []  # busy[r] is the set of switches already probed in round r
+    for src, dst in sorted(links, key=lambda link: -max(degree[link[0]], degree[link[1]])):
+        for r, switches in enumerate(busy):
+            if src not in switches and dst not in switches:
+                break
+        else:
+            r = len(rounds)
+            rounds.append([])
+            busy.append(set())
+        rounds[r].append((src, dst))
+        busy[r].update((src, dst))
+    return rounds
+
+
+def _send_and_decode(sender, receiver, receiver_ip, signal_port, data_port, sender_log, receiver_log,
+                     duration_ms, packet_size, rate, ping):
+    if ping:
+        sender.cmd(f"ping -c 4 {receiver_ip}")
+    sender.cmd(f"ITGSend -T UDP -a {receiver_ip} -rp {data_port} -Sdp {signal_port} "
+               f"-c {packet_size} -C {rate} -t {duration_ms} -l {sender_log} -x {receiver_log}")
+    return receiver.cmd(f"ITGDec {receiver_log}")
+
+
+@METRICS.timed("ditg_probe_seconds")
+def run_ditg_probe(sender, receiver, receivers, duration_ms=10000, packet_size=100, rate=10, ping=False):
+    """Probe sender -> receiver with D-ITG and return the ITGDec output.
+
+    The probe is one session on the long-lived ITGRecv of receivers (an itg_receivers.ReceiverPool),
+    on a data port of its own, so nothing is started or stopped per probe.
+    """
+    receiver_ip = probe_address(switch_number(receiver.name))
+    with receivers.session(sender, receiver) as session:
+        return _send_and_decode(sender, receiver, receiver_ip, session.signal_port, session.data_port,
+                                session.sender_log, session.receiver_log, duration_ms, packet_size, rate, ping)
+
+
+def measure_in_rounds(links, probe, max_workers=None):
+    """Call probe(src, dst, slot) for every link, running each round's links concurrently.
+
+    Returns {(src, dst): result}; a probe that raised maps to its exception.
+    """
+    results = {}
+    for round_links in schedule_rounds(links):
+        with ThreadPoolExecutor(max_workers=max_workers or len(round_links)) as executor:
+            futures = {link: executor.submit(probe, link[0], link[1], slot)
+                       for slot, link in enumerate(round_links)}
+        for link, future in futures.items():
+            error = future.exception()
+            results[link] = error if error is not None else future.result()
+    return results
+
+
+@METRICS.timed("link_measurement_seconds")
+def measure_link_delays(net, links, receivers, duration_ms=10000, packet_size=100, rate=10):
+    """Probe every link in rounds through the receivers pool; {(src, dst): average delay} of the probes that worked."""
+    def probe(src, dst, slot):
+        return run_ditg_probe(net.get(f"s{src}"), net.get(f"s{dst}"), receivers,
+                              duration_ms=duration_ms, packet_size=packet_size, rate=rate)
+
+    delays = {}
+    for (src, dst), decode_result in measure_in_rounds(links, probe).items():
+        if isinstance(decode_result, Exception):
+            log.warning("D-ITG probe s%d -> s%d failed: %s", src, dst, decode_result)
+            continue
+        summary = parse_summary(decode_result)
+        if summary is None or summary.avg_delay is None or math.isnan(summary.avg_delay):
+            log.warning("No delay in the ITGDec output for s%d -> s%d", src, dst)
+            continue
+        delays[(src, dst)] = summary.avg_delay
+    return delays
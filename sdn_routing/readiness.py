@@ -0,0 +1,93 @@
+import time
+
+from sdn_routing.structured_log import get_logger
+
+log = get_logger("readiness")
+
+
+class WaitLog:
+    """How long each readiness wait actually took, so experiment wall time can be accounted for."""
+
+    def __init__(self):
+        self.waits = []  # (name, elapsed seconds, ready)
+
+    def record(self, name, elapsed, ready):
+        self.waits.append((name, elapsed, ready))
+
+    def total(self):
+        return sum(elapsed for _, elapsed, _ in self.waits)
+
+    def report(self):
+        """Log count, total and worst wait per condition name."""
+        summary = {}
+        for name, elapsed, ready in self.waits:
+            count, total, worst, timeouts = summary.get(name, (0, 0.0, 0.0, 0))
+            summary[name] = (count + 1, total + elapsed, max(worst, elapsed), timeouts + (not ready))
+        log.info("Readiness waits: %d conditions, %.2fs in total", len(summary), self.total())
+        for name, (count, total, worst, timeouts) in summary.items():
+            log.info("%-30s %4dx  total %7.2fs  max %6.2fs  timeouts %d", name, count, total, worst, timeouts,
+                     extra={"fields": {"wait": name, "count": count, "total": total, "max": worst,
+                                       "timeouts": timeouts}})
+
+
+WAIT_LOG = WaitLog()
+
+
+def wait_until(condition, timeout=10.0, interval=0.05, max_interval=0.5, name="condition", wait_log=WAIT_LOG):
+    """Poll condition() until it returns True or timeout expires; return whether it became true.
+
+    The poll interval starts small and doubles up to max_interval, so fast conditions
+    return almost immediately while slow ones are not hammered.
+    """
+    start = time.monotonic()
+    ready = False
+    while True:
+        try:
+            ready = bool(condition())
+        except Exception:
+            ready = False
+        elapsed = time.monotonic() - start
+        if ready or elapsed >= timeout:
+            break
+        time.sleep(min(interval, timeout - elapsed))
+        interval = min(interval * 2, max_interval)
+
+    wait_log.record(name, elapsed, ready)
+    if not ready:
+        log.warning("Timed out after %.1fs waiting for %s", elapsed, name,
+                    extra={"fields": {"wait": name, "elapsed": elapsed}})
+    return ready
+
+
+def switches_connected(net):
+    """Every switch has a live connection to its controller."""
+    return lambda: all(switch.connected() for switch in net.switches)
+
+
+def port_listening(node, port):
+    """Something on node listens on TCP/UDP port (e.g. ITGRecv's signaling port)."""
+    return lambda: f":{port} " in node.cmd(f"ss -Hltun 'sport = :{port}'")
+
+
+def flows_visible(installer, flow_state, table_id="0"):
+    """Every flow recorded in flow_state shows up in the controller's operational datastore.
+
+    Nodes already seen complete are not queried again.
+    """
+    operational_url = installer.base_url.replace("/restconf/config/", "/restconf/operational/")
+    pending = {node_id: set(node_flows) for node_id, node_flows in flow_state.installed.items()}
+
+    def check():
+        for node_id in list(pending):
+            url = f"{operational_url}/{node_id}/flow-node-inventory:table/{table_id}"
+            response = installer.session.get(url, timeout=installer.timeout)
+            if response.status_code != 200:
+                return False
+            tables = response.json().get("flow-node-inventory:table", [])
+            seen = {flow["id"] for table in tables for flow in table.get("flow", [])}
+            pending[node_id] -= seen
+            if pending[node_id]:
+                return False
+            del pending[node_id]
+        return True
+    return check
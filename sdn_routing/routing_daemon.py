@@ -0,0 +1,137 @@
+import csv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sdn_routing.metrics import METRICS
+from sdn_routing.structured_log import get_logger
+from sdn_routing.trace import TraceRecorder
+
+TIMING_FIELDS = ["epoch", "started_at", "measure_wait", "estimate", "compute", "reconcile", "total",
+                 "links_updated", "flows_changed"]
+
+log = get_logger("routing_daemon")
+
+
+def add_daemon_arguments(parser):
+    """Command-line switches shared by the routing scripts that can run as a daemon."""
+    parser.add_argument("--daemon", action="store_true", help="route continuously in epochs instead of the two-iteration demo")
+    parser.add_argument("--period", type=float, default=30.0, help="seconds between epoch starts")
+    parser.add_argument("--epochs", type=int, default=None, help="stop after this many epochs (default: until Ctrl+C)")
+    parser.add_argument("--timings", default="epoch_timings.csv", help="CSV file for the per-epoch timings")
+    parser.add_argument("--record-trace", default=None, metavar="PATH",
+                        help="record every measurement and route decision to this trace (see Benchmarks/trace_replay.py)")
+
+
+class RoutingDaemon:
+    """Closed-loop routing over a CustomTopology: measure -> estimate -> compute routes -> reconcile flows.
+
+    measure() returns {(src, dst): delay}; estimate(measurements) turns that into
+    {(src, dst): link cost}. Measuring is the slow stage (seconds of D-ITG traffic),
+    so the next epoch's measurement runs in the background while the current epoch
+    estimates, routes and pushes flows. A new epoch starts every period seconds, or
+    as soon as its measurement is ready if that takes longer.
+
+    With trace_path (or a recorder object) every measurement and route decision is
+    recorded, so the run can later be replayed offline with trace.replay.
+    """
+
+    def __init__(self, topology, measure, estimate=None, period=30.0, timings_path="epoch_timings.csv",
+                 trace_path=None, recorder=None):
+        self.topology = topology
+        self.measure = measure
+        self.estimate = estimate or (lambda measurements: measurements)
+        self.period = period
+        self.timings_path = timings_path
+        self.recorder = recorder if recorder is not None else (TraceRecorder(trace_path) if trace_path else None)
+        self.timings = []
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self, epochs=None):
+        """Run epochs until stop() (or Ctrl+C), or until the given number of epochs is done."""
+        timings_file = open(self.timings_path, "w", newline="") if self.timings_path else None
+        writer = csv.DictWriter(timings_file, TIMING_FIELDS) if timings_file else None
+        if writer:
+            writer.writeheader()
+        if self.recorder:
+            self.recorder.start(self.topology, self.period)
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        pending = executor.submit(self.measure)
+        epoch = 0
+        try:
+            while not self.stop_event.is_set() and (epochs is None or epoch < epochs):
+                started_at = time.time()
+                start = time.perf_counter()
+                try:
+                    measurements = pending.result()
+                except Exception as e:
+                    log.error("Measurement for epoch %d failed: %s", epoch, e, extra={"fields": {"epoch": epoch}})
+                    measurements = {}
+                measure_wait = time.perf_counter() - start
+                if self.recorder:
+                    self.recorder.measurements(epoch, measurements)
+
+                # The next epoch's measurement overlaps with this epoch's routing work
+                last = epochs is not None and epoch + 1 >= epochs
+                pending = None if last else executor.submit(self.measure)
+
+                timing = {"epoch": epoch, "started_at": started_at, "measure_wait": measure_wait}
+                timing.update(self.run_epoch(measurements))
+                timing["total"] = time.perf_counter() - start
+                epoch += 1
+
+                self.timings.append(timing)
+                for stage in ("measure_wait", "estimate", "compute", "reconcile", "total"):
+                    METRICS.observe("epoch_stage_seconds", timing[stage], stage=stage)
+                METRICS.inc("epoch_flows_changed_total", timing["flows_changed"])
+                if writer:
+                    writer.writerow(timing)
+                    timings_file.flush()
+                log.info("Epoch %d: measure wait %.3fs  estimate %.3fs  compute %.3fs  reconcile %.3fs  total %.3fs  "
+                         "%d links updated, %d flows changed", timing["epoch"], timing["measure_wait"],
+                         timing["estimate"], timing["compute"], timing["reconcile"], timing["total"],
+                         timing["links_updated"], timing["flows_changed"], extra={"fields": timing})
+
+                if not last:
+                    self.stop_event.wait(max(0.0, timing["started_at"] + self.period - time.time()))
+        except KeyboardInterrupt:
+            log.info("Routing daemon interrupted")
+        finally:
+            self.stop_event.set()
+            executor.shutdown(wait=True)
+            if timings_file:
+                timings_file.close()
+            if self.recorder:
+                self.recorder.close()
+        return self.timings
+
+    def run_epoch(self, measurements):
+        """Estimate, route and reconcile one epoch's measurements; returns the stage timings."""
+        topology = self.topology
+        start = time.perf_counter()
+
+        costs = self.estimate(measurements)
+        updated = 0
+        for (src, dst), cost in costs.items():
+            if cost is None or topology.cost_matrix[src - 1][dst - 1] == cost:
+                continue
+            topology.update_link_cost(f"s{src}", f"s{dst}", cost)
+            updated += 1
+        estimated = time.perf_counter()
+
+        route = topology.route_all_pairs(bulk=True)
+        flows_changed = len(route.diff.add) + len(route.diff.modify) + len(route.diff.delete)
+        if self.recorder:
+            self.recorder.routes(costs, topology.predecessors, flows_changed)
+
+        return {
+            "estimate": estimated - start,
+            "compute": route.compute,
+            "reconcile": route.reconcile,
+            "links_updated": updated,
+            "flows_changed": flows_changed,
+        }
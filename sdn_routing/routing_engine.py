@@ -0,0 +1,180 @@
+import heapq
+import math
+
+import networkx as nx
+
+
+class ShortestPathTree:
+    """Distances, predecessors and children of one single-source shortest-path tree."""
+
+    def __init__(self, source):
+        self.source = source
+        self.dist = {source: 0.0}
+        self.pred = {source: None}
+        self.children = {source: set()}
+
+    def set_parent(self, node, parent):
+        """Re-hang a node below a new parent, keeping the children index in sync."""
+        old_parent = self.pred.get(node)
+        if old_parent is not None:
+            self.children[old_parent].discard(node)
+        self.pred[node] = parent
+        self.children.setdefault(node, set())
+        if parent is not None:
+            self.children.setdefault(parent, set()).add(node)
+
+    def subtree(self, root):
+        """Return every node whose tree path from the source passes through root."""
+        nodes = [root]
+        stack = [root]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                nodes.append(child)
+                stack.append(child)
+        return nodes
+
+    def path_to(self, target):
+        """Walk the predecessors back from target to the source."""
+        if self.dist.get(target, math.inf) == math.inf:
+            raise nx.NetworkXNoPath(f"No path between {self.source} and {target}.")
+        path = [target]
+        while path[-1] != self.source:
+            path.append(self.pred[path[-1]])
+        path.reverse()
+        return path
+
+
+class RoutingEngine:
+    """Persistent switch graph with incrementally repaired shortest-path trees.
+
+    The graph is built once from the cost matrix (index i is switch s{i+1}).
+    A shortest-path tree is computed the first time a source is queried and
+    kept in memory; link weight changes only repair the trees they affect.
+    """
+
+    def __init__(self, cost_matrix=None):
+        self.graph = nx.Graph()
+        self.trees = {}
+        self.cost_matrix = None
+        if cost_matrix is not None:
+            self.load_cost_matrix(cost_matrix)
+
+    def load_cost_matrix(self, cost_matrix):
+        """(Re)build the graph from a full cost matrix and drop every cached tree."""
+        self.graph.clear()
+        self.trees.clear()
+        self.cost_matrix = cost_matrix
+        num_nodes = len(cost_matrix)
+
+        for i in range(num_nodes):
+            self.graph.add_node(f's{i+1}')
+        for i in range(num_nodes):
+            for j in range(i + 1, num_nodes):
+                weight = max(cost_matrix[i][j], cost_matrix[j][i])
+                if weight > 0:  # Add edge only if cost is greater than 0
+                    self.graph.add_edge(f's{i+1}', f's{j+1}', weight=weight)
+
+    def sync(self, cost_matrix):
+        """Reload only when the topology handed us a different cost matrix object."""
+        if cost_matrix is not self.cost_matrix:
+            self.load_cost_matrix(cost_matrix)
+
+    def tree(self, source):
+        """Return the cached shortest-path tree for source, computing it on first use."""
+        if source not in self.trees:
+            if source not in self.graph:
+                raise nx.NodeNotFound(f"Source {source} is not in the graph.")
+            tree = ShortestPathTree(source)
+            self._dijkstra(tree, [(0.0, source, None)])
+            self.trees[source] = tree
+        return self.trees[source]
+
+    def shortest_path(self, source, target):
+        """Return (path, length) from source to target; raises NetworkXNoPath."""
+        if target not in self.graph:
+            raise nx.NodeNotFound(f"Target {target} is not in the graph.")
+        tree = self.tree(source)
+        return tree.path_to(target), tree.dist[target]
+
+    def update_link(self, node1, node2, weight):
+        """Change the weight of link node1-node2 and repair the affected trees.
+
+        A weight <= 0 removes the link, matching the cost matrix convention.
+        Returns the number of cached trees that actually changed.
+        """
+        old_weight = self.graph[node1][node2]['weight'] if self.graph.has_edge(node1, node2) else None
+        new_weight = weight if weight > 0 else None
+        if old_weight == new_weight:
+            return 0
+
+        if new_weight is None:
+            self.graph.remove_edge(node1, node2)
+        else:
+            self.graph.add_edge(node1, node2, weight=new_weight)
+
+        repaired = 0
+        for tree in self.trees.values():
+            if old_weight is not None and (new_weight is None or new_weight > old_weight):
+                changed = self._repair_increase(tree, node1, node2)
+            else:
+                changed = self._repair_decrease(tree, node1, node2, new_weight)
+            repaired += changed
+        return repaired
+
+    def _dijkstra(self, tree, heap):
+        """Settle nodes from the (distance, node, parent) heap, only ever lowering distances."""
+        dist = tree.dist
+        heapq.heapify(heap)
+        changed = False
+        while heap:
+            d, node, parent = heapq.heappop(heap)
+            if parent is not None:
+                if d >= dist.get(node, math.inf):
+                    continue
+                dist[node] = d
+                tree.set_parent(node, parent)
+                changed = True
+            elif d > dist.get(node, math.inf):
+                continue
+            for neighbour, attrs in self.graph[node].items():
+                candidate = d + attrs['weight']
+                if candidate < dist.get(neighbour, math.inf):
+                    heapq.heappush(heap, (candidate, neighbour, node))
+        return changed
+
+    def _repair_decrease(self, tree, node1, node2, weight):
+        """A cheaper (or new) link can only pull nodes towards its far endpoint."""
+        dist = tree.dist
+        heap = []
+        for near, far in ((node1, node2), (node2, node1)):
+            candidate = dist.get(near, math.inf) + weight
+            if candidate < dist.get(far, math.inf):
+                heap.append((candidate, far, near))
+        if not heap:
+            return False
+        return self._dijkstra(tree, heap)
+
+    def _repair_increase(self, tree, node1, node2):
+        """A dearer (or removed) link only matters if it is a tree edge; re-settle its subtree."""
+        if tree.pred.get(node2) == node1:
+            root = node2
+        elif tree.pred.get(node1) == node2:
+            root = node1
+        else:
+            return False
+
+        dist = tree.dist
+        affected = tree.subtree(root)
+        affected_set = set(affected)
+        for node in affected:
+            dist[node] = math.inf
+            tree.set_parent(node, None)
+
+        # Seed each detached node with its best link back into the intact part of the tree
+        heap = []
+        for node in affected:
+            for neighbour, attrs in self.graph[node].items():
+                if neighbour not in affected_set and dist.get(neighbour, math.inf) < math.inf:
+                    heap.append((dist[neighbour] + attrs['weight'], node, neighbour))
+        self._dijkstra(tree, heap)
+        return True
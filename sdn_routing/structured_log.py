@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+FLOW_LOGGER = "sdn_routing.flows"  # per-flow events, sampled
+
+
+def get_logger(name):
+    return logging.getLogger(name if name.startswith("sdn_routing") else f"sdn_routing.{name}")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg, plus the fields passed as extra={"fields": {...}}."""
+
+    def format(self, record):
+        entry = {"ts": round(record.created, 6), "level": record.levelname, "logger": record.name,
+                 "msg": record.getMessage()}
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Let one record in every through; the ones passed say how many were skipped before them."""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, int(every))
+        self.seen = 0
+
+    def filter(self, record):
+        self.seen += 1
+        if (self.seen - 1) % self.every:
+            return False
+        if self.every > 1:
+            record.fields = dict(getattr(record, "fields", None) or {}, sampled_1_in=self.every)
+        return True
+
+
+class MatrixText:
+    """Formats a labelled matrix only if a handler actually emits the record (lazy %s argument)."""
+
+    def __init__(self, matrix, labels=None):
+        self.matrix = matrix
+        self.labels = labels
+
+    def __str__(self):
+        labels = self.labels or [f"s{i + 1}" for i in range(len(self.matrix))]
+        lines = [" " * 10 + "  ".join(f"{label:10}" for label in labels)]
+        lines.extend(f"{labels[i]:10}" + "  ".join(f"{value:10}" for value in row) for i, row in enumerate(self.matrix))
+        return "\n".join(lines)
+
+
+class MatrixDumper:
+    """Opt-in binary dumps: each call writes directory/{name}_{n:06d}.npy, nothing when directory is None."""
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.counts = {}
+
+    def dump(self, name, matrix):
+        if self.directory is None:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        count = self.counts[name] = self.counts.get(name, -1) + 1
+        path = os.path.join(self.directory, f"{name}_{count:06d}.npy")
+        np.save(path, np.asarray(matrix, dtype=np.float64))
+        return path
+
+
+MATRIX_DUMPS = MatrixDumper()
+
+
+def dump_matrix(name, matrix):
+    return MATRIX_DUMPS.dump(name, matrix)
+
+
+def add_logging_arguments(parser):
+    parser.add_argument("--log-level", default="INFO", choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+                        help="DEBUG also prints the full matrices and every path")
+    parser.add_argument("--log-json", action="store_true", help="JSON lines on stderr instead of plain messages")
+    parser.add_argument("--log-file", default=None, help="also append JSON lines to this file")
+    parser.add_argument("--flow-log-sample", type=int, default=100,
+                        help="log one in this many per-flow events (failures are always logged)")
+    parser.add_argument("--dump-matrices", default=None, metavar="DIR",
+                        help="save every adjacency/cost matrix as .npy files in DIR")
+
+
+def configure_logging(level="INFO", json_stream=False, log_file=None, flow_sample=100, dump_dir=None):
+    """Set up the sdn_routing loggers; the arguments mirror add_logging_arguments."""
+    root = logging.getLogger("sdn_routing")
+    root.setLevel(level)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(JsonLinesFormatter() if json_stream else logging.Formatter("%(message)s"))
+    root.addHandler(console)
+    if log_file:
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(JsonLinesFormatter())
+        root.addHandler(file_handler)
+
+    flows = logging.getLogger(FLOW_LOGGER)
+    for existing in list(flows.filters):
+        flows.removeFilter(existing)
+    flows.addFilter(SamplingFilter(flow_sample))
+    MATRIX_DUMPS.directory = dump_dir
+    MATRIX_DUMPS.counts.clear()
+
+
+def start_logging(args):
+    """Configure logging from the options added by add_logging_arguments."""
+    configure_logging(args.log_level, args.log_json, args.log_file, args.flow_log_sample, args.dump_matrices)
+
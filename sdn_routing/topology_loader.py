@@ -0,0 +1,211 @@
+import json
+import math
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from sdn_routing.port_map import PortMap
+
+TOPOLOGY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "topologies")
+CACHE_SUFFIX = ".cache.npz"
+DEFAULT_DELAY_MS = 0.2
+PROPAGATION_KM_PER_MS = 200.0  # light in fibre, ~2/3 c
+
+
+def host_ip(host_no):
+    """10.0.0.0/8 address of host host_no: h1..h254 keep 10.0.0.x, larger topologies carry into the next octets.
+
+    10.255.0.0/16 is left to the probe addresses (probe_scheduler.probe_address).
+    """
+    if not 0 < host_no < 255 << 16:
+        raise ValueError(f"host number {host_no} does not fit in 10.0.0.0/8 below the probe range")
+    return f"10.{(host_no >> 16) & 0xff}.{(host_no >> 8) & 0xff}.{host_no & 0xff}"
+
+
+class Topology:
+    """A switch topology as compact arrays: switch i is s{i}, with host h{i} attached to it.
+
+    links[k] = (src, dst) switch numbers (1-based), delays[k] its one-way delay in ms.
+    The port map and the sparse adjacency are derived once and kept on the object.
+    """
+
+    def __init__(self, name, links, delays=None, labels=None):
+        self.name = name
+        self.links = np.asarray(links, dtype=np.int32).reshape(-1, 2)
+        self.delays = (np.full(len(self.links), DEFAULT_DELAY_MS) if delays is None
+                       else np.asarray(delays, dtype=np.float64))
+        if labels is None:
+            labels = [f"s{i + 1}" for i in range(int(self.links.max()) if len(self.links) else 0)]
+        self.labels = list(labels)
+        self.num_switches = len(self.labels)  # switches without links still get a host
+        self._port_map = None
+        self._adjacency = None
+
+    def __len__(self):
+        return self.num_switches
+
+    def link_list(self):
+        """[(src, dst), ...] in file order, the order the scripts add links to Mininet."""
+        return [tuple(link) for link in self.links.tolist()]
+
+    def host_ip(self, host_no):
+        return host_ip(host_no)
+
+    def host_cidr(self, host_no):
+        """Host interface address; one /8 keeps every host in the same subnet however many there are."""
+        return f"{host_ip(host_no)}/8"
+
+    def host_prefix(self, host_no):
+        """Match of the flows towards host host_no."""
+        return f"{host_ip(host_no)}/32"
+
+    @property
+    def port_map(self):
+        """Ports Mininet will assign: each switch numbers its ports from 1 in addLink order,
+        switch-to-switch links first, then its host link (see add_to_mininet)."""
+        if self._port_map is None:
+            port_map = PortMap(self.num_switches)
+            next_port = np.ones(self.num_switches + 1, dtype=np.int64)
+            for src, dst in self.links.tolist():
+                port_map.add_link(src, dst, next_port[src], next_port[dst])
+                next_port[src] += 1
+                next_port[dst] += 1
+            self._port_map = port_map
+        return self._port_map
+
+    @property
+    def adjacency(self):
+        """Symmetric sparse matrix of link delays (ms)."""
+        if self._adjacency is None:
+            low, high, delays = self._unique_links(self.delays)
+            rows, cols = np.concatenate([low, high]), np.concatenate([high, low])
+            self._adjacency = csr_matrix((np.concatenate([delays, delays]), (rows, cols)),
+                                         shape=(self.num_switches, self.num_switches))
+        return self._adjacency
+
+    def _unique_links(self, delays):
+        """0-based (low, high, delay) per switch pair; a link listed twice (Abilene has 2-9 and 9-2)
+        keeps its last delay, as repeated cost updates in the scripts do."""
+        low, high = self.links.min(axis=1), self.links.max(axis=1)
+        _, last = np.unique((low * (self.num_switches + 1) + high)[::-1], return_index=True)
+        keep = len(self.links) - 1 - last
+        return low[keep] - 1, high[keep] - 1, np.asarray(delays, dtype=np.float64)[keep]
+
+    def cost_matrix(self, delays=None):
+        """Dense list-of-lists cost matrix, as the routing scripts keep it."""
+        low, high, values = self._unique_links(self.delays if delays is None else delays)
+        matrix = np.zeros((self.num_switches, self.num_switches))
+        matrix[low, high] = values
+        matrix[high, low] = values
+        return matrix.tolist()
+
+    def add_to_mininet(self, net, delays=None, bw=10, protocols='OpenFlow13'):
+        """Add s1..sN, h1..hN and all links to net; delays (ms, one per link) default to the file's.
+
+        Returns (switches, hosts) dicts keyed by number.
+        """
+        delays = self.delays if delays is None else delays
+        switches = {i: net.addSwitch(f's{i}', protocols=protocols) for i in range(1, self.num_switches + 1)}
+        hosts = {i: net.addHost(f'h{i}', ip=self.host_cidr(i)) for i in range(1, self.num_switches + 1)}
+        for (src, dst), delay in zip(self.link_list(), delays):
+            net.addLink(switches[src], switches[dst], bw=bw, delay=f'{delay}ms')
+        for i in range(1, self.num_switches + 1):
+            net.addLink(hosts[i], switches[i])
+        return switches, hosts
+
+    # -- file formats ----------------------------------------------------------------------
+
+    @classmethod
+    def from_json(cls, path):
+        """{"name": ..., "nodes": [{"id": ..., "label": ...}], "links": [{"source": ..., "target": ..., "delay_ms": ...}]}
+
+        Node ids may be anything; they are numbered 1..N in the order of "nodes".
+        """
+        with open(path) as fd:
+            data = json.load(fd)
+        nodes = data.get("nodes") or _nodes_in_links(data["links"])
+        numbers = {node["id"]: i + 1 for i, node in enumerate(nodes)}
+        links = [(numbers[link["source"]], numbers[link["target"]]) for link in data["links"]]
+        delays = [link.get("delay_ms", DEFAULT_DELAY_MS) for link in data["links"]]
+        labels = [str(node.get("label", node["id"])) for node in nodes]
+        return cls(data.get("name", os.path.splitext(os.path.basename(path))[0]), links, delays, labels)
+
+    @classmethod
+    def from_graphml(cls, path, default_delay_ms=DEFAULT_DELAY_MS):
+        """Topology Zoo GraphML; link delays follow from node coordinates when they are given."""
+        import networkx as nx
+
+        graph = nx.read_graphml(path)
+        nodes = list(graph.nodes)
+        numbers = {node: i + 1 for i, node in enumerate(nodes)}
+        links, delays, seen = [], [], set()
+        for u, v in graph.edges():
+            key = frozenset((u, v))
+            if u == v or key in seen:
+                continue  # parallel edges and self loops are one switch link or none
+            seen.add(key)
+            links.append((numbers[u], numbers[v]))
+            delays.append(_geo_delay(graph.nodes[u], graph.nodes[v], default_delay_ms))
+        labels = [str(graph.nodes[node].get("label", graph.nodes[node].get("Label", node))) for node in nodes]
+        return cls(graph.graph.get("Network", os.path.splitext(os.path.basename(path))[0]), links, delays, labels)
+
+    def save_cache(self, path, stamp):
+        np.savez(path, links=self.links, delays=self.delays, labels=np.array(self.labels),
+                 name=np.array(self.name), stamp=np.array(json.dumps(stamp)))
+
+    @classmethod
+    def load_cache(cls, path, stamp):
+        with np.load(path) as data:
+            if str(data["stamp"]) != json.dumps(stamp):
+                return None
+            return cls(str(data["name"]), data["links"], data["delays"], data["labels"].tolist())
+
+
+def load_topology(path, cache=True):
+    """Load a .json or .graphml topology (a bare name is looked up in topologies/).
+
+    The parsed arrays are cached next to the file and reused until the file changes.
+    """
+    if not os.path.exists(path) and os.path.exists(os.path.join(TOPOLOGY_DIR, path)):
+        path = os.path.join(TOPOLOGY_DIR, path)
+    stat = os.stat(path)
+    stamp = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    cache_path = path + CACHE_SUFFIX
+    if cache and os.path.exists(cache_path):
+        topology = Topology.load_cache(cache_path, stamp)
+        if topology is not None:
+            return topology
+
+    if path.endswith(".graphml"):
+        topology = Topology.from_graphml(path)
+    else:
+        topology = Topology.from_json(path)
+    if cache:
+        topology.save_cache(cache_path, stamp)
+    return topology
+
+
+def add_topology_argument(parser, default):
+    parser.add_argument("--topology", default=default,
+                        help=f"topology file (.json or Topology Zoo .graphml, default {default})")
+
+
+def _nodes_in_links(links):
+    seen = {}
+    for link in links:
+        for end in (link["source"], link["target"]):
+            seen.setdefault(end, {"id": end})
+    return list(seen.values())
+
+
+def _geo_delay(a, b, default_delay_ms):
+    try:
+        lat1, lon1, lat2, lon2 = (math.radians(float(value)) for value in
+                                  (a["Latitude"], a["Longitude"], b["Latitude"], b["Longitude"]))
+    except (KeyError, ValueError):
+        return default_delay_ms
+    # Great-circle distance (haversine)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    distance_km = 2 * 6371.0 * math.asin(math.sqrt(h))
+    return max(distance_km / PROPAGATION_KM_PER_MS, 0.001)
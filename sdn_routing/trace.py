@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+
+import numpy as np
+
+from sdn_routing.topology_loader import Topology
+
+TRACE_VERSION = 1
+
+
+def _pairs(values):
+    """{(src, dst): value} -> [[src, dst, value], ...] for JSON."""
+    return [[int(src), int(dst), None if value is None else float(value)] for (src, dst), value in values.items()]
+
+
+def _unpairs(rows):
+    return {(src, dst): value for src, dst, value in rows}
+
+
+class TraceRecorder:
+    """Records a RoutingDaemon run as JSON lines: a header with the topology and starting cost
+    matrix, then per epoch the link measurements and the route decision that followed.
+
+    Route decisions are the costs the estimator produced and the all-pairs predecessor
+    matrix, so a replay can check every path, not just the one that was pinged.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = open(path, "w")
+        self.lock = threading.Lock()
+        self.epoch = None
+        self.started = None
+
+    def _write(self, entry):
+        with self.lock:
+            self.fd.write(json.dumps(entry) + "\n")
+            self.fd.flush()
+
+    def start(self, topology, period):
+        spec = topology.spec
+        self.started = time.time()
+        self._write({"type": "header", "version": TRACE_VERSION, "started_at": self.started, "period": period,
+                     "topology": spec.name, "links": spec.link_list(), "delays_ms": spec.delays.tolist(),
+                     "labels": spec.labels, "cost_matrix": np.asarray(topology.cost_matrix, dtype=float).tolist()})
+
+    def measurements(self, epoch, measurements):
+        self.epoch = epoch
+        self._write({"type": "measure", "epoch": epoch, "t": time.time() - self.started,
+                     "delays": _pairs(measurements)})
+
+    def routes(self, costs, predecessors, flows_changed):
+        self._write({"type": "routes", "epoch": self.epoch, "t": time.time() - self.started, "costs": _pairs(costs),
+                     "predecessors": np.asarray(predecessors).tolist(), "flows_changed": flows_changed})
+
+    def close(self):
+        self.fd.close()
+
+
+class Trace:
+    """A recorded run loaded back: header fields plus one (measurements, routes) entry per epoch."""
+
+    def __init__(self, header, epochs):
+        self.header = header
+        self.epochs = epochs  # [{"measurements": {...}, "costs": {...}, "predecessors": array, "flows_changed": n}]
+
+    @classmethod
+    def load(cls, path):
+        header, epochs = None, {}
+        with open(path) as fd:
+            for line in fd:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["type"] == "header":
+                    header = entry
+                elif entry["type"] == "measure":
+                    epochs.setdefault(entry["epoch"], {})["measurements"] = _unpairs(entry["delays"])
+                elif entry["type"] == "routes":
+                    epochs.setdefault(entry["epoch"], {}).update(
+                        costs=_unpairs(entry["costs"]), predecessors=np.asarray(entry["predecessors"]),
+                        flows_changed=entry["flows_changed"])
+        if header is None:
+            raise ValueError(f"{path} has no trace header")
+        # An interrupted run can leave a measurement without its routes; keep only complete epochs
+        complete = [epochs[epoch] for epoch in sorted(epochs) if "predecessors" in epochs[epoch]]
+        return cls(header, complete)
+
+    def __len__(self):
+        return len(self.epochs)
+
+    @property
+    def period(self):
+        return self.header["period"]
+
+    def topology(self):
+        header = self.header
+        return Topology(header["topology"], header["links"], header["delays_ms"], header["labels"])
+
+    def measure(self):
+        """measure() for RoutingDaemon: each call returns the next epoch's recorded measurements."""
+        epochs = iter(self.epochs)
+        lock = threading.Lock()
+
+        def measure():
+            with lock:
+                return dict(next(epochs)["measurements"])
+        return measure
+
+    def recorded_costs(self):
+        """estimate() for RoutingDaemon that returns the costs the live run estimated, epoch by epoch."""
+        epochs = iter(self.epochs)
+        return lambda measurements: dict(next(epochs)["costs"])
+
+
+class TraceVerifier:
+    """Stands in for a TraceRecorder during replay and compares each route decision with the recorded one."""
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.epoch = None
+        self.mismatches = []  # (epoch, pairs routed differently, flows changed live, flows changed now)
+
+    def start(self, topology, period):
+        pass
+
+    def measurements(self, epoch, measurements):
+        self.epoch = epoch
+
+    def routes(self, costs, predecessors, flows_changed):
+        recorded = self.trace.epochs[self.epoch]
+        differing = int(np.count_nonzero(np.asarray(predecessors) != recorded["predecessors"]))
+        if differing or flows_changed != recorded["flows_changed"]:
+            self.mismatches.append((self.epoch, differing, recorded["flows_changed"], flows_changed))
+
+    def close(self):
+        pass
+
+
+def replay(trace, estimate=None, speed=0.0):
+    """Run the recorded epochs through RoutingDaemon on a SimTopology: no Mininet, D-ITG or ODL.
+
+    estimate defaults to the recorded costs, which replays the route decisions exactly; pass
+    another estimator (e.g. forecast_estimator) to see how it would have routed the same
+    measurements. speed is a multiple of the recorded period; 0 runs the epochs back to back.
+    Returns (timings, verifier).
+    """
+    from sdn_routing.netsim import SimTopology
+    from sdn_routing.routing_daemon import RoutingDaemon
+
+    topology = SimTopology(trace.topology())
+    topology.build_topology()
+    topology.read_mininet_topology()
+    topology.cost_matrix = [list(row) for row in trace.header["cost_matrix"]]
+    verifier = TraceVerifier(trace)
+    daemon = RoutingDaemon(topology, trace.measure(), estimate=estimate or trace.recorded_costs(),
+                           period=trace.period / speed if speed else 0.0, timings_path=None, recorder=verifier)
+    timings = daemon.run(epochs=len(trace))
+    return timings, verifier
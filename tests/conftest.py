@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sdn_routing.netsim import SimTopology  # noqa: E402
+from sdn_routing.topology_loader import load_topology  # noqa: E402
+
+
+@pytest.fixture
+def abilene():
+    return load_topology("abilene.json", cache=False)
+
+
+@pytest.fixture
+def sim_topology(abilene):
+    """Abilene on the simulator, set up the way the scripts' main() does before routing."""
+    topology = SimTopology(abilene)
+    topology.build_topology()
+    topology.read_mininet_topology()
+    topology.cost_matrix = topology.print_adjacency_matrix()
+    return topology
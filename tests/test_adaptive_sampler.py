@@ -0,0 +1,69 @@
+import numpy as np
+
+from sdn_routing.adaptive_sampler import AdaptiveSampler
+
+LINKS = [(1, 2), (2, 3), (3, 4), (4, 5)]
+
+
+def run(sampler, delay, rounds):
+    """Drive sampler for up to rounds rounds with delay(link, round); return the probe count of each link."""
+    probes = dict.fromkeys(sampler.links, 0)
+    for i in range(rounds):
+        due = sampler.select()
+        for link in due:
+            probes[link] += 1
+        sampler.update({link: delay(link, i) for link in due})
+        if sampler.converged():
+            break
+    return probes
+
+
+def test_every_link_is_probed_until_min_samples():
+    sampler = AdaptiveSampler(LINKS, min_samples=3)
+    for _ in range(3):
+        assert sampler.select() == LINKS
+        sampler.update({link: 0.1 for link in LINKS})
+
+
+def test_stable_links_converge_with_fewer_probes():
+    rng = np.random.default_rng(1)
+    sampler = AdaptiveSampler(LINKS, target_error=0.02, min_samples=5, max_gap=10)
+    run(sampler, lambda link, i: rng.normal(0.1, 0.002), 100)
+    assert sampler.converged()
+    assert sampler.probes < 100 * len(LINKS)
+    assert np.allclose(sampler.mean, 0.1, rtol=0.02)
+
+
+def test_noisy_link_gets_more_probes():
+    rng = np.random.default_rng(2)
+    sampler = AdaptiveSampler(LINKS, target_error=0.02, min_samples=5, max_gap=50)
+
+    def delay(link, i):
+        return rng.normal(0.1, 0.03 if link == (3, 4) else 0.001)
+
+    probes = run(sampler, delay, 60)
+    assert probes[(3, 4)] == max(probes.values())
+    assert probes[(3, 4)] > 2 * probes[(1, 2)]
+
+
+def test_trend_makes_a_settled_link_due():
+    sampler = AdaptiveSampler([(1, 2)], target_error=0.05, min_samples=5, max_gap=100)
+    rng = np.random.default_rng(3)
+    for _ in range(100):
+        sampler.update({(1, 2): rng.normal(0.1, 0.001)})
+    assert sampler.select() == []
+    # The delay steps up by 5 %: the moving average leaves the long-run mean behind
+    for _ in range(3):
+        sampler.update({(1, 2): 0.105})
+    assert sampler.trend()[0] > sampler.trend_z
+    assert sampler.select() == [(1, 2)]
+
+
+def test_max_gap_revisits_stable_links():
+    sampler = AdaptiveSampler([(1, 2)], min_samples=2, max_gap=3)
+    for _ in range(5):
+        sampler.update({(1, 2): 0.1})
+    assert sampler.select() == []
+    for _ in range(3):
+        sampler.update({})
+    assert sampler.select() == [(1, 2)]
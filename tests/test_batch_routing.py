@@ -0,0 +1,86 @@
+import math
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from sdn_routing.batch_routing import (all_pairs_shortest_paths, iter_paths, next_hop_matrix, pair_path,
+                                       path_from_predecessors)
+
+
+def cost_graph(cost_matrix):
+    graph = nx.Graph()
+    graph.add_nodes_from(f"s{i + 1}" for i in range(len(cost_matrix)))
+    for i, row in enumerate(cost_matrix):
+        for j, cost in enumerate(row):
+            if cost > 0:
+                graph.add_edge(f"s{i + 1}", f"s{j + 1}", weight=cost)
+    return graph
+
+
+def test_all_pairs_match_networkx(abilene):
+    cost_matrix = abilene.cost_matrix()
+    distances, predecessors = all_pairs_shortest_paths(cost_matrix)
+    graph = cost_graph(cost_matrix)
+    expected = dict(nx.all_pairs_dijkstra_path_length(graph))
+    for i in range(len(cost_matrix)):
+        for j in range(len(cost_matrix)):
+            source, target = f"s{i + 1}", f"s{j + 1}"
+            assert distances[i, j] == pytest.approx(expected[source][target])
+            path = path_from_predecessors(predecessors, source, target)
+            assert path[0] == source and path[-1] == target
+            assert nx.path_weight(graph, path, "weight") == pytest.approx(expected[source][target])
+
+
+def test_unreachable_pairs():
+    # s1 - s2 and s3 on its own
+    distances, predecessors = all_pairs_shortest_paths([[0, 1, 0], [1, 0, 0], [0, 0, 0]])
+    assert math.isinf(distances[0, 2])
+    assert path_from_predecessors(predecessors, "s1", "s3") == []
+    assert sorted((source, target) for source, target, _ in iter_paths(predecessors)) == [("s1", "s2"), ("s2", "s1")]
+
+
+def test_next_hops_follow_the_paths(abilene):
+    _, predecessors = all_pairs_shortest_paths(abilene.cost_matrix())
+    next_hops = next_hop_matrix(predecessors)
+    for source, target, path in iter_paths(predecessors):
+        assert next_hops[int(source[1:]) - 1, int(target[1:]) - 1] == int(path[1][1:]) - 1
+
+
+def test_route_all_pairs_installs_every_pair(sim_topology):
+    num_switches = len(sim_topology.spec)
+    route = sim_topology.route_all_pairs()
+    hops = sum(len(path) - 1 for _, _, path in iter_paths(sim_topology.predecessors))
+    assert len(route.diff.add) == hops
+    assert sim_topology.flow_state.flow_count() == hops
+    assert sum(len(switch.flows) for switch in sim_topology.net.switches) == hops
+    assert len(list(iter_paths(sim_topology.predecessors))) == num_switches * (num_switches - 1)
+
+    # Nothing changed, nothing to push
+    route = sim_topology.route_all_pairs()
+    assert route.diff == ([], [], [])
+
+    average, loss = sim_topology.pingDevice("h3", "h6", count=3)
+    assert loss == 0 and average > 0
+
+
+def test_pair_path_matches_the_engine(sim_topology):
+    sim_topology.route_all_pairs()
+    path, cost = pair_path(sim_topology, "s3", "s6")
+    sim_topology.engine.sync(sim_topology.cost_matrix)
+    _, engine_cost = sim_topology.engine.shortest_path("s3", "s6")
+    assert path[0] == "s3" and path[-1] == "s6"
+    assert cost == pytest.approx(engine_cost)
+    assert nx.path_weight(sim_topology.engine.graph, path, "weight") == pytest.approx(engine_cost)
+
+
+def test_all_pairs_mode_reroutes_on_cost_change(sim_topology):
+    sim_topology.all_pairs = True
+    sim_topology.find_shortest_path_from_matrix("s3", "s6")
+    first = list(sim_topology.route)
+    # Make the first hop of the current route far too expensive
+    sim_topology.update_link_cost(first[0], first[1], 1e6)
+    sim_topology.find_shortest_path_from_matrix("s3", "s6")
+    assert sim_topology.route != first
+    assert (first[0], first[1]) not in zip(sim_topology.route, sim_topology.route[1:])
+    assert np.isfinite(sim_topology.distances).all()
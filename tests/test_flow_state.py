@@ -0,0 +1,60 @@
+import networkx as nx
+import pytest
+
+from sdn_routing.flow_installer import build_flow
+from sdn_routing.flow_state import FlowStateCache, reconcile
+
+
+def two_paths(topology, source, target):
+    """Two different loop-free switch paths from source to target."""
+    paths = nx.all_simple_paths(topology.graph, source, target)
+    return next(paths), next(paths)
+
+
+def table_ids(topology):
+    return {switch.name: set(switch.flows) for switch in topology.net.switches if switch.flows}
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_reconcile_pushes_only_the_delta(sim_topology, bulk):
+    installer = sim_topology.flow_installer
+    cache = FlowStateCache()
+    # Another application's flow, unknown to the cache
+    installer.put_flow("openflow:1", "other_app", build_flow("other_app", "10.0.0.9/32", 1))
+
+    first, second = two_paths(sim_topology, "s3", "s6")
+    diff, _ = reconcile(installer, cache, sim_topology.build_flow_rules("s3", "s6", first),
+                        prefix="flow_s3_s6_", bulk=bulk)
+    assert len(diff.add) == len(first) - 1 and not diff.modify and not diff.delete
+
+    diff, _ = reconcile(installer, cache, sim_topology.build_flow_rules("s3", "s6", first),
+                        prefix="flow_s3_s6_", bulk=bulk)
+    assert diff == ([], [], [])
+
+    wanted = sim_topology.build_flow_rules("s3", "s6", second)
+    diff, _ = reconcile(installer, cache, wanted, prefix="flow_s3_s6_", bulk=bulk)
+    kept = {(node_id, flow_id) for node_id, flow_id, _ in wanted}
+    assert all(flow not in kept for flow in diff.delete)
+
+    # The switches hold exactly the new route plus the foreign flow
+    expected = {}
+    for node_id, flow_id, _ in wanted:
+        expected.setdefault(f"s{node_id.split(':')[1]}", set()).add(flow_id)
+    expected.setdefault("s1", set()).add("other_app")
+    assert table_ids(sim_topology) == expected
+    assert cache.flow_count() == len(wanted)
+
+
+def test_prefix_limits_deletes_to_one_pair(sim_topology):
+    installer = sim_topology.flow_installer
+    cache = FlowStateCache()
+    path_36, _ = two_paths(sim_topology, "s3", "s6")
+    path_14, _ = two_paths(sim_topology, "s1", "s4")
+    reconcile(installer, cache, sim_topology.build_flow_rules("s3", "s6", path_36), prefix="flow_s3_s6_")
+    reconcile(installer, cache, sim_topology.build_flow_rules("s1", "s4", path_14), prefix="flow_s1_s4_")
+
+    # Re-routing s1 -> s4 must not delete s3 -> s6's flows
+    diff, _ = reconcile(installer, cache, [], prefix="flow_s1_s4_")
+    assert len(diff.delete) == len(path_14) - 1
+    assert all(flow_id.startswith("flow_s1_s4_") for _, flow_id in diff.delete)
+    assert cache.flow_count() == len(path_36) - 1
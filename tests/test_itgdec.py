@@ -0,0 +1,70 @@
+import math
+
+from sdn_routing.itgdec import iter_summaries, parse_summary, summaries_to_array
+
+ITGDEC_OUTPUT = """\
+ITGDec version 2.8.1 (r1023)
+Compile-time options: sctp dccp bursty multiport
+----------------------------------------------------------
+Flow number: 1
+From 10.255.0.3:45678
+To    10.255.0.7:10100
+----------------------------------------------------------
+Total time               =      9.901000 s
+Total packets            =           99
+Minimum delay            =      0.000050 s
+Maximum delay            =      0.000410 s
+Average delay            =      0.000123 s
+Average jitter           =      0.000021 s
+Delay standard deviation =      0.000032 s
+Bytes received           =         9900
+Average bitrate          =         7.999192 Kbit/s
+Average packet rate      =        9.998990 pkt/s
+Packets dropped          =            1 (1.00 %)
+Average loss-burst size  =     1.000000 pkt
+----------------------------------------------------------
+
+__________________________________________________________
+****************  TOTAL RESULTS   ******************
+__________________________________________________________
+Number of flows          =            1
+Total time               =      9.901000 s
+Total packets            =           99
+Minimum delay            =      0.000050 s
+Maximum delay            =      0.000410 s
+Average delay            =      0.000123 s
+Average jitter           =      0.000021 s
+Delay standard deviation =      0.000032 s
+Bytes received           =         9900
+Average bitrate          =         7.999192 Kbit/s
+Average packet rate      =        9.998990 pkt/s
+Packets dropped          =            1 (1.00 %)
+Average loss-burst size  =            1 pkt
+Error lines              =            0
+----------------------------------------------------------
+"""
+
+
+def test_parse_summary_reads_the_totals():
+    summary = parse_summary(ITGDEC_OUTPUT)
+    assert summary.flow is None
+    assert summary.avg_delay == 0.000123
+    assert summary.avg_jitter == 0.000021
+    assert summary.avg_bitrate == 7.999192
+    assert summary.total_packets == 99
+    assert summary.packets_dropped == 1
+    assert summary.loss_percent == 1.0
+
+
+def test_iter_summaries_yields_each_flow_then_the_totals():
+    summaries = list(iter_summaries(ITGDEC_OUTPUT.splitlines(keepends=True)))
+    assert [summary.flow for summary in summaries] == [1, None]
+    assert summaries[0].min_delay == 0.000050
+    array = summaries_to_array(summaries)
+    assert array["flow"][0] == 1 and math.isnan(array["flow"][1])
+
+
+def test_nothing_received():
+    output = ITGDEC_OUTPUT.replace("0.000123", "-nan")
+    assert math.isnan(parse_summary(output).avg_delay)
+    assert parse_summary("ITGDec: cannot open file receiver.log\n") is None
@@ -0,0 +1,93 @@
+import csv
+import os
+
+import numpy as np
+
+from sdn_routing.measurement_store import MEASUREMENT_DTYPE, SOURCE_FILE, MeasurementStore
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as fd:
+        writer = csv.writer(fd)
+        writer.writerow(["Source", "Destination", "Avg_Delay(ms)"])
+        writer.writerows(rows)
+
+
+def chunk_files(root):
+    return sorted(os.path.join(directory, name)
+                  for directory in os.listdir(root) if os.path.isdir(os.path.join(root, directory))
+                  for name in os.listdir(os.path.join(root, directory)))
+
+
+def test_append_rows_groups_by_link_in_order(tmp_path):
+    rows = np.array([(0, 1, 2, 0.1, np.nan, np.nan), (1, 2, 3, 0.5, np.nan, np.nan),
+                     (2, 1, 2, 0.2, np.nan, np.nan), (3, 2, 3, 0.6, np.nan, np.nan),
+                     (4, 1, 2, 0.3, np.nan, np.nan)], dtype=MEASUREMENT_DTYPE)
+    with MeasurementStore(str(tmp_path / "store")) as store:
+        store.append_rows(rows)
+        store.append(1, 2, None, timestamp=5)
+        assert store.links() == [(1, 2), (2, 3)]
+        assert store.values(1, 2).tolist() == [0.1, 0.2, 0.3]
+        assert store.count(1, 2) == 3  # the None delay is stored as NaN and skipped
+
+    reopened = MeasurementStore(str(tmp_path / "store"))
+    assert reopened.values(2, 3).tolist() == [0.5, 0.6]
+    assert reopened.min(1, 2) == 0.1 and reopened.max(1, 2) == 0.3 and reopened.latest(1, 2) == 0.3
+    assert len(reopened.samples(1, 2)) == 4
+    assert reopened.min(4, 5) is None
+
+
+def test_flush_writes_one_chunk_per_link(tmp_path):
+    store = MeasurementStore(str(tmp_path), flush_rows=4)
+    for i in range(4):
+        store.append(1 + i % 2, 9, 0.1 * i, timestamp=i)
+    assert store.pending_rows == 0
+    assert [path.split(os.sep)[0] for path in chunk_files(str(tmp_path))] == ["1-9", "2-9"]
+
+
+def test_from_csv_imports_once(tmp_path):
+    path = str(tmp_path / "values.csv")
+    write_csv(path, [(1, 2, 0.15), (2, 1, 0.16), (1, 2, 0.14)])
+    store = MeasurementStore.from_csv(path)
+    assert store.values(1, 2).tolist() == [0.15, 0.14]
+    chunks = chunk_files(store.root)
+
+    again = MeasurementStore.from_csv(path)
+    assert chunk_files(again.root) == chunks
+    assert again.values(2, 1).tolist() == [0.16]
+
+
+def test_from_csv_recovers_from_an_unfinished_import(tmp_path):
+    path = str(tmp_path / "values.csv")
+    write_csv(path, [(1, 2, 0.15), (2, 3, 0.25)])
+    store = MeasurementStore.from_csv(path)
+    # A crash between the chunks and the stamp leaves chunks without source.json
+    os.remove(os.path.join(store.root, SOURCE_FILE))
+
+    store = MeasurementStore.from_csv(path)
+    assert store.values(1, 2).tolist() == [0.15]
+    assert store.values(2, 3).tolist() == [0.25]
+
+
+def test_from_csv_reimports_a_changed_csv(tmp_path):
+    path = str(tmp_path / "values.csv")
+    write_csv(path, [(1, 2, 0.15)])
+    MeasurementStore.from_csv(path)
+    write_csv(path, [(1, 2, 0.2), (1, 2, 0.3), (3, 4, 0.4)])
+    os.utime(path, ns=(0, 1))  # a different mtime even on coarse clocks
+    store = MeasurementStore.from_csv(path)
+    assert store.values(1, 2).tolist() == [0.2, 0.3]
+    assert store.links() == [(1, 2), (3, 4)]
+
+
+def test_export_csv_round_trip(tmp_path):
+    path = str(tmp_path / "values.csv")
+    rows = [(1, 2, 0.15), (2, 3, 0.25), (1, 2, 0.14)]
+    write_csv(path, rows)
+    store = MeasurementStore.from_csv(path)
+    exported = str(tmp_path / "demo.csv")
+    assert store.export_csv(exported) == 3
+    with open(exported, newline="") as fd:
+        reader = csv.reader(fd)
+        assert next(reader) == ["Source", "Destination", "Avg_Delay(ms)"]
+        assert [(int(src), int(dst), float(delay)) for src, dst, delay in reader] == rows
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from sdn_routing.probe_scheduler import measure_in_rounds, probe_address, schedule_rounds
+from sdn_routing.topology_loader import load_topology
+
+
+def max_degree(links):
+    degree = {}
+    for src, dst in links:
+        degree[src] = degree.get(src, 0) + 1
+        degree[dst] = degree.get(dst, 0) + 1
+    return max(degree.values())
+
+
+@pytest.mark.parametrize("name", ["abilene.json", "german50.json", "dataset.json"])
+def test_rounds_are_switch_disjoint_and_cover_every_link(name):
+    links = load_topology(name, cache=False).link_list()
+    rounds = schedule_rounds(links)
+    for round_links in rounds:
+        switches = [switch for link in round_links for switch in link]
+        assert len(switches) == len(set(switches))
+    assert sorted(link for round_links in rounds for link in round_links) == sorted(links)
+    assert len(rounds) <= 2 * max_degree(links) - 1
+
+
+def test_random_graph_rounds():
+    rng = random.Random(7)
+    links = list({tuple(rng.sample(range(1, 60), 2)) for _ in range(300)})
+    rounds = schedule_rounds(links)
+    assert sum(len(round_links) for round_links in rounds) == len(links)
+    assert len(rounds) <= 2 * max_degree(links) - 1
+
+
+def test_measure_in_rounds_keeps_failures():
+    def probe(src, dst, slot):
+        if (src, dst) == (2, 3):
+            raise RuntimeError("probe failed")
+        return src * 10 + dst
+
+    results = measure_in_rounds([(1, 2), (2, 3), (3, 4)], probe)
+    assert results[(1, 2)] == 12 and results[(3, 4)] == 34
+    assert isinstance(results[(2, 3)], RuntimeError)
+
+
+def test_probe_addresses_are_unique():
+    addresses = {probe_address(switch_no) for switch_no in range(1, 1000)}
+    assert len(addresses) == 999
+    assert probe_address(258) == "10.255.1.2"
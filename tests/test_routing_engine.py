@@ -0,0 +1,90 @@
+import math
+import random
+
+import networkx as nx
+import pytest
+
+from sdn_routing.routing_engine import RoutingEngine
+
+
+def random_cost_matrix(rng, num_nodes, extra_links):
+    """A connected random graph: a random spanning tree plus extra_links more links."""
+    matrix = [[0.0] * num_nodes for _ in range(num_nodes)]
+    order = list(range(num_nodes))
+    rng.shuffle(order)
+    for k in range(1, num_nodes):
+        i, j = order[k], order[rng.randrange(k)]
+        matrix[i][j] = matrix[j][i] = rng.uniform(1, 10)
+    for _ in range(extra_links):
+        i, j = rng.sample(range(num_nodes), 2)
+        matrix[i][j] = matrix[j][i] = rng.uniform(1, 10)
+    return matrix
+
+
+def assert_matches_networkx(engine):
+    """Every cached tree holds the distances a fresh Dijkstra finds, and its paths cost that much."""
+    for source, tree in engine.trees.items():
+        expected = nx.single_source_dijkstra_path_length(engine.graph, source)
+        for node in engine.graph:
+            if node not in expected:
+                with pytest.raises(nx.NetworkXNoPath):
+                    engine.shortest_path(source, node)
+                continue
+            path, length = engine.shortest_path(source, node)
+            assert length == pytest.approx(expected[node])
+            assert nx.path_weight(engine.graph, path, "weight") == pytest.approx(expected[node])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_repair_matches_recomputation(seed):
+    rng = random.Random(seed)
+    num_nodes = 30
+    engine = RoutingEngine(random_cost_matrix(rng, num_nodes, 40))
+    for source in rng.sample(range(1, num_nodes + 1), 6):
+        engine.tree(f"s{source}")
+
+    edges = list(engine.graph.edges())
+    for _ in range(200):
+        node1, node2 = rng.choice(edges)
+        # Mostly re-weight, sometimes remove (weight 0) or restore the link
+        weight = 0 if rng.random() < 0.1 else rng.uniform(1, 10)
+        engine.update_link(node1, node2, weight)
+    assert_matches_networkx(engine)
+
+
+def test_update_link_each_step():
+    rng = random.Random(42)
+    engine = RoutingEngine(random_cost_matrix(rng, 12, 10))
+    for source in ("s1", "s5", "s9"):
+        engine.tree(source)
+    edges = list(engine.graph.edges())
+    for _ in range(50):
+        node1, node2 = rng.choice(edges)
+        engine.update_link(node1, node2, rng.choice([0, rng.uniform(0.5, 20)]))
+        assert_matches_networkx(engine)
+
+
+def test_unchanged_weight_repairs_nothing():
+    engine = RoutingEngine([[0, 1, 0], [1, 0, 2], [0, 2, 0]])
+    engine.tree("s1")
+    assert engine.update_link("s1", "s2", 1) == 0
+
+
+def test_removed_link_disconnects():
+    engine = RoutingEngine([[0, 1, 0], [1, 0, 2], [0, 2, 0]])
+    assert engine.shortest_path("s1", "s3") == (["s1", "s2", "s3"], 3)
+    engine.update_link("s2", "s3", 0)
+    with pytest.raises(nx.NetworkXNoPath):
+        engine.shortest_path("s1", "s3")
+    assert engine.tree("s1").dist["s3"] == math.inf
+
+
+def test_sync_reloads_only_a_new_matrix():
+    matrix = [[0, 1], [1, 0]]
+    engine = RoutingEngine(matrix)
+    engine.tree("s1")
+    engine.sync(matrix)
+    assert "s1" in engine.trees
+    engine.sync([[0, 5], [5, 0]])
+    assert engine.trees == {}
+    assert engine.shortest_path("s1", "s2") == (["s1", "s2"], 5)